@@ -0,0 +1,54 @@
+"""
+ベンチマーク用の手牌コーパス
+
+すべて固定シードの random.Random から生成するので、実行ごとに同じ手牌になる。
+"""
+import random
+from typing import List, Tuple
+
+from models.tile_utils import TILE_KINDS, build_wall, hand_to_counts, sort_hand
+
+
+CORPUS_SEED = 20240501
+
+
+def random_hands(size: int, num_tiles: int, seed: int = CORPUS_SEED) -> List[List[str]]:
+	"""シャッフルした牌山の先頭から num_tiles 枚を取った手牌を size 個作る"""
+	rng = random.Random(seed)
+	return [sort_hand(build_wall(rng)[:num_tiles]) for _ in range(size)]
+
+
+def _random_complete_hand(rng: random.Random) -> List[str]:
+	"""4面子1雀頭の14枚（同じ牌は4枚まで）"""
+	while True:
+		tiles: List[str] = []
+		for _ in range(4):
+			if rng.random() < 0.65:
+				start = rng.randrange(3) * 9 + rng.randrange(7)
+				tiles += [TILE_KINDS[start + i] for i in range(3)]
+			else:
+				tiles += [TILE_KINDS[rng.randrange(34)]] * 3
+		tiles += [TILE_KINDS[rng.randrange(34)]] * 2
+		if max(hand_to_counts(tiles)) <= 4:
+			return sort_hand(tiles)
+
+
+def agari_hands(size: int, seed: int = CORPUS_SEED) -> List[Tuple[List[str], str]]:
+	"""和了形の14枚と和了牌の組を size 個作る"""
+	rng = random.Random(seed)
+	hands = []
+	for _ in range(size):
+		tiles = _random_complete_hand(rng)
+		hands.append((tiles, rng.choice(tiles)))
+	return hands
+
+
+def tenpai_hands(size: int, seed: int = CORPUS_SEED) -> List[List[str]]:
+	"""和了形から1枚抜いた13枚（テンパイ形）を size 個作る"""
+	rng = random.Random(seed)
+	hands = []
+	for _ in range(size):
+		tiles = _random_complete_hand(rng)
+		tiles.pop(rng.randrange(len(tiles)))
+		hands.append(tiles)
+	return hands
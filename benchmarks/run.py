@@ -0,0 +1,311 @@
+"""
+ホットパスのベンチマーク
+
+固定シードの手牌コーパスで各処理を計測し、結果を JSON に書き出して
+保存済みのベースラインと比較する。ネットワークや外部サービスは使わない。
+
+	python -m benchmarks.run                       # 計測してベースラインと比較
+	python -m benchmarks.run --only shanten        # 名前に shanten を含むものだけ
+	python -m benchmarks.run --update-baseline     # 今回の結果をベースラインとして保存
+
+ベースラインより per_op_us（1操作あたりの中央値, µs）が threshold を超えて
+遅くなったケースがあれば終了コード 1 を返す。
+キャッシュの効果で計測が歪まないよう、各反復の前にプロセス内のキャッシュを破棄する。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import agari_hands, random_hands, tenpai_hands
+from logic.agari import AgariChecker, clear_agari_cache
+from logic.shanten import calculate_shanten_from_counts, get_shanten_service
+from logic.waits import clear_wait_cache
+from models.game import Game
+from models.player import AIPlayer
+from models.tile_utils import build_wall, hand_to_counts
+from models.wall_source import PredefinedWallSource
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_OUTPUT_PATH = os.path.join(BENCHMARK_DIR, 'results.json')
+DEFAULT_THRESHOLD = 0.25
+
+# ケース関数はコーパスの大きさを受け取って準備を行い、(計測する関数, その関数1回あたりの操作数) を返す
+BenchmarkCase = Callable[[int], Tuple[Callable[[], None], int]]
+
+BENCHMARKS: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkCase], BenchmarkCase]:
+	"""ベンチマークケースを登録するデコレータ"""
+	def register(func: BenchmarkCase) -> BenchmarkCase:
+		BENCHMARKS[name] = func
+		return func
+	return register
+
+
+def clear_caches() -> None:
+	"""プロセス内の計算キャッシュをすべて破棄"""
+	get_shanten_service().clear()
+	clear_wait_cache()
+	clear_agari_cache()
+	AgariChecker.value_cache.clear()
+
+
+def _shanten_case(backend: str, size: int):
+	corpus = [hand_to_counts(h) for h in random_hands(size // 2, 13) + random_hands(size // 2, 14, seed=7)]
+
+	def run() -> None:
+		for counts in corpus:
+			calculate_shanten_from_counts(counts, backend=backend)
+	return run, len(corpus)
+
+
+@benchmark('shanten_library')
+def bench_shanten_library(size: int):
+	return _shanten_case('mahjong', size)
+
+
+@benchmark('shanten_fallback')
+def bench_shanten_fallback(size: int):
+	return _shanten_case('fallback', max(size // 10, 2))
+
+
+@benchmark('shanten_table')
+def bench_shanten_table(size: int):
+	return _shanten_case('table', size)
+
+
+@benchmark('agari_is_agari')
+def bench_is_agari(size: int):
+	checker = AgariChecker()
+	corpus = [tiles for tiles, _ in agari_hands(size // 2)] + random_hands(size // 2, 14)
+
+	def run() -> None:
+		for tiles in corpus:
+			checker.is_agari(tiles, melds=[])
+	return run, len(corpus)
+
+
+@benchmark('estimate_hand_value')
+def bench_estimate_hand_value(size: int):
+	checker = AgariChecker()
+	corpus = agari_hands(max(size // 10, 2))
+
+	def run() -> None:
+		for tiles, win_tile in corpus:
+			checker.estimate_hand_value(tiles, win_tile, is_tsumo=True)
+	return run, len(corpus)
+
+
+def _tenpai_game(size: int) -> Tuple[Game, List[List[str]]]:
+	game = Game(num_players=4, human_player_id=0, rng=random.Random(1))
+	game.debug_wait_check = False
+	game.start_game()
+	return game, tenpai_hands(size)
+
+
+@benchmark('game_get_agari_tiles')
+def bench_get_agari_tiles(size: int):
+	game, corpus = _tenpai_game(size)
+	player = game.players[1]
+
+	def run() -> None:
+		for tiles in corpus:
+			player.hand.tiles = tiles
+			game.get_agari_tiles(1)
+	return run, len(corpus)
+
+
+@benchmark('game_is_furiten')
+def bench_is_furiten(size: int):
+	game, corpus = _tenpai_game(size)
+	player = game.players[1]
+	discards = [random_hands(1, 10, seed=i)[0] for i in range(8)]
+
+	def run() -> None:
+		for i, tiles in enumerate(corpus):
+			player.hand.tiles = tiles
+			player.discards = discards[i % len(discards)]
+			game.is_furiten(1)
+	return run, len(corpus)
+
+
+@benchmark('ai_choose_discard')
+def bench_choose_discard(size: int):
+	player = AIPlayer(1, rng=random.Random(1))
+	corpus = random_hands(size, 14)
+
+	def run() -> None:
+		for tiles in corpus:
+			player.hand.tiles = tiles
+			player.choose_discard()
+	return run, len(corpus)
+
+
+def _seeded_walls(count: int) -> List[List[str]]:
+	rng = random.Random(99)
+	return [build_wall(rng) for _ in range(count)]
+
+
+@benchmark('process_discard_cycle')
+def bench_process_discard(size: int):
+	ops = max(size // 4, 4)
+	walls = _seeded_walls(8)
+
+	def run() -> None:
+		game = Game(num_players=4, human_player_id=-1, rng=random.Random(5), wall_source=PredefinedWallSource(walls * 8))
+		game.start_game()
+		for _ in range(ops):
+			if game.phase == 'call_wait':
+				for entry in list(game.pending_calls):
+					if game.phase == 'call_wait':
+						game.resolve_pending_call(entry['player_id'], 'pass')
+				continue
+			player = game.get_current_player()
+			game.process_discard(player.choose_discard())
+	return run, ops
+
+
+@benchmark('webapp_discard_request')
+def bench_webapp_discard(size: int):
+	import webapp
+
+	webapp.app.config['TESTING'] = True
+	ops = max(size // 20, 2)
+
+	def run() -> None:
+		client = webapp.app.test_client()
+		random.seed(3)
+		client.get('/reset')
+		client.post('/debug_tenpai', json={})
+		for _ in range(ops):
+			with client.session_transaction() as sess:
+				game = webapp.game_store.get(sess['game_token'])
+			if game.phase == 'call_wait' and game.pending_calls:
+				client.post('/apply_call', json={'player_id': game.pending_calls[0]['player_id'], 'action': 'pass'})
+			else:
+				client.post('/discard', data={'player_id': str(game.current_turn), 'discard_index': '0'})
+	return run, ops
+
+
+def run_benchmarks(
+	names: Optional[List[str]] = None,
+	repeat: int = 5,
+	size: int = 400,
+) -> Dict[str, Dict[str, Any]]:
+	"""
+	ベンチマークを実行して {名前: {'ops', 'per_op_us', 'min_us', 'repeat'}} を返す
+
+	per_op_us は反復ごとの1操作あたり時間の中央値、min_us は最小値。
+	"""
+	results: Dict[str, Dict[str, Any]] = {}
+	for name, case in BENCHMARKS.items():
+		if names and not any(pattern in name for pattern in names):
+			continue
+		run, ops = case(size)
+		samples = []
+		for _ in range(repeat):
+			clear_caches()
+			started = time.perf_counter()
+			run()
+			samples.append((time.perf_counter() - started) / ops * 1e6)
+		results[name] = {
+			'ops': ops,
+			'repeat': repeat,
+			'per_op_us': round(statistics.median(samples), 3),
+			'min_us': round(min(samples), 3),
+		}
+	return results
+
+
+def compare_to_baseline(
+	results: Dict[str, Dict[str, Any]],
+	baseline: Dict[str, Dict[str, Any]],
+	threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+	"""
+	ベースラインとの比較結果を返す
+
+	ratio = 今回 / ベースライン。ratio > 1 + threshold なら regression=True。
+	ベースラインに無いケースは比較しない。
+	"""
+	rows = []
+	for name, result in results.items():
+		base = baseline.get(name)
+		if not base or not base.get('per_op_us'):
+			continue
+		ratio = result['per_op_us'] / base['per_op_us']
+		rows.append({
+			'name': name,
+			'baseline_us': base['per_op_us'],
+			'current_us': result['per_op_us'],
+			'ratio': round(ratio, 3),
+			'regression': ratio > 1 + threshold,
+		})
+	return rows
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+	"""結果ファイル（write_results の形式）からケースごとの結果を読み込む"""
+	with open(path, encoding='utf-8') as f:
+		return json.load(f).get('results', {})
+
+
+def write_results(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+	"""計測結果を実行環境の情報と一緒に JSON で書き出す"""
+	payload = {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'results': results,
+	}
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(payload, f, ensure_ascii=False, indent=2, sort_keys=True)
+		f.write('\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description='ホットパスのベンチマーク')
+	parser.add_argument('--only', nargs='*', default=None, help='名前にこの文字列を含むケースだけ実行')
+	parser.add_argument('--repeat', type=int, default=5, help='反復回数')
+	parser.add_argument('--size', type=int, default=400, help='コーパスの大きさ')
+	parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help='結果の出力先')
+	parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='比較するベースライン')
+	parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='許容する悪化率（0.25 = 25%%）')
+	parser.add_argument('--update-baseline', action='store_true', help='結果をベースラインとして保存')
+	args = parser.parse_args(argv)
+
+	results = run_benchmarks(args.only, repeat=args.repeat, size=args.size)
+	write_results(args.output, results)
+	for name, result in results.items():
+		print(f"{name:28s} {result['per_op_us']:12.2f} us/op  (min {result['min_us']:.2f}, ops {result['ops']})")
+
+	if args.update_baseline:
+		baseline = load_results(args.baseline) if os.path.exists(args.baseline) else {}
+		baseline.update(results)
+		write_results(args.baseline, baseline)
+		print(f"baseline updated: {args.baseline}")
+		return 0
+
+	if not os.path.exists(args.baseline):
+		print(f"no baseline at {args.baseline} (run with --update-baseline)")
+		return 0
+
+	rows = compare_to_baseline(results, load_results(args.baseline), args.threshold)
+	regressions = [row for row in rows if row['regression']]
+	for row in rows:
+		mark = 'REGRESSION' if row['regression'] else 'ok'
+		print(f"{row['name']:28s} {row['baseline_us']:10.2f} -> {row['current_us']:10.2f} us  x{row['ratio']:.2f}  {mark}")
+	return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
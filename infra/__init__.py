@@ -0,0 +1 @@
+"""Infra package"""
@@ -0,0 +1,262 @@
+"""
+サーバー側のゲーム状態ストア
+
+Cookie セッションにはトークンだけを保存し、ゲーム本体はここに置く。
+- MemoryGameStore: 生きた Game オブジェクトを TTL 付きで保持（プロセス内）。
+  put() 時点の状態を控えておき、失敗したリクエストの変更は revert() で捨てる
+- SQLiteGameStore: to_json_serializable() の JSON を SQLite に保存（再起動・複数プロセス向け）。
+  行ごとのバージョンで put() を条件付きにし、別プロセスが先に保存していれば GameStoreConflict
+
+lock(token) はプロセス内のロックなので、複数プロセスでの同時更新は SQLiteGameStore の
+バージョン照合で検出する（MemoryGameStore は単一プロセス専用）。
+
+使用するストアは環境変数で切り替える:
+	MAHJONG_GAME_STORE       = memory（既定） | sqlite
+	MAHJONG_GAME_STORE_PATH  = SQLite ファイルのパス（sqlite のみ）
+	MAHJONG_GAME_TTL         = 最終アクセスからの保持秒数
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from models.game import Game
+
+
+GAME_STORE_ENV = 'MAHJONG_GAME_STORE'
+GAME_STORE_PATH_ENV = 'MAHJONG_GAME_STORE_PATH'
+GAME_TTL_ENV = 'MAHJONG_GAME_TTL'
+
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'games.sqlite3')
+
+
+class GameStoreConflict(RuntimeError):
+	"""読み込んだ後に別のリクエストが同じゲームを保存していた"""
+
+
+class GameStore(ABC):
+	"""
+	ゲームストアの共通インターフェース
+
+	同じトークンへのリクエストは lock(token) で直列化し、
+	get → 変更 → put（失敗時は revert）の間に他のリクエストが割り込まないようにする。
+	"""
+
+	def __init__(self):
+		self._token_locks: 'weakref.WeakValueDictionary[str, threading.Lock]' = weakref.WeakValueDictionary()
+		self._token_locks_guard = threading.Lock()
+
+	def lock(self, token: str) -> threading.Lock:
+		"""トークンごとのロックを返す（使用中のリクエストが無くなれば自動で消える）"""
+		with self._token_locks_guard:
+			lock = self._token_locks.get(token)
+			if lock is None:
+				lock = threading.Lock()
+				self._token_locks[token] = lock
+			return lock
+
+	@abstractmethod
+	def get(self, token: str) -> Optional[Game]:
+		"""トークンに対応するゲームを返す（無い・期限切れなら None）"""
+
+	@abstractmethod
+	def put(self, token: str, game: Game) -> None:
+		"""ゲームを保存し、有効期限を延長する"""
+
+	@abstractmethod
+	def delete(self, token: str) -> None:
+		"""ゲームを破棄"""
+
+	def revert(self, token: str) -> None:
+		"""
+		get() 後に put() しなかった変更を捨てる（失敗したリクエスト用）
+
+		get() のたびに復元するストアでは変更が保存されないので何もしない。
+		"""
+
+	@staticmethod
+	def new_token() -> str:
+		"""推測できないセッショントークンを生成"""
+		return secrets.token_urlsafe(16)
+
+
+class MemoryGameStore(GameStore):
+	"""
+	プロセス内に Game オブジェクトをそのまま保持するストア
+
+	アクセスのたびに有効期限を延長し、期限切れと上限超過分は古い順に破棄する。
+	get() は生きたオブジェクトを返すため、put() 時点の状態を JSON で控えておき、
+	revert() ではそこから復元して途中までの変更を捨てる。
+	"""
+
+	def __init__(
+		self,
+		ttl_seconds: float = DEFAULT_TTL_SECONDS,
+		max_entries: int = 1024,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		super().__init__()
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self._clock = clock
+		# token -> (有効期限, 生きた Game, put() 時点の JSON)
+		self._games: 'OrderedDict[str, Tuple[float, Game, str]]' = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, token: str) -> Optional[Game]:
+		now = self._clock()
+		with self._lock:
+			self._evict_expired(now)
+			entry = self._games.get(token)
+			if entry is None:
+				return None
+			_, game, saved = entry
+			self._games[token] = (now + self.ttl_seconds, game, saved)
+			self._games.move_to_end(token)
+			return game
+
+	def put(self, token: str, game: Game) -> None:
+		saved = _dump_game(game)
+		now = self._clock()
+		with self._lock:
+			self._games[token] = (now + self.ttl_seconds, game, saved)
+			self._games.move_to_end(token)
+			self._evict_expired(now)
+			while len(self._games) > self.max_entries:
+				self._games.popitem(last=False)
+
+	def delete(self, token: str) -> None:
+		with self._lock:
+			self._games.pop(token, None)
+
+	def revert(self, token: str) -> None:
+		with self._lock:
+			entry = self._games.get(token)
+			if entry is None:
+				return
+			expires_at, _, saved = entry
+			self._games[token] = (expires_at, Game.from_json_serializable(json.loads(saved)), saved)
+
+	def __len__(self) -> int:
+		with self._lock:
+			return len(self._games)
+
+	def _evict_expired(self, now: float) -> None:
+		# 最終アクセス順に並んでいるので先頭から期限切れを落とす
+		while self._games:
+			token, (expires_at, _, _) = next(iter(self._games.items()))
+			if expires_at > now:
+				break
+			del self._games[token]
+
+
+class SQLiteGameStore(GameStore):
+	"""
+	ゲーム状態を JSON として SQLite に保存するストア
+
+	get() のたびに Game.from_json_serializable() で復元する。
+	get() で読んだゲームの put() は読んだ時点のバージョンの行だけを更新し、
+	その間に別プロセスが保存・削除していれば GameStoreConflict を送出する。
+	"""
+
+	def __init__(
+		self,
+		path: str = DEFAULT_SQLITE_PATH,
+		ttl_seconds: float = DEFAULT_TTL_SECONDS,
+		clock: Callable[[], float] = time.time,
+	):
+		super().__init__()
+		self.path = path
+		self.ttl_seconds = ttl_seconds
+		self._clock = clock
+		self._lock = threading.Lock()
+		if path != ':memory:':
+			directory = os.path.dirname(os.path.abspath(path))
+			os.makedirs(directory, exist_ok=True)
+		# get() で復元したゲーム -> 読んだ時点の行バージョン
+		self._versions: 'weakref.WeakKeyDictionary[Game, int]' = weakref.WeakKeyDictionary()
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		with self._lock, self._conn:
+			self._conn.execute(
+				'CREATE TABLE IF NOT EXISTS games ('
+				'token TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL, '
+				'version INTEGER NOT NULL DEFAULT 0)'
+			)
+			columns = {row[1] for row in self._conn.execute('PRAGMA table_info(games)')}
+			if 'version' not in columns:
+				self._conn.execute('ALTER TABLE games ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+	def get(self, token: str) -> Optional[Game]:
+		now = self._clock()
+		with self._lock:
+			row = self._conn.execute(
+				'SELECT data, expires_at, version FROM games WHERE token = ?', (token,)
+			).fetchone()
+			if row is None:
+				return None
+			if row[1] <= now:
+				with self._conn:
+					self._conn.execute('DELETE FROM games WHERE token = ?', (token,))
+				return None
+		game = Game.from_json_serializable(json.loads(row[0]))
+		self._versions[game] = row[2]
+		return game
+
+	def put(self, token: str, game: Game) -> None:
+		data = _dump_game(game)
+		now = self._clock()
+		expires_at = now + self.ttl_seconds
+		version = self._versions.get(game)
+		with self._lock, self._conn:
+			if version is None:
+				# 新しく作ったゲームはそのまま保存する
+				self._conn.execute(
+					'INSERT INTO games (token, data, expires_at, version) VALUES (?, ?, ?, 1) '
+					'ON CONFLICT(token) DO UPDATE SET data = excluded.data, '
+					'expires_at = excluded.expires_at, version = games.version + 1',
+					(token, data, expires_at),
+				)
+				new_version = self._conn.execute(
+					'SELECT version FROM games WHERE token = ?', (token,)
+				).fetchone()[0]
+			else:
+				updated = self._conn.execute(
+					'UPDATE games SET data = ?, expires_at = ?, version = version + 1 '
+					'WHERE token = ? AND version = ?',
+					(data, expires_at, token, version),
+				).rowcount
+				if not updated:
+					raise GameStoreConflict(f'game {token!r} was saved by another request')
+				new_version = version + 1
+			self._conn.execute('DELETE FROM games WHERE expires_at <= ?', (now,))
+		self._versions[game] = new_version
+
+	def delete(self, token: str) -> None:
+		with self._lock, self._conn:
+			self._conn.execute('DELETE FROM games WHERE token = ?', (token,))
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+def _dump_game(game: Game) -> str:
+	return json.dumps(game.to_json_serializable(), ensure_ascii=False, separators=(',', ':'))
+
+
+def create_game_store_from_env() -> GameStore:
+	"""環境変数の設定に従ってゲームストアを作成"""
+	kind = os.environ.get(GAME_STORE_ENV, 'memory').lower()
+	ttl = float(os.environ.get(GAME_TTL_ENV, DEFAULT_TTL_SECONDS))
+	if kind == 'memory':
+		return MemoryGameStore(ttl_seconds=ttl)
+	if kind == 'sqlite':
+		return SQLiteGameStore(os.environ.get(GAME_STORE_PATH_ENV, DEFAULT_SQLITE_PATH), ttl_seconds=ttl)
+	raise ValueError(f"unknown game store: {kind!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,169 @@
+"""
+構造化ログ
+
+ライブラリ側は get_logger(__name__) で取得したロガーに log_event() でイベントを出すだけ。
+レベルが無効なイベントは LogRecord も作らずに捨てるので、デバッグ出力は有効にしない限りコストがかからない。
+
+出力の設定は configure_logging() が行う（webapp と CLI が起動時に呼ぶ）。
+ハンドラは QueueHandler で、実際の書き込みは QueueListener の別スレッドが行うため
+リクエスト処理が標準エラーへの書き込みで詰まらない。出力は1行1イベントの JSON。
+
+環境変数:
+	MAHJONG_LOG_LEVEL          既定のレベル（既定 WARNING）
+	MAHJONG_LOG_LEVELS         モジュール別のレベル（例: "webapp=DEBUG,models.game=INFO"）
+	MAHJONG_LOG_DEBUG_SAMPLE   DEBUG イベントを出力する割合（0.0〜1.0、既定 1.0）
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional, TextIO
+
+
+ROOT_LOGGER_NAME = 'mahjong'
+
+LOG_LEVEL_ENV = 'MAHJONG_LOG_LEVEL'
+LOG_LEVELS_ENV = 'MAHJONG_LOG_LEVELS'
+LOG_DEBUG_SAMPLE_ENV = 'MAHJONG_LOG_DEBUG_SAMPLE'
+
+DEFAULT_LEVEL = logging.WARNING
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+	"""モジュール名（__name__）に対応するロガー（mahjong.<name>）を返す"""
+	return logging.getLogger(f'{ROOT_LOGGER_NAME}.{name}')
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+	"""
+	イベント名と付随する値を構造化ログとして出力
+
+	レベルが無効なら何もしない。fields は JSON 化して1行に出力される
+	（JSON 化できない値は str() になる）。
+	"""
+	if logger.isEnabledFor(level):
+		logger.log(level, event, extra={'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+	"""1行1イベントの JSON に整形する"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		payload: Dict[str, Any] = {
+			'ts': round(record.created, 6),
+			'level': record.levelname,
+			'logger': record.name,
+			'event': record.getMessage(),
+		}
+		payload.update(getattr(record, 'fields', None) or {})
+		if record.exc_info:
+			payload['exc'] = self.formatException(record.exc_info)
+		return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+	"""DEBUG 以下のレコードを rate の割合だけ通す（INFO 以上は常に通す）"""
+
+	def __init__(self, rate: float, rng: Optional[random.Random] = None):
+		super().__init__()
+		self.rate = max(0.0, min(1.0, rate))
+		self.rng = rng or random.Random()
+
+	def filter(self, record: logging.LogRecord) -> bool:
+		if record.levelno > logging.DEBUG or self.rate >= 1.0:
+			return True
+		return self.rng.random() < self.rate
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, int]:
+	""""webapp=DEBUG,models.game=INFO" 形式をモジュール名→レベルの辞書にする（不正な項目は無視）"""
+	levels: Dict[str, int] = {}
+	for item in (spec or '').split(','):
+		name, sep, level = item.partition('=')
+		level_no = logging.getLevelName(level.strip().upper())
+		if sep and name.strip() and isinstance(level_no, int):
+			levels[name.strip()] = level_no
+	return levels
+
+
+def _level_from_env(default: int) -> int:
+	level_no = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, '').strip().upper())
+	return level_no if isinstance(level_no, int) else default
+
+
+def _sample_rate_from_env() -> float:
+	try:
+		return float(os.environ.get(LOG_DEBUG_SAMPLE_ENV, '1.0'))
+	except ValueError:
+		return 1.0
+
+
+def configure_logging(
+	level: Optional[int] = None,
+	module_levels: Optional[Dict[str, int]] = None,
+	debug_sample_rate: Optional[float] = None,
+	stream: Optional[TextIO] = None,
+	rng: Optional[random.Random] = None,
+) -> logging.Logger:
+	"""
+	mahjong.* ロガーの出力を設定する（引数省略時は環境変数から）
+
+	再度呼ぶと前回の設定（キューのリスナーを含む）を置き換える。
+	Returns:
+		設定したルートロガー（mahjong）
+	"""
+	global _listener
+	level = _level_from_env(DEFAULT_LEVEL) if level is None else level
+	if module_levels is None:
+		module_levels = parse_levels(os.environ.get(LOG_LEVELS_ENV))
+	if debug_sample_rate is None:
+		debug_sample_rate = _sample_rate_from_env()
+
+	with _lock:
+		_stop_listener()
+		root = logging.getLogger(ROOT_LOGGER_NAME)
+		for handler in list(root.handlers):
+			root.removeHandler(handler)
+		for name, existing in list(logging.Logger.manager.loggerDict.items()):
+			if name.startswith(ROOT_LOGGER_NAME + '.') and isinstance(existing, logging.Logger):
+				existing.setLevel(logging.NOTSET)
+
+		root.setLevel(level)
+		root.propagate = False
+		for name, module_level in module_levels.items():
+			get_logger(name).setLevel(module_level)
+
+		output = logging.StreamHandler(stream or sys.stderr)
+		output.setFormatter(JsonFormatter())
+		log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+		queue_handler = logging.handlers.QueueHandler(log_queue)
+		queue_handler.addFilter(DebugSampler(debug_sample_rate, rng))
+		root.addHandler(queue_handler)
+
+		_listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+		_listener.start()
+	return root
+
+
+def _stop_listener() -> None:
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		_listener = None
+
+
+def shutdown_logging() -> None:
+	"""キューに残ったログを書き出してリスナーを止める"""
+	with _lock:
+		_stop_listener()
+
+
+atexit.register(shutdown_logging)
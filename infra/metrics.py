@@ -0,0 +1,225 @@
+"""
+ホットパスの計測（呼び出し回数・累積時間・レイテンシのパーセンタイル）
+
+環境変数 MAHJONG_METRICS=1 のときだけ有効。無効時は @timed が元の関数をそのまま返すので
+実行時のコストは一切かからない（有効/無効はモジュール読み込み時に決まる）。
+
+	@timed('shanten')
+	def calculate_shanten_from_counts(...): ...
+
+集計は get_metrics_registry() から取得し、render_prometheus() で
+Prometheus のテキスト形式に変換できる（webapp の /metrics で公開）。
+"""
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+
+METRICS_ENV = 'MAHJONG_METRICS'
+
+# パーセンタイル計算に使う直近サンプル数（メトリクスごと）
+SAMPLE_WINDOW = 2048
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def metrics_enabled_from_env() -> bool:
+	return os.environ.get(METRICS_ENV) == '1'
+
+
+class TimerStats:
+	"""1つの計測点の集計（呼び出し回数・累積秒・直近サンプル）"""
+
+	__slots__ = ('count', 'total', 'max', '_samples', '_next')
+
+	def __init__(self):
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self._samples: List[float] = []
+		self._next = 0
+
+	def observe(self, seconds: float) -> None:
+		self.count += 1
+		self.total += seconds
+		if seconds > self.max:
+			self.max = seconds
+		if len(self._samples) < SAMPLE_WINDOW:
+			self._samples.append(seconds)
+		else:
+			# リングバッファで古いサンプルを上書き
+			self._samples[self._next] = seconds
+			self._next = (self._next + 1) % SAMPLE_WINDOW
+
+	def quantiles(self, qs: Iterable[float] = QUANTILES) -> Dict[float, float]:
+		ordered = sorted(self._samples)
+		if not ordered:
+			return {q: 0.0 for q in qs}
+		last = len(ordered) - 1
+		return {q: ordered[min(last, int(round(q * last)))] for q in qs}
+
+
+class MetricsRegistry:
+	"""計測点ごとの TimerStats を保持する"""
+
+	def __init__(self):
+		self._timers: Dict[str, TimerStats] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, name: str, seconds: float) -> None:
+		"""name の1回分の所要時間（秒）を記録"""
+		with self._lock:
+			stats = self._timers.get(name)
+			if stats is None:
+				stats = self._timers[name] = TimerStats()
+			stats.observe(seconds)
+
+	def reset(self) -> None:
+		with self._lock:
+			self._timers.clear()
+
+	def snapshot(self) -> Dict[str, Any]:
+		"""
+		集計結果を辞書で返す
+
+		{'timers': {name: {'count', 'total_sec', 'mean_us', 'max_us', 'p50_us', 'p90_us', 'p99_us'}}}
+		"""
+		with self._lock:
+			timers = {}
+			for name, stats in sorted(self._timers.items()):
+				q = stats.quantiles()
+				timers[name] = {
+					'count': stats.count,
+					'total_sec': round(stats.total, 6),
+					'mean_us': round(stats.total / stats.count * 1e6, 3) if stats.count else 0.0,
+					'max_us': round(stats.max * 1e6, 3),
+					'p50_us': round(q[0.5] * 1e6, 3),
+					'p90_us': round(q[0.9] * 1e6, 3),
+					'p99_us': round(q[0.99] * 1e6, 3),
+				}
+			return {'timers': timers}
+
+	def timer_items(self) -> List[Tuple[str, int, float, Dict[float, float]]]:
+		"""(name, count, total_sec, quantiles) の一覧（Prometheus 出力用）"""
+		with self._lock:
+			return [
+				(name, stats.count, stats.total, stats.quantiles())
+				for name, stats in sorted(self._timers.items())
+			]
+
+
+_registry = MetricsRegistry()
+_enabled = metrics_enabled_from_env()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+	"""プロセス共有の MetricsRegistry を返す"""
+	return _registry
+
+
+def metrics_enabled() -> bool:
+	"""計測が有効か（MAHJONG_METRICS=1 で起動したか）"""
+	return _enabled
+
+
+def timed(name: str, registry: Optional[MetricsRegistry] = None, enabled: Optional[bool] = None) -> Callable[[F], F]:
+	"""
+	関数の呼び出し回数と所要時間を記録するデコレータ
+
+	無効時は関数をそのまま返す（ラッパーを挟まない）。
+	enabled / registry はテスト用の上書き。
+	"""
+	active = _enabled if enabled is None else enabled
+
+	def decorate(func: F) -> F:
+		if not active:
+			return func
+		target = registry or _registry
+		perf_counter = time.perf_counter
+
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			started = perf_counter()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				target.observe(name, perf_counter() - started)
+		return wrapper  # type: ignore[return-value]
+	return decorate
+
+
+def _escape_label(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(
+	registry: Optional[MetricsRegistry] = None,
+	gauges: Optional[Dict[str, Dict[str, float]]] = None,
+) -> str:
+	"""
+	Prometheus のテキスト形式（version 0.0.4）で出力する
+
+	Args:
+		registry: 出力する MetricsRegistry（省略時はプロセス共有のもの）
+		gauges: 追加で出力するゲージ {メトリクス名: {ラベル name の値: 値}}（キャッシュ統計など）
+	"""
+	registry = registry or _registry
+	lines = [
+		'# HELP mahjong_metrics_enabled 1 if hot-path timers are enabled (MAHJONG_METRICS=1).',
+		'# TYPE mahjong_metrics_enabled gauge',
+		f'mahjong_metrics_enabled {1 if _enabled else 0}',
+	]
+
+	timers = registry.timer_items()
+	if timers:
+		lines.append('# HELP mahjong_call_duration_seconds Latency of instrumented hot-path calls.')
+		lines.append('# TYPE mahjong_call_duration_seconds summary')
+		for name, count, total, quantiles in timers:
+			label = _escape_label(name)
+			for q, value in quantiles.items():
+				lines.append(f'mahjong_call_duration_seconds{{name="{label}",quantile="{q}"}} {value:.9f}')
+			lines.append(f'mahjong_call_duration_seconds_sum{{name="{label}"}} {total:.9f}')
+			lines.append(f'mahjong_call_duration_seconds_count{{name="{label}"}} {count}')
+
+	for metric, values in (gauges or {}).items():
+		lines.append(f'# TYPE {metric} gauge')
+		for label, value in sorted(values.items()):
+			lines.append(f'{metric}{{name="{_escape_label(label)}"}} {value}')
+
+	return '\n'.join(lines) + '\n'
+
+
+def cache_gauges() -> Dict[str, Dict[str, float]]:
+	"""計算キャッシュのヒット・ミス・サイズをゲージ用の辞書にまとめる（計測の有効/無効に関係なく取得可能）"""
+	from logic.agari import AgariChecker, agari_cache_info
+	from logic.shanten import get_shanten_service
+	from logic.waits import wait_cache_info
+
+	hits: Dict[str, float] = {}
+	misses: Dict[str, float] = {}
+	sizes: Dict[str, float] = {}
+
+	shanten_stats = get_shanten_service().stats()
+	hits['shanten'] = shanten_stats['hits']
+	misses['shanten'] = shanten_stats['misses']
+	sizes['shanten'] = shanten_stats['size']
+
+	value_stats = AgariChecker.value_cache.stats()
+	hits['hand_value'] = value_stats['hits']
+	misses['hand_value'] = value_stats['misses']
+	sizes['hand_value'] = value_stats['size']
+
+	for label, info in (('waits', wait_cache_info()), ('agari', agari_cache_info())):
+		hits[label] = info.hits
+		misses[label] = info.misses
+		sizes[label] = info.currsize
+
+	return {
+		'mahjong_cache_hits': hits,
+		'mahjong_cache_misses': misses,
+		'mahjong_cache_size': sizes,
+	}
@@ -0,0 +1,122 @@
+"""
+フロント向け状態レスポンスのバージョン管理と差分生成
+
+アクションごとに状態へ連番のバージョンを振り、クライアントが直前に受け取った
+バージョン（since_version）を送ってきた場合は、変化したキーだけを返す。
+
+差分レスポンスの形式:
+	{
+		'version': 新しいバージョン,
+		'base_version': 差分の基準バージョン,
+		'delta': True,
+		'changed': {キー: 新しい値, ...},
+		'changed_players': {キー: {'プレイヤー番号': 新しい値, ...}, ...},
+		'removed': [今回のレスポンスに無くなったキー, ...],
+	}
+基準の状態を保持していない・バージョンが一致しない場合は従来どおりの全量を返す
+（'version' と 'delta': False を付加）。
+"""
+import copy
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+
+# プレイヤーごとのリストになっているキー（変化したプレイヤーの分だけ送る）
+PER_PLAYER_KEYS = frozenset({
+	'hands',
+	'discards',
+	'melds',
+	'shanten_list',
+	'agari_tiles',
+	'points',
+	'is_riichi',
+	'ippatsu_eligible',
+	'furiten_list',
+	'seat_winds',
+	'seat_wind_labels',
+})
+
+
+class VersionedState:
+	"""1ゲーム分の状態バージョンと、直前にクライアントへ送った状態"""
+
+	def __init__(self):
+		self.version = 0
+		self._snapshot: Optional[Dict[str, Any]] = None
+		self._lock = threading.Lock()
+
+	def respond(self, state: Dict[str, Any], since_version: Optional[int] = None) -> Dict[str, Any]:
+		"""
+		state を新しいバージョンとして記録し、クライアントへ返す辞書を作る
+
+		Args:
+			state: build_state_response() が作る全量の状態
+			since_version: クライアントが最後に受け取ったバージョン（無ければ全量）
+		"""
+		snapshot = copy.deepcopy(state)
+		with self._lock:
+			previous = self._snapshot
+			base_version = self.version
+			self.version += 1
+			self._snapshot = snapshot
+			version = self.version
+
+		if previous is None or since_version is None or since_version != base_version:
+			response = dict(state)
+			response['version'] = version
+			response['delta'] = False
+			return response
+		response = diff_states(previous, snapshot)
+		response['version'] = version
+		response['base_version'] = base_version
+		response['delta'] = True
+		return response
+
+
+def diff_states(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+	"""2つの状態辞書の差分（changed / changed_players / removed）を求める"""
+	changed: Dict[str, Any] = {}
+	changed_players: Dict[str, Dict[str, Any]] = {}
+	for key, value in new.items():
+		if key not in old:
+			changed[key] = value
+			continue
+		previous = old[key]
+		if previous == value:
+			continue
+		if (
+			key in PER_PLAYER_KEYS
+			and isinstance(value, list)
+			and isinstance(previous, list)
+			and len(value) == len(previous)
+		):
+			changed_players[key] = {
+				str(i): v for i, (p, v) in enumerate(zip(previous, value)) if p != v
+			}
+		else:
+			changed[key] = value
+	return {
+		'changed': changed,
+		'changed_players': changed_players,
+		'removed': [key for key in old if key not in new],
+	}
+
+
+_trackers: 'weakref.WeakKeyDictionary[Any, VersionedState]' = weakref.WeakKeyDictionary()
+_trackers_lock = threading.Lock()
+
+
+def get_versioned_state(game: Any) -> VersionedState:
+	"""
+	ゲームオブジェクトに対応する VersionedState を返す
+
+	ゲームが破棄されれば一緒に消える。ストアから毎回復元されるゲーム（SQLite）では
+	常に新しい VersionedState になり、レスポンスは全量になる。
+	"""
+	with _trackers_lock:
+		tracker = _trackers.get(game)
+		if tracker is None:
+			tracker = VersionedState()
+			_trackers[game] = tracker
+		return tracker
@@ -1,22 +1,230 @@
 """
 アガり（和了）判定とスコア計算
-mahjongライブラリを使用した訳判定と手数計算
+和了形の判定は34種枚数配列上の自前実装、役判定と点数計算は mahjong ライブラリを使用
 """
-from typing import List, Dict, Optional, Any
-from mahjong.agari import Agari as MahjongAgari
-from mahjong.tile import TilesConverter
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Sequence, Tuple
+import threading
 from mahjong.hand_calculating.hand import HandCalculator
 from mahjong.hand_calculating.hand_config import HandConfig
 from mahjong.hand_calculating.hand_config import OptionalRules
 from mahjong.meld import Meld
 from mahjong.constants import EAST, SOUTH, WEST, NORTH
 
-from models.tile_utils import TILE_INDEX
+from infra.metrics import timed
+from models.meld import MeldRecord
+from models.tile_ids import TileIdAllocator, tile_to_id, tiles_to_ids
+from models.tile_utils import TILE_INDEX, hand_to_counts, tile_to_index, tiles_to_indices
+from logic.scoring import score_hand
+from logic.yaku_filter import YAKU_MAYBE, YAKU_YES, yaku_verdict
+
+
+_TERMINAL_AND_HONOR_INDICES = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+
+
+@lru_cache(maxsize=4096)
+def _suit_is_sets(suit: Tuple[int, ...]) -> bool:
+    """1スート（9種）の枚数が面子（順子・刻子）だけに分解できるか"""
+    c = list(suit)
+    for i in range(9):
+        n = c[i]
+        if n == 0:
+            continue
+        # 最小の牌は (n % 3) 個の順子と残りの刻子で使い切るしかない
+        seqs = n % 3
+        if seqs:
+            if i > 6 or c[i + 1] < seqs or c[i + 2] < seqs:
+                return False
+            c[i + 1] -= seqs
+            c[i + 2] -= seqs
+    return True
+
+
+@lru_cache(maxsize=4096)
+def _suit_is_sets_with_pair(suit: Tuple[int, ...]) -> bool:
+    """1スート（9種）の枚数が雀頭1つ＋面子に分解できるか"""
+    for i in range(9):
+        if suit[i] >= 2:
+            c = list(suit)
+            c[i] -= 2
+            if _suit_is_sets(tuple(c)):
+                return True
+    return False
+
+
+@lru_cache(maxsize=8192)
+def _is_agari_concealed(counts: Tuple[int, ...]) -> bool:
+    """暗部の枚数配列（3n+2枚）が和了形か（副露分は枚数から暗黙に決まる）"""
+    if max(counts) > 4:
+        return False
+
+    if sum(counts) == 14:
+        # 七対子（同じ牌4枚は2対子とみなさない）
+        if all(c in (0, 2) for c in counts) and counts.count(2) == 7:
+            return True
+        # 国士無双
+        if sum(counts[i] for i in _TERMINAL_AND_HONOR_INDICES) == 14 and all(
+            counts[i] for i in _TERMINAL_AND_HONOR_INDICES
+        ):
+            return True
+
+    pair_blocks = 0
+    for i in range(27, 34):
+        c = counts[i]
+        if c == 1 or c == 4:
+            return False
+        if c == 2:
+            pair_blocks += 1
+    suit_with_pair = []
+    for off in (0, 9, 18):
+        rem = sum(counts[off:off + 9]) % 3
+        if rem == 1:
+            return False
+        suit_with_pair.append(rem == 2)
+        pair_blocks += rem == 2
+    if pair_blocks != 1:
+        return False
+
+    for s, off in enumerate((0, 9, 18)):
+        suit = counts[off:off + 9]
+        if suit_with_pair[s]:
+            if not _suit_is_sets_with_pair(suit):
+                return False
+        elif not _suit_is_sets(suit):
+            return False
+    return True
+
+
+def is_agari_counts(counts: Sequence[int], open_melds_count: int = 0) -> bool:
+    """
+    暗部の34種枚数配列が和了形かどうか（通常形・七対子・国士無双）
+
+    Args:
+        counts: 暗部（副露を除く）の34種枚数配列
+        open_melds_count: 副露数（カンも1面子として数える）
+    """
+    if sum(counts) + 3 * open_melds_count != 14:
+        return False
+    return _is_agari_concealed(tuple(counts))
+
+
+def clear_agari_cache() -> None:
+    """和了判定キャッシュを破棄"""
+    _is_agari_concealed.cache_clear()
+
+
+def agari_cache_info():
+    """和了判定キャッシュの統計（functools.lru_cache の cache_info）"""
+    return _is_agari_concealed.cache_info()
+
+
+def _is_valid_meld_tiles(tiles: Sequence[str]) -> bool:
+    """副露の牌リストが刻子・槓子・順子として成立しているか（Meld 化できるか）"""
+    if len(tiles) not in (3, 4):
+        return False
+    kinds = tiles_to_indices(tiles)
+    if len(kinds) != len(tiles):
+        return False
+    if all(k == kinds[0] for k in kinds):
+        return True
+    if len(kinds) != 3:
+        return False
+    kinds = sorted(kinds)
+    return kinds[2] < 27 and kinds[0] // 9 == kinds[2] // 9 and kinds[1] == kinds[0] + 1 and kinds[2] == kinds[0] + 2
+
+
+def count_valid_melds(melds: Optional[List[Any]]) -> int:
+    """Meld オブジェクト化せずに、有効な副露の数を数える"""
+    if not melds:
+        return 0
+    count = 0
+    for meld in melds:
+        if isinstance(meld, (Meld, MeldRecord)):
+            count += 1
+        elif isinstance(meld, dict):
+            count += _is_valid_meld_tiles(meld.get("tiles", []))
+        elif isinstance(meld, list):
+            count += _is_valid_meld_tiles(meld)
+    return count
+
+
+def _meld_cache_key(meld: Any) -> Tuple:
+    """副露1つをキャッシュキー用のタプルに変換"""
+    if isinstance(meld, MeldRecord):
+        return meld.cache_key
+    if isinstance(meld, Meld):
+        return ('meld', meld.type, tuple(meld.tiles or ()), bool(meld.opened))
+    if isinstance(meld, dict):
+        return ('dict', meld.get("type"), tuple(meld.get("tiles", [])))
+    if isinstance(meld, (list, tuple)):
+        return ('list', tuple(meld))
+    return ('other', repr(meld))
+
+
+def _copy_value(result: Dict[str, Any]) -> Dict[str, Any]:
+    """キャッシュ内の結果を呼び出し側が変更しても影響しないようにコピー"""
+    copied = dict(result)
+    copied['yaku'] = list(result.get('yaku') or [])
+    if isinstance(result.get('cost'), dict):
+        copied['cost'] = dict(result['cost'])
+    return copied
+
+
+class HandValueCache:
+    """
+    estimate_hand_value の結果キャッシュ（LRU・スレッドセーフ）
+
+    キーは (暗部の枚数配列, 副露, 和了牌, ツモ/ロン, 親, 自風, 場風, ドラ表示牌, 立直, 一発, 本場)。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return _copy_value(result)
+
+    def put(self, key: Tuple, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = _copy_value(result)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
 
 
 class AgariChecker:
     """アガり判定と手数計算のラッパークラス"""
 
+    # 点数計算結果はインスタンス間（Hand ごとの AgariChecker）で共有する
+    value_cache = HandValueCache()
+
     YAKU_DISPLAY_MAP = {
         'Riichi': '立直',
         'Double Riichi': 'ダブル立直',
@@ -79,7 +287,6 @@ class AgariChecker:
 
     def __init__(self):
         """初期化"""
-        self.agari = MahjongAgari()
         self.calculator = HandCalculator()
 
     def _normalize_meld_objects(self, melds: Optional[List[Any]]) -> List[Meld]:
@@ -89,7 +296,10 @@ class AgariChecker:
 
         normalized: List[Meld] = []
         for meld in melds:
-            if isinstance(meld, Meld):
+            if isinstance(meld, MeldRecord):
+                # 鳴いた時点で作った Meld をそのまま使う
+                normalized.append(meld.meld)
+            elif isinstance(meld, Meld):
                 normalized.append(meld)
             elif isinstance(meld, dict):
                 # 辞書型（新しい仕様）の処理
@@ -105,48 +315,49 @@ class AgariChecker:
                     normalized.append(m)
         return normalized
 
-    def _flatten_meld_tiles(self, melds: Optional[List[Any]]) -> List[str]:
-        """副露表現（文字列リスト or Meld）を文字列牌リストへ平坦化する。"""
-        meld_objects = self._normalize_meld_objects(melds)
-        if not meld_objects:
-            return []
+    @staticmethod
+    def _claim_meld_ids(meld_objects: List[Meld], allocator: TileIdAllocator) -> List[Meld]:
+        """
+        副露の136形式IDを使用済みにする。
 
-        flattened: List[str] = []
+        鳴いた時点の ID は牌種ごとに 0 枚目からなので、123m と 345m のように
+        同じ物理牌IDを使う副露が重なった場合は、未使用のコピーで Meld を作り直す。
+        """
+        claimed: List[Meld] = []
         for meld in meld_objects:
-            for tile_136 in (meld.tiles or []):
-                flattened.append(self._tile136_to_str(tile_136))
-        return flattened
-
-    def _tile136_to_str(self, tile_136: int) -> str:
-        """136牌IDを内部文字列表現へ変換。"""
-        idx34 = tile_136 // 4
-        if 0 <= idx34 <= 8:
-            return f"{idx34 + 1}m"
-        if 9 <= idx34 <= 17:
-            return f"{idx34 - 8}p"
-        if 18 <= idx34 <= 26:
-            return f"{idx34 - 17}s"
-        honors = ['E', 'S', 'W', 'N', 'P', 'F', 'C']
-        return honors[idx34 - 27]
-
-    def is_agari(self, hand_tiles: List[str], melds: Optional[List[Any]] = None) -> bool:
-        """手牌がアガり形かどうかを判定"""
-        meld_objects = self._normalize_meld_objects(melds)
-        
+            if allocator.claim(meld.tiles):
+                claimed.append(meld)
+                continue
+            tile_ids = [allocator.take_index(t // 4) for t in meld.tiles]
+            if None in tile_ids:
+                raise ValueError(f'More than 4 copies in meld {meld}')
+            claimed.append(Meld(meld_type=meld.type, tiles=tile_ids, opened=meld.opened))
+        return claimed
+
+    @timed('agari')
+    def is_agari(
+        self,
+        hand_tiles: Optional[List[str]],
+        melds: Optional[List[Any]] = None,
+        hand_counts: Optional[List[int]] = None,
+    ) -> bool:
+        """
+        手牌がアガり形かどうかを判定
+
+        Args:
+            hand_tiles: 暗部の手牌リスト（hand_counts を渡す場合は None 可）
+            melds: 副露
+            hand_counts: 暗部の34種枚数配列（Hand.counts など）。指定時は手牌を再集計しない
+        """
         # 🔴 修正ポイント：カンがあっても大丈夫なように「副露は実質3枚」として計算する
-        effective_tiles = len(hand_tiles) + len(meld_objects) * 3
-        if effective_tiles != 14:
-            return False
-        
-        meld_tiles = self._flatten_meld_tiles(meld_objects)
-        try:
-            full_tiles = hand_tiles + meld_tiles
-            tiles_34 = self._tiles_to_34_array(full_tiles)
-            open_sets_34 = [m.tiles_34 for m in meld_objects] if meld_objects else None
-            return self.agari.is_agari(tiles_34, open_sets_34)
-        except Exception:
+        open_melds_count = count_valid_melds(melds)
+        concealed_count = sum(hand_counts) if hand_counts is not None else len(hand_tiles)
+        if concealed_count + open_melds_count * 3 != 14:
             return False
 
+        counts = hand_counts if hand_counts is not None else self._tiles_to_34_array(hand_tiles)
+        return is_agari_counts(counts, open_melds_count)
+
     def can_win(
         self,
         hand_tiles: List[str],
@@ -156,7 +367,25 @@ class AgariChecker:
         player_wind: int = EAST,
         round_wind: int = EAST,
     ) -> bool:
-        """指定和了牌で和了可能かを判定する（副露考慮）。"""
+        """
+        指定和了牌で和了可能かを判定する（副露考慮）。
+
+        和了形でなければ点数計算をせずに False。役の有無は yaku_verdict で事前判定し、
+        判定できない場合だけ点数計算を行う。
+        """
+        open_melds_count = count_valid_melds(melds)
+        tiles = list(hand_tiles)
+        if len(tiles) + open_melds_count * 3 == 13:
+            tiles.append(win_tile)
+        if win_tile not in tiles or not self.is_agari(tiles, melds=melds):
+            return False
+        verdict = yaku_verdict(
+            hand_to_counts(tiles), tile_to_index(win_tile), melds,
+            is_tsumo=is_tsumo, player_wind=player_wind, round_wind=round_wind,
+        )
+        if verdict != YAKU_MAYBE:
+            return verdict == YAKU_YES
+
         result = self.estimate_hand_value(
             hand_tiles=hand_tiles,
             win_tile=win_tile,
@@ -176,27 +405,11 @@ class AgariChecker:
         if len(tiles) not in (3, 4):
             return None
 
-        tile_136 = self._tiles_to_136_array(tiles)
-        if len(tile_136) != len(tiles):
-            return None
-
-        # 🔴 修正ポイント：4枚の場合はちゃんと「カン」として登録する
-        if len(tiles) == 4 and all(t == tiles[0] for t in tiles):
-            return Meld(meld_type=Meld.KAN, tiles=tile_136, opened=not is_closed)
-
-        if all(t == tiles[0] for t in tiles):
-            return Meld(meld_type=Meld.PON, tiles=tile_136, opened=True)
-
-        try:
-            nums = sorted(int(t[0]) for t in tiles)
-            suits = {t[1] for t in tiles if len(t) == 2}
-            if len(suits) == 1 and list(suits)[0] in ('m', 'p', 's') and nums == [nums[0], nums[0] + 1, nums[0] + 2]:
-                return Meld(meld_type=Meld.CHI, tiles=tile_136, opened=True)
-        except Exception:
-            return None
-
-        return None
+        # 4枚の同じ牌はカン、3枚は刻子か順子として MeldRecord と同じ規則で判定する
+        record = MeldRecord.from_tiles(tiles, is_closed=is_closed)
+        return None if record is None else record.meld
 
+    @timed('scoring')
     def estimate_hand_value(
         self,
         hand_tiles: List[str],
@@ -211,7 +424,47 @@ class AgariChecker:
         is_ippatsu: bool = False,
         honba_count: int = 0,
     ) -> Optional[Dict[str, Any]]:
-        """アガり手の点数を計算"""
+        """アガり手の点数を計算（同じ条件の結果は value_cache から返す）"""
+        key = (
+            tuple(hand_to_counts(hand_tiles)),
+            len(hand_tiles),
+            tuple(_meld_cache_key(m) for m in (melds or [])),
+            win_tile,
+            bool(is_tsumo),
+            bool(is_dealer),
+            player_wind,
+            round_wind,
+            tuple(dora_indicators or ()),
+            bool(is_riichi),
+            bool(is_ippatsu),
+            honba_count,
+        )
+        cached = self.value_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._estimate_hand_value_uncached(
+            hand_tiles, win_tile, is_tsumo, is_dealer, melds, player_wind, round_wind,
+            dora_indicators, is_riichi, is_ippatsu, honba_count,
+        )
+        if result is not None:
+            self.value_cache.put(key, result)
+        return result
+
+    def _estimate_hand_value_uncached(
+        self,
+        hand_tiles: List[str],
+        win_tile: str,
+        is_tsumo: bool,
+        is_dealer: bool,
+        melds: Optional[List[Any]],
+        player_wind: int,
+        round_wind: int,
+        dora_indicators: Optional[List[str]],
+        is_riichi: bool,
+        is_ippatsu: bool,
+        honba_count: int,
+    ) -> Optional[Dict[str, Any]]:
         meld_objects = self._normalize_meld_objects(melds)
 
         # 🔴 修正ポイント：ここでも「実質枚数」を使って判定する
@@ -231,9 +484,31 @@ class AgariChecker:
             }
 
         try:
-            full_hand_tiles = normalized_hand_tiles + self._flatten_meld_tiles(meld_objects)
-            tiles_136 = self._tiles_to_136_array(full_hand_tiles)
-            win_tile_136 = self.convert_tile_to_136(win_tile)
+            honba_count = max(0, int(honba_count))
+            is_ippatsu = bool(is_ippatsu and is_riichi)
+            # よく出る手は翻・符を直接計算し、役満の可能性がある手などだけライブラリで計算する
+            counts = hand_to_counts(normalized_hand_tiles)
+            if sum(counts) == len(normalized_hand_tiles):
+                native = score_hand(
+                    counts, tile_to_index(win_tile), meld_objects,
+                    is_tsumo=is_tsumo, is_dealer=is_dealer, is_riichi=is_riichi, is_ippatsu=is_ippatsu,
+                    player_wind=player_wind, round_wind=round_wind,
+                    dora_indicators=tiles_to_indices(dora_indicators or ()), honba=honba_count,
+                )
+                if native is not None:
+                    return self._hand_value_result(
+                        native['error'], native['han'], native['fu'], native['cost'], native['yaku'],
+                    )
+
+            # 副露 → 手牌 → ドラ表示牌の順に物理牌IDを払い出す（同じIDは二度使わない）
+            allocator = TileIdAllocator()
+            meld_objects = self._claim_meld_ids(meld_objects, allocator)
+            hand_136 = allocator.take_tiles(normalized_hand_tiles)
+            # 和了牌は手牌中の同じ牌種の物理牌（最後に払い出したもの）を指す
+            win_tile_136 = tile_to_id(win_tile)
+            if win_tile_136 is not None:
+                win_tile_136 = next((t for t in reversed(hand_136) if t // 4 == win_tile_136 // 4), win_tile_136)
+            tiles_136 = hand_136 + [t for meld in meld_objects for t in meld.tiles]
 
             if not tiles_136 or win_tile_136 is None:
                 return {'valid': False, 'error': 'タイル形式が無効です', 'han': 0, 'fu': 0, 'cost': {'main': 0}, 'limit': 'なし', 'yaku': []}
@@ -242,41 +517,53 @@ class AgariChecker:
                 is_tsumo=is_tsumo,
                 player_wind=player_wind,
                 round_wind=round_wind,
-                tsumi_number=max(0, int(honba_count)),
+                tsumi_number=honba_count,
                 options=OptionalRules(has_open_tanyao=True),
             )
             config.is_dealer = is_dealer
             config.is_riichi = is_riichi
-            config.is_ippatsu = bool(is_ippatsu and is_riichi)
+            config.is_ippatsu = is_ippatsu
 
             dora_136 = []
             if dora_indicators:
                 for ind in dora_indicators:
-                    idx = self.convert_tile_to_136(ind)
+                    # 5枚目になる表示牌（実戦ではありえない）はドラの数え方が同じ0枚目で代用する
+                    idx = allocator.take(ind)
+                    if idx is None:
+                        idx = tile_to_id(ind)
                     if idx is not None:
                         dora_136.append(idx)
             
             result = self.calculator.estimate_hand_value(
                 tiles_136, win_tile_136, melds=meld_objects, dora_indicators=dora_136, config=config
             )
-
-            yaku_list = result.yaku if result and result.yaku is not None else []
-            limit = self._calculate_limit(result.han)
-            yaku_names = [yaku.name for yaku in yaku_list]
-            display_yaku = [self.YAKU_DISPLAY_MAP.get(name, name) for name in yaku_names]
-            
-            return {
-                'valid': result.error is None,
-                'error': result.error,
-                'han': result.han,
-                'fu': result.fu,
-                'cost': result.cost,
-                'limit': limit,
-                'yaku': display_yaku,
-            }
+            yaku_names = [yaku.name for yaku in result.yaku or []]
+            return self._hand_value_result(result.error, result.han, result.fu, result.cost, yaku_names)
         except Exception as e:
             return {'valid': False, 'error': str(e), 'han': 0, 'fu': 0, 'cost': {'main': 0}, 'limit': 'なし', 'yaku': []}
 
+    def _hand_value_result(
+        self,
+        error: Optional[str],
+        han: Optional[int],
+        fu: Optional[int],
+        cost: Optional[Dict[str, Any]],
+        yaku_names: List[str],
+    ) -> Dict[str, Any]:
+        """点数計算の結果（ライブラリの英語の役名）を estimate_hand_value の戻り値の形にする"""
+        if error is not None:
+            # 役なしなど（翻・符は返らない）
+            return {'valid': False, 'error': error, 'han': 0, 'fu': 0, 'cost': {'main': 0}, 'limit': 'なし', 'yaku': []}
+        return {
+            'valid': True,
+            'error': None,
+            'han': han,
+            'fu': fu,
+            'cost': cost,
+            'limit': self._calculate_limit(han),
+            'yaku': [self.YAKU_DISPLAY_MAP.get(name, name) for name in yaku_names],
+        }
+
     def _tiles_to_34_array(self, hand_tiles: List[str]) -> List[int]:
         """
         リスト形式の手牌を34配列に変換
@@ -287,17 +574,7 @@ class AgariChecker:
         Returns:
             34要素の配列（各牌の枚数）
         """
-        # 字牌マッピング: 数字表記 -> 英文字表記
-        z_map = {'1z': 'E', '2z': 'S', '3z': 'W', '4z': 'N', '5z': 'P', '6z': 'F', '7z': 'C'}
-        
-        counts = [0] * 34
-        for tile in hand_tiles:
-            # 数字表記の字牌を英文字に変換
-            tile_normalized = z_map.get(tile, tile)
-            idx = TILE_INDEX.get(tile_normalized)
-            if idx is not None:
-                counts[idx] += 1
-        return counts
+        return hand_to_counts(hand_tiles)
 
     def _tiles_to_136_array(self, hand_tiles: List[str]) -> List[int]:
         """
@@ -307,27 +584,18 @@ class AgariChecker:
             hand_tiles: 手牌のリスト（例：['1m', '1m', '2p', ...]）
         
         Returns:
-            136配列（各牌の詳細な位置情報）
+            136配列（同じ牌種は 0, 1, 2, ... 枚目の物理牌ID。5枚以上ある場合は空リスト）
         """
-        # 手牌をマージしてタイル文字列に変換（one_line_string形式）
-        tiles_str = self._hand_to_one_line_string(hand_tiles)
-        
-        if not tiles_str:
-            return []
-        
         try:
-            return TilesConverter.one_line_string_to_136_array(tiles_str)
-        except Exception:
-            # フォーマット不正の場合は空リストを返す
+            return tiles_to_ids(hand_tiles)
+        except ValueError:
             return []
     
     def convert_tile_to_136(self, tile: str) -> Optional[int]:
         """
         単一の牌を136形式に変換（最初のコピーを返す）
         
-        字牌は英文字表記または数字表記両方に対応します。
-        mahjongライブラリの converter は英文字単独を受け付けないため
-        数字表記 (1z-7z) に正規化してから変換します。
+        字牌は英文字表記・数字表記 (1z-7z) の両方に対応します。
         
         Args:
             tile: 牌（例：'1m', 'E', 'P', '1z'）
@@ -335,15 +603,7 @@ class AgariChecker:
         Returns:
             136形式のインデックス（失敗時は None）
         """
-        # 英文字字牌を数字表記に変換
-        z_map = {'E': '1z', 'S': '2z', 'W': '3z', 'N': '4z',
-                 'P': '5z', 'F': '6z', 'C': '7z'}
-        tile_norm = z_map.get(tile, tile)
-        try:
-            result = TilesConverter.one_line_string_to_136_array(tile_norm)
-            return result[0] if result else None
-        except Exception:
-            return None
+        return tile_to_id(tile)
 
     def _calculate_limit(self, han: int) -> str:
         """
@@ -382,44 +642,13 @@ class AgariChecker:
         Returns:
             one_line_string形式の文字列（数字表記使用）
         """
-        # 字牌マッピング: 英文字表記 -> 数字表記
-        z_reverse_map = {'E': '1z', 'S': '2z', 'W': '3z', 'N': '4z', 'P': '5z', 'F': '6z', 'C': '7z'}
-        # 字牌マッピング: 数字表記 -> 数字表記（そのまま）、英文字 -> 数字表記
-        z_norm_map = {'1z': '1', '2z': '2', '3z': '3', '4z': '4', '5z': '5', '6z': '6', '7z': '7',
-                      'E': '1', 'S': '2', 'W': '3', 'N': '4', 'P': '5', 'F': '6', 'C': '7'}
-        
-        # 手牌をソート＆グループ化
-        suit_map = {'m': [], 'p': [], 's': [], 'z': []}
-        
-        # TILE_INDEX を使ったソート（両形式に対応）
-        def tile_sort_key(t):
-            # 数字表記を正規化してソートキーを取得
-            if t in z_reverse_map:  # 英文字の場合
-                t_norm = z_reverse_map[t]
-            else:
-                t_norm = t
-            return TILE_INDEX.get(t_norm, TILE_INDEX.get(t, 999))
-        
-        for tile in sorted(hand_tiles, key=tile_sort_key):
-            # 数字表記の1-9に正規化
-            if tile in z_norm_map:
-                # 字牌の場合
-                suit_map['z'].append(z_norm_map[tile])
-            elif len(tile) == 2:
-                num, suit = tile[0], tile[1]
-                if suit in suit_map:
-                    suit_map[suit].append(num)
-            elif len(tile) == 1:
-                # 英文字の字牌（古い形式）
-                if tile in z_norm_map:
-                    suit_map['z'].append(z_norm_map[tile])
-        
-        # 形式化：数字と文字が交互
+        # 34配列を経由するのでソートは不要（インデックス順がそのまま標準順）
+        counts = hand_to_counts(hand_tiles)
         result = []
-        for suit in ['m', 'p', 's', 'z']:
-            if suit_map[suit]:
-                result.append(''.join(suit_map[suit]) + suit)
-        
+        for suit, offset, size in (('m', 0, 9), ('p', 9, 9), ('s', 18, 9), ('z', 27, 7)):
+            digits = ''.join(str(n + 1) * counts[offset + n] for n in range(size) if counts[offset + n])
+            if digits:
+                result.append(digits + suit)
         return ''.join(result)
 
     def make_tenpai_with_next_win(self, hand_tiles: List[str]):
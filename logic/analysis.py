@@ -0,0 +1,83 @@
+"""
+手牌解析サービス（シャンテン数・和了判定・待ち牌・点数計算）
+
+Game / Player / Hand はこのサービスを共有する。以前は Hand ごと・Game ごとに
+AgariChecker（＋ HandCalculator）を作っていたため、リクエストのたびに
+ゲームを復元するウェブアプリでは1リクエストあたり5個の計算器が作られていた。
+
+サービス自体は状態を持たず（キャッシュはすべてプロセス共有・スレッドセーフ）、
+mahjong の HandCalculator も呼び出し間で状態を持たないので、1つのインスタンスを
+全スレッドから使える。通常は get_analysis_service() の共有インスタンスを使う。
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from infra.metrics import timed
+from logic.agari import AgariChecker
+from logic.shanten import ShantenService, get_shanten_service, shanten_after_discards
+from logic.waits import wait_cache_info, wait_tiles, wait_tiles_after_discards
+
+
+class AnalysisService:
+	"""手牌解析の窓口（シャンテン数・和了判定・待ち牌・点数計算）"""
+
+	def __init__(self, shanten_service: Optional[ShantenService] = None, agari_checker: Optional[AgariChecker] = None):
+		"""
+		Args:
+			shanten_service: シャンテン数の計算とキャッシュ（省略時はプロセス共有のもの）
+			agari_checker: 和了判定・点数計算（省略時は新規作成）
+		"""
+		self.shanten_service = shanten_service or get_shanten_service()
+		self.agari = agari_checker or AgariChecker()
+
+	@timed('shanten')
+	def shanten(self, counts: Sequence[int], open_melds_count: int = 0) -> int:
+		"""34種の枚数配列のシャンテン数"""
+		return self.shanten_service.shanten(counts, open_melds_count)
+
+	def shanten_after_discards(self, counts: Sequence[int], open_melds_count: int = 0) -> Dict[int, int]:
+		"""各牌種を1枚捨てたときのシャンテン数 {牌種インデックス: シャンテン数}"""
+		return shanten_after_discards(counts, open_melds_count, backend=self.shanten_service.backend)
+
+	def is_agari(
+		self,
+		hand_tiles: Optional[List[str]],
+		melds: Optional[List[Any]] = None,
+		hand_counts: Optional[List[int]] = None,
+	) -> bool:
+		return self.agari.is_agari(hand_tiles, melds=melds, hand_counts=hand_counts)
+
+	def can_win(self, hand_tiles: List[str], win_tile: str, **kwargs: Any) -> bool:
+		"""和了形かつ役があるか（引数は AgariChecker.can_win と同じ）"""
+		return self.agari.can_win(hand_tiles, win_tile, **kwargs)
+
+	def estimate_hand_value(self, hand_tiles: List[str], win_tile: str, *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+		"""点数計算（引数は AgariChecker.estimate_hand_value と同じ）"""
+		return self.agari.estimate_hand_value(hand_tiles, win_tile, *args, **kwargs)
+
+	def meld_strings_to_objects(self, meld_tiles_list: List[Any]) -> List[Any]:
+		return self.agari.meld_strings_to_objects(meld_tiles_list)
+
+	def wait_tiles(self, counts: Sequence[int]) -> List[str]:
+		"""3n+1 枚の暗部の待ち牌"""
+		return wait_tiles(counts)
+
+	def wait_tiles_after_discards(self, counts: Sequence[int]) -> List[str]:
+		"""3n+2 枚の暗部から1枚切った後の待ち牌の和集合"""
+		return wait_tiles_after_discards(counts)
+
+	def stats(self) -> Dict[str, Any]:
+		"""共有キャッシュの統計"""
+		waits = wait_cache_info()
+		return {
+			'shanten': self.shanten_service.stats(),
+			'hand_value': self.agari.value_cache.stats(),
+			'waits': {'hits': waits.hits, 'misses': waits.misses, 'size': waits.currsize},
+		}
+
+
+_default_service = AnalysisService()
+
+
+def get_analysis_service() -> AnalysisService:
+	"""プロセス共有の AnalysisService を返す"""
+	return _default_service
@@ -2,30 +2,35 @@
 ポン・チー・ロンなどの鳴き判定と処理
 """
 from typing import List, Dict, Optional, Tuple
+from mahjong.constants import EAST
 from mahjong.meld import Meld
 
+from logic.yaku_filter import YAKU_MAYBE, YAKU_YES, yaku_verdict
+from models.meld import MeldRecord
+from models.tile_utils import hand_to_counts, index_to_tile, is_number_index, tile_to_index
+
 
 class CallChecker:
     """ポン・チー・ロン判定クラス"""
 
     @staticmethod
-    def can_pong(hand_tiles: List[str], discarded_tile: str) -> bool:
+    def can_pong(hand_tiles: List[str], discarded_tile: str, hand_counts: Optional[List[int]] = None) -> bool:
         """
         ポン（同じ牌3つ）が可能かどうか判定
         
         Args:
             hand_tiles: 自プレイヤーの手牌
             discarded_tile: 捨てられた牌
+            hand_counts: 手牌の34種枚数配列（指定時は再集計しない）
         
         Returns:
             ポンが可能なら True
         """
         # 捨てられた牌と同じものが手牌に2枚以上あるかチェック
-        count = hand_tiles.count(discarded_tile)
-        return count >= 2
+        return CallChecker._count_in_hand(hand_tiles, discarded_tile, hand_counts) >= 2
 
     @staticmethod
-    def can_chow(hand_tiles: List[str], discarded_tile: str) -> bool:
+    def can_chow(hand_tiles: List[str], discarded_tile: str, hand_counts: Optional[List[int]] = None) -> bool:
         """
         チー（1つの連続牌を作る）が可能かどうか判定
         
@@ -35,72 +40,69 @@ class CallChecker:
         Args:
             hand_tiles: 自プレイヤーの手牌
             discarded_tile: 捨てられた牌
+            hand_counts: 手牌の34種枚数配列（指定時は再集計しない）
         
         Returns:
             チーが可能なら True（複数形の場合を考慮して True/False のみ）
         """
         # チーの可能な形を検出するヘルパー関数
-        possible_chows = CallChecker._find_possible_chows(hand_tiles, discarded_tile)
+        possible_chows = CallChecker._find_possible_chows(hand_tiles, discarded_tile, hand_counts)
         return len(possible_chows) > 0
 
     @staticmethod
-    def _find_possible_chows(hand_tiles: List[str], discarded_tile: str) -> List[Tuple[str, str, str]]:
+    def _find_possible_chows(
+        hand_tiles: List[str],
+        discarded_tile: str,
+        hand_counts: Optional[List[int]] = None,
+    ) -> List[Tuple[str, str, str]]:
         """
         チーの可能な組み合わせをすべて検出
         
         Args:
             hand_tiles: 自プレイヤーの手牌
             discarded_tile: 捨てられた牌
+            hand_counts: 手牌の34種枚数配列（指定時は再集計しない）
         
         Returns:
             可能なチーの組み合わせリスト（例：[('2m', '3m', '4m'), ...]）
         """
-        possible_chows = []
-
-        # 数牌かどうか確認（字牌ではチーは成立しない）
-        if not CallChecker._is_number_tile(discarded_tile):
-            return []
-
-        # 捨てられた牌のスート（万・筒・索）と数字を取得
-        suit = discarded_tile[-1]
-        num_str = discarded_tile[:-1]
-        
-        try:
-            num = int(num_str)
-        except ValueError:
+        # 捨て牌を34形式インデックスへ変換（字牌・不明な牌ではチーは成立しない）
+        idx = tile_to_index(discarded_tile)
+        if idx is None or not is_number_index(idx):
             return []
 
-        # 数字が1-9の範囲内かチェック
-        if num < 1 or num > 9:
-            return []
+        # 手牌は枚数配列で引く（文字列の線形探索を避ける）
+        counts = hand_counts if hand_counts is not None else hand_to_counts(hand_tiles)
+        num = idx % 9  # 0..8（1..9 に対応）
 
-        # チーの3つの可能なパターン：
+        # チーの3つの可能なパターン（スート内の先頭牌の位置）：
         # パターン1：捨てられた牌が第1牌 (n, n+1, n+2)
         # パターン2：捨てられた牌が第2牌 (n-1, n, n+1)
         # パターン3：捨てられた牌が第3牌 (n-2, n-1, n)
-
-        patterns = []
-        if num <= 7:  # パターン1
-            patterns.append((num, num + 1, num + 2))
-        if 2 <= num <= 8:  # パターン2
-            patterns.append((num - 1, num, num + 1))
-        if num >= 3:  # パターン3
-            patterns.append((num - 2, num - 1, num))
-
-        # 各パターンに対して手牌にあるかチェック
-        for pattern in patterns:
-            tiles_needed = [f"{n}{suit}" for n in pattern]
-            # ⅰ.捨てられた牌を除いた、必要な牌を特定
-            other_tiles = [t for t in tiles_needed if t != discarded_tile]
-
-            # ii. 手牌に必要な牌がすべてあるかチェック
-            if all(t in hand_tiles for t in other_tiles):
-                possible_chows.append(tuple(tiles_needed))
+        possible_chows = []
+        for start in (num, num - 1, num - 2):
+            if start < 0 or start > 6:
+                continue
+            first = idx - num + start
+            pattern = (first, first + 1, first + 2)
+            # 捨てられた牌以外の2枚が手牌にすべてあるかチェック
+            if all(counts[i] > 0 for i in pattern if i != idx):
+                possible_chows.append(tuple(index_to_tile(i) for i in pattern))
 
         return possible_chows
 
     @staticmethod
-    def can_ron(hand_tiles: List[str], discarded_tile: str, agari_checker, melds: Optional[List] = None) -> bool:
+    def can_ron(
+        hand_tiles: List[str],
+        discarded_tile: str,
+        agari_checker,
+        melds: Optional[List] = None,
+        hand_counts: Optional[List[int]] = None,
+        check_yaku: bool = False,
+        is_riichi: bool = False,
+        player_wind: int = EAST,
+        round_wind: int = EAST,
+    ) -> bool:
         """
         ロン（他プレイヤーの捨て牌で和了）が可能かどうか判定
         
@@ -108,29 +110,57 @@ class CallChecker:
             hand_tiles: 自プレイヤーの手牌（14枚=13+ツモ牌）
             discarded_tile: 捨てられた牌
             agari_checker: AgariCheckのインスタンス
+            hand_counts: 手牌の34種枚数配列（指定時は再集計しない）
+            check_yaku: 役の有無も判定するか（False なら和了形かどうかだけ）
+            is_riichi / player_wind / round_wind: 役の判定に使う条件
         
         Returns:
             ロンが可能なら True
         """
-        # ロン用の仮の手牌を作成（捨てられた牌を追加）
-        ron_hand = hand_tiles + [discarded_tile]
-        # ロン用の判定（和了形判定）
-        return agari_checker.is_agari(ron_hand, melds=melds or [])
+        idx = tile_to_index(discarded_tile)
+        if idx is None:
+            return False
+        ron_counts = list(hand_counts) if hand_counts is not None else hand_to_counts(hand_tiles)
+        ron_counts[idx] += 1
+        if not agari_checker.is_agari(None, melds=melds or [], hand_counts=ron_counts):
+            return False
+        if not check_yaku:
+            return True
+
+        # 役の有無は事前判定で決まらない場合だけ点数計算する
+        verdict = yaku_verdict(
+            ron_counts, idx, melds, is_tsumo=False, is_riichi=is_riichi,
+            player_wind=player_wind, round_wind=round_wind,
+        )
+        if verdict != YAKU_MAYBE:
+            return verdict == YAKU_YES
+        return agari_checker.can_win(
+            list(hand_tiles), discarded_tile, melds=melds, is_tsumo=False,
+            player_wind=player_wind, round_wind=round_wind,
+        )
 
     @staticmethod
-    def can_kan(hand_tiles: List[str], discarded_tile: str) -> bool:
+    def can_kan(hand_tiles: List[str], discarded_tile: str, hand_counts: Optional[List[int]] = None) -> bool:
         """
         カン（捨て牌で明槓）が可能かどうか判定（手持ちに同じ牌が3枚あるか）
 
         Args:
             hand_tiles: 自プレイヤーの手牌
             discarded_tile: 捨てられた牌
+            hand_counts: 手牌の34種枚数配列（指定時は再集計しない）
 
         Returns:
             カンが可能なら True
         """
-        count = hand_tiles.count(discarded_tile)
-        return count >= 3
+        return CallChecker._count_in_hand(hand_tiles, discarded_tile, hand_counts) >= 3
+
+    @staticmethod
+    def _count_in_hand(hand_tiles: List[str], tile: str, hand_counts: Optional[List[int]] = None) -> int:
+        """手牌中の指定牌の枚数（枚数配列があればそれを参照）"""
+        if hand_counts is None:
+            return hand_tiles.count(tile)
+        idx = tile_to_index(tile)
+        return 0 if idx is None else hand_counts[idx]
 
     @staticmethod
     def _is_number_tile(tile: str) -> bool:
@@ -160,16 +190,11 @@ class CallChecker:
         Returns:
             Meldオブジェクト
         """
-        # tiles -> 136形式に変換（簡易版）
-        # 実装は必要に応じて拡張
-        if meld_type == 'pung':
-            # ポンの場合、3つとも同じ牌
-            pass
-        elif meld_type == 'chow':
-            # チーの場合、連続する3牌
-            pass
-        
-        return None
+        record = MeldRecord.from_tiles(list(tiles))
+        expected = {'pung': 'pon', 'chow': 'chow'}.get(meld_type)
+        if record is None or record.kind != expected:
+            return None
+        return record.meld
 
 
 class CallAction:
@@ -0,0 +1,464 @@
+"""
+和了手の点数計算（翻・符・点数）
+
+通常の和了形（4面子1雀頭・七対子）の翻・符・点数を、暗部の34種枚数配列の分解
+（logic.yaku_filter.decompositions）と副露から直接計算する。
+役・符・点数の規則と結果（役の名前と並び順、同じ翻・符の分解からの選び方、点数の dict）は
+AgariChecker の設定（喰いタンあり・赤ドラなし・数え役満あり）での
+mahjong ライブラリの HandCalculator と同じにしてある。
+
+役満の可能性がある手（国士無双・字一色・緑一色・大三元・四喜和・九蓮宝燈・
+四暗刻・四槓子・清老頭）や解釈できない副露は None を返し、
+呼び出し側（AgariChecker）がライブラリで計算する。
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mahjong.constants import CHUN, EAST, HAKU, HATSU, NORTH, SOUTH, WEST
+from mahjong.hand_calculating.hand import HandCalculator
+from mahjong.meld import Meld
+
+from logic.yaku_filter import decompositions
+from models.meld import MeldRecord
+
+
+# 面子の種類（ライブラリの分解と同じ並び順になる値）
+_QUAD = 0
+_TRIPLET = 1
+_PAIR = 2
+_SEQUENCE = 3
+
+# 面子: (先頭の牌種インデックス, 種類)
+Block = Tuple[int, int]
+
+_TERMINAL_INDICES = frozenset((0, 8, 9, 17, 18, 26))
+_TERMINAL_AND_HONOR_INDICES = _TERMINAL_INDICES | frozenset(range(27, 34))
+_GREEN_INDICES = frozenset((19, 20, 21, 23, 25, HATSU))
+_WIND_INDICES = (EAST, SOUTH, WEST, NORTH)
+_DRAGON_INDICES = (HAKU, HATSU, CHUN)
+
+# 役の名前 → (ライブラリの役ID, 副露時の翻, 門前時の翻)。
+# 副露時が 0 の役は門前の翻で数える。結果の役はライブラリと同じく役IDの順に並べる
+_YAKU = {
+	'Menzen Tsumo': (0, 0, 1),
+	'Riichi': (1, 0, 1),
+	'Ippatsu': (3, 0, 1),
+	'Pinfu': (12, 0, 1),
+	'Tanyao': (13, 1, 1),
+	'Iipeiko': (14, 0, 1),
+	'Yakuhai (haku)': (15, 1, 1),
+	'Yakuhai (hatsu)': (16, 1, 1),
+	'Yakuhai (chun)': (17, 1, 1),
+	'Yakuhai (seat wind east)': (18, 1, 1),
+	'Yakuhai (seat wind south)': (19, 1, 1),
+	'Yakuhai (seat wind west)': (20, 1, 1),
+	'Yakuhai (seat wind north)': (21, 1, 1),
+	'Yakuhai (round wind east)': (22, 1, 1),
+	'Yakuhai (round wind south)': (23, 1, 1),
+	'Yakuhai (round wind west)': (24, 1, 1),
+	'Yakuhai (round wind north)': (25, 1, 1),
+	'Sanshoku Doujun': (26, 1, 2),
+	'Ittsu': (27, 1, 2),
+	'Chantai': (28, 1, 2),
+	'Toitoi': (30, 2, 2),
+	'San Ankou': (31, 2, 2),
+	'San Kantsu': (32, 2, 2),
+	'Sanshoku Doukou': (33, 2, 2),
+	'Chiitoitsu': (34, 0, 2),
+	'Shou Sangen': (35, 2, 2),
+	'Honitsu': (36, 2, 3),
+	'Junchan': (37, 2, 3),
+	'Ryanpeikou': (38, 0, 3),
+	'Chinitsu': (39, 5, 6),
+}
+_YAKU_ORDER = {name: yaku_id for name, (yaku_id, _, _) in _YAKU.items()}
+
+_DRAGON_YAKU = (
+	(HAKU, 'Yakuhai (haku)'),
+	(HATSU, 'Yakuhai (hatsu)'),
+	(CHUN, 'Yakuhai (chun)'),
+)
+_SEAT_WIND_YAKU = {
+	EAST: 'Yakuhai (seat wind east)',
+	SOUTH: 'Yakuhai (seat wind south)',
+	WEST: 'Yakuhai (seat wind west)',
+	NORTH: 'Yakuhai (seat wind north)',
+}
+_ROUND_WIND_YAKU = {
+	EAST: 'Yakuhai (round wind east)',
+	SOUTH: 'Yakuhai (round wind south)',
+	WEST: 'Yakuhai (round wind west)',
+	NORTH: 'Yakuhai (round wind north)',
+}
+
+# 刻子・槓子の符: [么九牌か][槓子か][明刻か]
+_SET_FU = (
+	((4, 2), (16, 8)),
+	((8, 4), (32, 16)),
+)
+
+# 翻数の下限 → (点数の段階, 基本点)
+_LIMITS = (
+	(13, 'yakuman', 8000),
+	(11, 'sanbaiman', 6000),
+	(8, 'baiman', 4000),
+	(6, 'haneman', 3000),
+	(5, 'mangan', 2000),
+)
+
+
+def _block_tiles(block: Block) -> Tuple[int, ...]:
+	tile, kind = block
+	if kind == _SEQUENCE:
+		return (tile, tile + 1, tile + 2)
+	return (tile,) * (4 - kind)
+
+
+def _indicator_to_dora(idx: int) -> int:
+	"""ドラ表示牌の34形式インデックス → ドラの34形式インデックス"""
+	if idx < EAST:
+		return idx // 9 * 9 + (idx % 9 + 1) % 9
+	if idx <= NORTH:
+		return EAST + (idx - EAST + 1) % 4
+	return HAKU + (idx - HAKU + 1) % 3
+
+
+def _meld_info(melds: Optional[Sequence[Any]]) -> Optional[List[Tuple[Block, bool, bool]]]:
+	"""副露を (面子, 明副露か, 槓か) にする（解釈できないものがあれば None）"""
+	info = []
+	for meld in melds or []:
+		if isinstance(meld, MeldRecord):
+			meld = meld.meld
+		if not isinstance(meld, Meld):
+			return None
+		kinds = meld.tiles_34
+		first = kinds[0] if kinds else -1
+		if meld.type == Meld.CHI:
+			if not (len(kinds) == 3 and 0 <= first < EAST and first % 9 <= 6 and kinds[1] == first + 1 and kinds[2] == first + 2):
+				return None
+			block = (first, _SEQUENCE)
+		elif meld.type == Meld.PON and len(kinds) == 3 and kinds.count(first) == 3:
+			block = (first, _TRIPLET)
+		elif meld.type in (Meld.KAN, Meld.SHOUMINKAN) and len(kinds) == 4 and kinds.count(first) == 4:
+			block = (first, _QUAD)
+		else:
+			return None
+		if not 0 <= first < 34:
+			return None
+		info.append((block, bool(meld.opened), block[1] == _QUAD))
+	return info
+
+
+def _may_be_yakuman(tiles_34: List[int], kinds: List[int], num_kans: int, has_melds: bool) -> bool:
+	"""どの分解でも判定できる役満（とその可能性）があるか（kinds は tiles_34 にある牌種の昇順）"""
+	# 国士無双・字一色・清老頭（混老頭もここでライブラリに任せる）、緑一色
+	if _TERMINAL_AND_HONOR_INDICES.issuperset(kinds) or _GREEN_INDICES.issuperset(kinds):
+		return True
+	# 大三元・小四喜・大四喜・四槓子
+	if all(tiles_34[i] >= 3 for i in _DRAGON_INDICES):
+		return True
+	if sum(min(tiles_34[i], 3) for i in _WIND_INDICES) >= 11 or num_kans == 4:
+		return True
+	# 九蓮宝燈
+	suits = {i // 9 for i in kinds}
+	if not has_melds and len(suits) == 1 and kinds[-1] < EAST:
+		base = kinds[0] // 9 * 9
+		suit = tiles_34[base:base + 9]
+		if suit[0] >= 3 and suit[8] >= 3 and all(suit[1:8]):
+			return True
+	return False
+
+
+@lru_cache(maxsize=8192)
+def _divide_hand(counts: Tuple[int, ...], meld_blocks: Tuple[Block, ...]) -> Tuple[Tuple[Block, ...], ...]:
+	"""暗部の分解に副露の面子を加えた和了形を、ライブラリ（HandDivider）と同じ並び順で返す"""
+	hands = set()
+	for pair, sets in decompositions(counts):
+		if len(sets) + len(meld_blocks) == 4:
+			blocks = [(pair, _PAIR)] + [(idx, _SEQUENCE if kind == 'seq' else _TRIPLET) for kind, idx in sets]
+			hands.add(tuple(sorted(blocks + list(meld_blocks))))
+	# 七対子（副露なし・同じ牌4枚は不可）
+	if not meld_blocks and sum(counts) == 14 and all(c in (0, 2) for c in counts):
+		hands.add(tuple((i, _PAIR) for i in range(34) if counts[i]))
+	return tuple(sorted(hands))
+
+
+def _error(error: str) -> Dict[str, Any]:
+	return {'error': error, 'han': None, 'fu': None, 'cost': None, 'yaku': []}
+
+
+def calculate_scores(han: int, fu: int, is_tsumo: bool, is_dealer: bool, honba: int = 0) -> Dict[str, Any]:
+	"""翻・符から支払いを計算（ScoresCalculator.calculate_scores と同じ dict を返す）"""
+	yaku_level = ''
+	# 数え役満（段階の名前は役満と同じになる）
+	han = min(han, 13)
+	for min_han, level, base in _LIMITS:
+		if han >= min_han:
+			yaku_level = level
+			rounded = base
+			double_rounded, four_rounded, six_rounded = base * 2, base * 4, base * 6
+			break
+	else:
+		base_points = fu * 2 ** (2 + han)
+		rounded = (base_points + 99) // 100 * 100
+		double_rounded = (2 * base_points + 99) // 100 * 100
+		four_rounded = (4 * base_points + 99) // 100 * 100
+		six_rounded = (6 * base_points + 99) // 100 * 100
+		if rounded > 2000:
+			yaku_level = 'mangan'
+			rounded, double_rounded, four_rounded, six_rounded = 2000, 4000, 8000, 12000
+
+	if is_tsumo:
+		main = double_rounded
+		main_bonus = 100 * honba
+		additional_bonus = main_bonus
+		additional = main if is_dealer else rounded
+	else:
+		additional = 0
+		additional_bonus = 0
+		main_bonus = 300 * honba
+		main = six_rounded if is_dealer else four_rounded
+	return {
+		'main': main,
+		'additional': additional,
+		'main_bonus': main_bonus,
+		'additional_bonus': additional_bonus,
+		'kyoutaku_bonus': 0,
+		'total': main + main_bonus + 2 * (additional + additional_bonus),
+		'yaku_level': yaku_level,
+	}
+
+
+def _calculate_fu(
+	hand: Tuple[Block, ...],
+	win_group: Block,
+	win_index: int,
+	is_tsumo: bool,
+	is_open: bool,
+	valued: Tuple[int, ...],
+	chi_melds: List[Block],
+	meld_state: Dict[int, Tuple[bool, bool]],
+) -> Tuple[int, int]:
+	"""符を計算して (切り上げ前の合計, 切り上げ後の符) を返す"""
+	if len(hand) == 7:
+		return 25, 25
+	total = 0
+	group_tile, group_kind = win_group
+	# 嵌張・辺張（副露していない順子で和了った場合だけ）
+	if group_kind == _SEQUENCE and hand.count(win_group) > chi_melds.count(win_group):
+		rank = group_tile % 9
+		if (rank == 0 and win_index == group_tile + 2) or (rank == 6 and win_index == group_tile):
+			total += 2
+		if win_index == group_tile + 1:
+			total += 2
+	for tile, kind in hand:
+		if kind == _PAIR:
+			valued_count = valued.count(tile)
+			if valued_count == 1:
+				total += 2
+			elif valued_count >= 2:
+				total += 4
+	# 単騎・双碰の雀頭側
+	if group_kind == _PAIR:
+		total += 2
+	for block in hand:
+		tile, kind = block
+		if kind > _TRIPLET:
+			continue
+		opened, is_kan = meld_state.get(tile, (False, False))
+		# ロンで完成した刻子は明刻
+		if not is_tsumo and block == win_group:
+			opened = True
+		total += _SET_FU[tile in _TERMINAL_AND_HONOR_INDICES][is_kan or kind == _QUAD][opened]
+	if is_tsumo and total > 0:
+		total += 2
+	# 喰い平和形は30符
+	if is_open and total == 0:
+		total += 2
+	total += 20 if is_open or is_tsumo else 30
+	return total, (total + 9) // 10 * 10
+
+
+def _hand_yaku(
+	hand: Tuple[Block, ...],
+	win_index: int,
+	is_tsumo: bool,
+	is_open: bool,
+	open_sets: List[Block],
+	num_kans: int,
+	player_wind: int,
+	round_wind: int,
+) -> List[str]:
+	"""面子の構成で決まる役（順子・刻子を使う役）を返す"""
+	yaku = []
+	seqs = [tile for tile, kind in hand if kind == _SEQUENCE]
+	sets = [tile for tile, kind in hand if kind <= _TRIPLET]
+	if seqs:
+		terminal_blocks = honor_blocks = 0
+		for tile, kind in hand:
+			if tile in _TERMINAL_INDICES or (kind == _SEQUENCE and tile + 2 in _TERMINAL_INDICES):
+				terminal_blocks += 1
+			elif tile >= EAST:
+				honor_blocks += 1
+		if terminal_blocks + honor_blocks == 5 and terminal_blocks and honor_blocks:
+			yaku.append('Chantai')
+		if terminal_blocks == 5:
+			yaku.append('Junchan')
+		if any(base in seqs and base + 3 in seqs and base + 6 in seqs for base in (0, 9, 18)):
+			yaku.append('Ittsu')
+		if not is_open:
+			same_pairs = sum(seqs.count(tile) // 2 for tile in set(seqs))
+			if same_pairs >= 2:
+				yaku.append('Ryanpeikou')
+			elif same_pairs:
+				yaku.append('Iipeiko')
+		if any(tile < 9 and tile + 9 in seqs and tile + 18 in seqs for tile in seqs):
+			yaku.append('Sanshoku Doujun')
+	if sets:
+		if len(sets) == 4:
+			yaku.append('Toitoi')
+		# 三暗刻（ロンの双碰待ちで完成した刻子は暗刻に数えない）
+		closed_sets = [tile for tile, kind in hand if kind <= _TRIPLET and (tile, kind) not in open_sets]
+		closed_count = len(closed_sets)
+		if not is_tsumo and win_index in closed_sets and not any(
+			kind == _SEQUENCE and tile <= win_index <= tile + 2 and (tile, kind) not in open_sets
+			for tile, kind in hand
+		):
+			closed_count -= 1
+		if closed_count == 3:
+			yaku.append('San Ankou')
+		if any(tile < 9 and tile + 9 in sets and tile + 18 in sets for tile in sets):
+			yaku.append('Sanshoku Doukou')
+		if any(tile >= EAST for tile, _ in hand):
+			if sum(1 for tile, _ in hand if tile in _DRAGON_INDICES) == 3:
+				yaku.append('Shou Sangen')
+			yaku.extend(name for tile, name in _DRAGON_YAKU if tile in sets)
+			if player_wind in _SEAT_WIND_YAKU and player_wind in sets:
+				yaku.append(_SEAT_WIND_YAKU[player_wind])
+			if round_wind in _ROUND_WIND_YAKU and round_wind in sets:
+				yaku.append(_ROUND_WIND_YAKU[round_wind])
+		if num_kans == 3:
+			yaku.append('San Kantsu')
+	return yaku
+
+
+def score_hand(
+	counts: Sequence[int],
+	win_index: Optional[int],
+	melds: Optional[Sequence[Any]] = None,
+	is_tsumo: bool = False,
+	is_dealer: bool = False,
+	is_riichi: bool = False,
+	is_ippatsu: bool = False,
+	player_wind: int = EAST,
+	round_wind: int = EAST,
+	dora_indicators: Sequence[int] = (),
+	honba: int = 0,
+) -> Optional[Dict[str, Any]]:
+	"""
+	和了手の翻・符・点数を計算する
+
+	Args:
+		counts: 和了牌を含む暗部の34種枚数配列
+		win_index: 和了牌の34形式インデックス
+		melds: 副露（MeldRecord / mahjong.meld.Meld）
+		is_tsumo: ツモ和了か
+		is_dealer: 親か
+		is_riichi: 立直しているか
+		is_ippatsu: 一発か（立直していなければ無視する）
+		player_wind: 自風（mahjong.constants の EAST など）
+		round_wind: 場風
+		dora_indicators: ドラ表示牌の34形式インデックス
+		honba: 積み棒の数
+
+	Returns:
+		{'error', 'han', 'fu', 'cost', 'yaku'}（yaku はライブラリの英語名）。
+		役がなければ error に HandCalculator.ERR_NO_YAKU などが入る。
+		この関数で計算しない手は None（ライブラリで計算する）
+	"""
+	info = _meld_info(melds)
+	if info is None or win_index is None or not 0 <= win_index < 34 or not counts[win_index]:
+		return None
+	is_open = any(opened for _, opened, _ in info)
+	if is_riichi and is_open:
+		return _error(HandCalculator.ERR_OPEN_HAND_RIICHI)
+
+	tiles_34 = list(counts)
+	for block, _, _ in info:
+		for tile in _block_tiles(block):
+			tiles_34[tile] += 1
+	kinds = [i for i, c in enumerate(tiles_34) if c]
+	num_kans = sum(1 for _, _, is_kan in info if is_kan)
+	if max(tiles_34) > 4 or _may_be_yakuman(tiles_34, kinds, num_kans, bool(info)):
+		return None
+
+	meld_blocks = tuple(block for block, _, _ in info)
+	hands = _divide_hand(tuple(counts), meld_blocks)
+	if not hands:
+		return _error(HandCalculator.ERR_HAND_NOT_WINNING)
+
+	is_ippatsu = is_ippatsu and is_riichi
+	is_tanyao = _TERMINAL_AND_HONOR_INDICES.isdisjoint(kinds)
+	suits = {i // 9 for i in kinds if i < EAST}
+	has_honors = kinds[-1] >= EAST
+	dora = sum(tiles_34[_indicator_to_dora(i)] for i in dora_indicators)
+	valued = (HAKU, HATSU, CHUN, player_wind, round_wind)
+	open_sets = [block for block, opened, _ in info if opened]
+	chi_melds = [block for block in meld_blocks if block[1] == _SEQUENCE]
+	meld_state = {block[0]: (opened, is_kan) for block, opened, is_kan in info if block[1] != _SEQUENCE}
+	han_index = 1 if is_open else 2
+	# 分解によらない役
+	common_yaku = []
+	if is_tanyao:
+		common_yaku.append('Tanyao')
+	if is_riichi:
+		common_yaku.append('Riichi')
+	if is_ippatsu:
+		common_yaku.append('Ippatsu')
+	if len(suits) == 1:
+		common_yaku.append('Honitsu' if has_honors else 'Chinitsu')
+
+	best = None
+	for hand in hands:
+		is_chiitoitsu = len(hand) == 7
+		if not is_chiitoitsu and not is_open and all(kind != _SEQUENCE for _, kind in hand):
+			# 四暗刻の可能性
+			return None
+
+		# 和了牌を含む面子（副露した面子は除く）
+		win_groups: List[Block] = []
+		unmatched = list(open_sets)
+		for block in hand:
+			if block in unmatched:
+				unmatched.remove(block)
+				continue
+			tile, kind = block
+			contains = tile <= win_index <= tile + 2 if kind == _SEQUENCE else tile == win_index
+			if contains and block not in win_groups:
+				win_groups.append(block)
+
+		hand_yaku = _hand_yaku(hand, win_index, is_tsumo, is_open, open_sets, num_kans, player_wind, round_wind)
+		if is_chiitoitsu:
+			hand_yaku.append('Chiitoitsu')
+		hand_yaku += common_yaku
+
+		for win_group in win_groups:
+			fu_total, fu = _calculate_fu(hand, win_group, win_index, is_tsumo, is_open, valued, chi_melds, meld_state)
+			yaku = ['Menzen Tsumo'] if is_tsumo and not is_open else []
+			# 平和: 符が基本符だけの門前手
+			if not is_chiitoitsu and not is_open and fu_total == 30 - 10 * is_tsumo:
+				yaku.append('Pinfu')
+			yaku = sorted(yaku + hand_yaku, key=_YAKU_ORDER.get)
+			han = sum(_YAKU[name][han_index] or _YAKU[name][2] for name in yaku)
+			if han == 0:
+				candidate = (0, fu, fu_total, _error(HandCalculator.ERR_NO_YAKU))
+			else:
+				if dora:
+					yaku.append('Dora')
+					han += dora
+				cost = calculate_scores(han, fu, is_tsumo, is_dealer, honba)
+				candidate = (han, fu, fu_total, {'error': None, 'han': han, 'fu': fu, 'cost': cost, 'yaku': yaku})
+			# 翻・符・切り上げ前の符の順で高いもの（同じなら先に見つけたもの）
+			if best is None or candidate[:3] > best[:3]:
+				best = candidate
+	return best[3] if best is not None else _error(HandCalculator.ERR_HAND_NOT_WINNING)
@@ -1,23 +1,54 @@
 """
 シャンテン数計算
 """
+from collections import OrderedDict
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Optional, Sequence
 import importlib
+import os
+import threading
 import warnings
 
+from infra.metrics import timed
 from models.tile_utils import hand_to_counts
 
 
 # Try to detect external `mahjong` library; if available we'll prefer it for shanten
 try:
 	_mahjong_lib = importlib.import_module('mahjong')
+	_LibShanten = importlib.import_module('mahjong.shanten').Shanten
 	_MAHJONG_AVAILABLE = True
 except Exception:
 	_mahjong_lib = None
+	_LibShanten = None
 	_MAHJONG_AVAILABLE = False
 
 
+# シャンテン数計算のバックエンド
+# - 'mahjong': 外部 mahjong ライブラリ
+# - 'table': 事前計算テーブル（logic.shanten_table）
+# - 'fallback': 本モジュール内の簡易実装
+SHANTEN_BACKENDS = ('mahjong', 'table', 'fallback')
+SHANTEN_BACKEND_ENV = 'MAHJONG_SHANTEN_BACKEND'
+
+_shanten_backend = os.environ.get(SHANTEN_BACKEND_ENV) or ('mahjong' if _MAHJONG_AVAILABLE else 'fallback')
+
+
+def get_shanten_backend() -> str:
+	"""現在のシャンテン数計算バックエンド名を返す"""
+	return _shanten_backend
+
+
+def set_shanten_backend(name: str) -> None:
+	"""シャンテン数計算バックエンドを切り替える"""
+	global _shanten_backend
+	if name not in SHANTEN_BACKENDS:
+		raise ValueError(f"Unknown shanten backend: {name}")
+	_shanten_backend = name
+	# 既定サービスのキャッシュは旧バックエンドの結果なので破棄する
+	_default_service.clear()
+
+
 @lru_cache(maxsize=2048)
 def _suit_best(counts_tuple):
 	"""
@@ -140,30 +171,43 @@ def shanten_kokushi(counts: List[int]) -> int:
 	return sh
 
 
-def calculate_shanten(hand: List[str], open_melds_count: int = 0) -> int:
+def calculate_shanten(hand: List[str], open_melds_count: int = 0, backend: Optional[str] = None) -> int:
 	"""
 	手牌のシャンテン数を計算
 	
-	- 可能なら mahjong.shanten.Shanten を使用
+	- 可能なら mahjong.shanten.Shanten を使用（backend で 'table' などに切り替え可能）
 	- 手牌は13/14枚だけでなく、副露後の枚数（例: 10/11/12）も受け付ける
 	"""
-	counts = hand_to_counts(hand)
+	return calculate_shanten_from_counts(hand_to_counts(hand), open_melds_count=open_melds_count, backend=backend)
+
+
+@timed('shanten')
+def calculate_shanten_from_counts(counts: List[int], open_melds_count: int = 0, backend: Optional[str] = None) -> int:
+	"""
+	34種の枚数配列からシャンテン数を計算
+
+	Hand が保持する枚数配列をそのまま渡せるため、牌リストの再集計が不要。
+	counts は変更しない。backend 未指定時は get_shanten_backend() の設定に従い、
+	プロセス共有の ShantenService のキャッシュを経由する。
+	"""
+	if backend is None or backend == _shanten_backend:
+		return _default_service.shanten(counts, open_melds_count)
+	return _compute_shanten(counts, open_melds_count, backend)
+
+
+def _compute_shanten(counts: Sequence[int], open_melds_count: int, backend: str) -> int:
+	"""キャッシュを通さずにシャンテン数を計算する"""
 	valid_count = sum(counts)
 	# 通常の手牌構成に当てはまらない牌数は高シャンテン扱い
 	if valid_count == 0 or valid_count % 3 not in (1, 2):
 		return 8
 
-	if _MAHJONG_AVAILABLE:
+	if backend == 'table' and valid_count <= 14:
+		return _shanten_from_table(counts, valid_count)
+
+	if backend == 'mahjong' and _MAHJONG_AVAILABLE:
 		try:
-			from mahjong.shanten import Shanten
-			shanten = Shanten()
-			# open_melds_count が与えられた場合は内部状態に反映
-			# （現在の mahjong 実装では number_melds 属性で扱う）
-			if open_melds_count > 0 and hasattr(shanten, 'number_melds'):
-				with warnings.catch_warnings():
-					warnings.simplefilter('ignore', DeprecationWarning)
-					shanten.number_melds = open_melds_count
-			return shanten.calculate_shanten(counts)
+			return _shanten_from_library(counts, open_melds_count)
 		except Exception:
 			pass
 
@@ -172,3 +216,165 @@ def calculate_shanten(hand: List[str], open_melds_count: int = 0) -> int:
 	s_chi = shanten_chiitoitsu(counts)
 	s_kok = shanten_kokushi(counts)
 	return min(s_std, s_chi, s_kok)
+
+
+# mahjong.shanten.Shanten はステートレスなので1インスタンスを使い回す
+_lib_shanten = _LibShanten() if _MAHJONG_AVAILABLE else None
+
+
+def _shanten_from_library(counts: Sequence[int], open_melds_count: int) -> int:
+	"""mahjong ライブラリによるシャンテン数"""
+	shanten = _lib_shanten
+	# 旧バージョンは副露数をインスタンス属性 number_melds で持つため、
+	# その場合だけ呼び出しごとに専用インスタンスを作る
+	if open_melds_count > 0 and hasattr(shanten, 'number_melds'):
+		shanten = _LibShanten()
+		with warnings.catch_warnings():
+			warnings.simplefilter('ignore', DeprecationWarning)
+			shanten.number_melds = open_melds_count
+	return shanten.calculate_shanten(counts)
+
+
+def _shanten_from_table(counts: Sequence[int], valid_count: int) -> int:
+	"""
+	事前計算テーブルによるシャンテン数（mahjong ライブラリと同じ規約）
+
+	副露分は手牌枚数から暗黙に決まるため open_melds_count は不要。
+	七対子・国士無双は13枚以上のときのみ考慮する。
+	"""
+	from logic.shanten_table import get_shanten_table
+	result = get_shanten_table().shanten_regular(counts)
+	if valid_count >= 13:
+		result = min(result, shanten_chiitoitsu(counts), shanten_kokushi(counts))
+	return result
+
+
+@timed('shanten_after_discards')
+def shanten_after_discards(counts: Sequence[int], open_melds_count: int = 0, backend: Optional[str] = None) -> Dict[int, int]:
+	"""
+	手牌にある各牌種を1枚捨てたときのシャンテン数をまとめて計算
+
+	同じ牌種が複数枚あっても計算は1回だけ。'table' バックエンドでは
+	打牌で変化しないブロックのテーブル参照・合成結果を全候補で共有する。
+
+	Returns:
+		{牌種インデックス(0..33): 打牌後のシャンテン数}
+	"""
+	return _shanten_after_change(counts, -1, open_melds_count, backend)
+
+
+def shanten_after_draws(counts: Sequence[int], open_melds_count: int = 0, backend: Optional[str] = None) -> Dict[int, int]:
+	"""
+	各牌種を1枚ツモしたときのシャンテン数をまとめて計算（手牌に4枚ある牌種は除く）
+
+	Returns:
+		{牌種インデックス(0..33): ツモ後のシャンテン数}
+	"""
+	return _shanten_after_change(counts, 1, open_melds_count, backend)
+
+
+def _shanten_after_change(counts: Sequence[int], delta: int, open_melds_count: int, backend: Optional[str]) -> Dict[int, int]:
+	backend = backend or _shanten_backend
+	after = sum(counts) + delta
+	if backend == 'table' and 0 < after <= 14 and after % 3 in (1, 2):
+		from logic.shanten_table import get_shanten_table
+		table = get_shanten_table()
+		if delta < 0:
+			result = table.regular_after_discards(counts)
+		else:
+			result = table.regular_after_draws(counts)
+		if after >= 13:
+			work = list(counts)
+			for kind, value in result.items():
+				work[kind] += delta
+				result[kind] = min(value, shanten_chiitoitsu(work), shanten_kokushi(work))
+				work[kind] -= delta
+		return result
+
+	work = list(counts)
+	result = {}
+	for kind in range(34):
+		if not 0 <= work[kind] + delta <= 4:
+			continue
+		work[kind] += delta
+		result[kind] = calculate_shanten_from_counts(work, open_melds_count, backend)
+		work[kind] -= delta
+	return result
+
+
+class ShantenService:
+	"""
+	シャンテン数計算サービス
+
+	(34種枚数タプル, 副露数) をキーに結果をキャッシュし、
+	キャッシュミス時のみバックエンドで計算する。複数スレッドから共有してよい。
+	"""
+
+	def __init__(self, backend: Optional[str] = None, maxsize: int = 65536):
+		"""
+		Args:
+			backend: 使用するバックエンド（None ならモジュール設定に従う）
+			maxsize: キャッシュの最大エントリ数（超えたら古いものから捨てる）
+		"""
+		if backend is not None and backend not in SHANTEN_BACKENDS:
+			raise ValueError(f"Unknown shanten backend: {backend}")
+		self._backend = backend
+		self.maxsize = maxsize
+		self._cache: OrderedDict = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	@property
+	def backend(self) -> str:
+		return self._backend or _shanten_backend
+
+	def shanten(self, counts: Sequence[int], open_melds_count: int = 0) -> int:
+		"""34種枚数配列のシャンテン数（キャッシュ付き）"""
+		key = (tuple(counts), open_melds_count)
+		with self._lock:
+			result = self._cache.get(key)
+			if result is not None:
+				self.hits += 1
+				self._cache.move_to_end(key)
+				return result
+			self.misses += 1
+		# 計算はロック外で行う（同じキーを同時に計算しても結果は同じ）
+		result = _compute_shanten(key[0], open_melds_count, self.backend)
+		with self._lock:
+			self._cache[key] = result
+			if len(self._cache) > self.maxsize:
+				self._cache.popitem(last=False)
+		return result
+
+	def shanten_of_tiles(self, hand: List[str], open_melds_count: int = 0) -> int:
+		"""牌文字列リストのシャンテン数（キャッシュ付き）"""
+		return self.shanten(hand_to_counts(hand), open_melds_count)
+
+	def clear(self) -> None:
+		"""キャッシュと統計をリセット"""
+		with self._lock:
+			self._cache.clear()
+			self.hits = 0
+			self.misses = 0
+
+	def stats(self) -> Dict[str, object]:
+		"""ヒット数・ミス数・キャッシュサイズなどの統計"""
+		with self._lock:
+			total = self.hits + self.misses
+			return {
+				'backend': self.backend,
+				'hits': self.hits,
+				'misses': self.misses,
+				'size': len(self._cache),
+				'maxsize': self.maxsize,
+				'hit_rate': self.hits / total if total else 0.0,
+			}
+
+
+_default_service = ShantenService()
+
+
+def get_shanten_service() -> ShantenService:
+	"""プロセス共有の ShantenService を返す"""
+	return _default_service
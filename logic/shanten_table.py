@@ -0,0 +1,413 @@
+"""
+テーブル駆動のシャンテン数計算
+
+数牌1スート（9種）と字牌（7種）の枚数ベクトルごとに、
+「面子 m 個（0..4）＋雀頭 p 個（0/1）を完成させるのに足りない牌の枚数」を
+事前計算したルックアップテーブルを使う。
+
+- 数牌: 各種0..4枚・合計14枚以下の全 405,350 ベクトル
+- 字牌: 各種0..4枚・合計14枚以下の全 43,130 ベクトル（7種）
+
+テーブルは一度だけ構築してバイナリファイルに保存し、以降は mmap で読み込む。
+手牌全体のシャンテン数は4ブロック分の参照と小さな min-plus 合成だけで求まる。
+
+テーブルの事前構築: python -m logic.shanten_table
+（保存先は環境変数 MAHJONG_SHANTEN_TABLE で変更可能）
+"""
+import mmap
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# テーブル1エントリ = (m, p) の 5 x 2 = 10 バイト（インデックス m * 2 + p）
+ENTRY_SIZE = 10
+MAX_TILES_PER_BLOCK = 14
+
+TABLE_MAGIC = b'MJST'
+TABLE_VERSION = 1
+_HEADER_SIZE = 16
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'shanten_table.bin')
+TABLE_PATH_ENV = 'MAHJONG_SHANTEN_TABLE'
+
+_INF = 99
+
+
+@lru_cache(maxsize=None)
+def _count_vectors(length: int, budget: int) -> int:
+	"""各要素0..4・合計 budget 以下の長さ length のベクトル数"""
+	if length == 0:
+		return 1
+	return sum(_count_vectors(length - 1, budget - v) for v in range(min(4, budget) + 1))
+
+
+def _build_rank_tables(length: int) -> Tuple[List[List[List[int]]], int]:
+	"""
+	辞書順ランク計算用のオフセット表を作る
+
+	offsets[i][rest][v] = 位置 i の値が v のとき、それより小さい値で始まるベクトル数
+	（rest は位置 i 以降に使える残り枚数）
+	"""
+	offsets = []
+	for i in range(length):
+		by_rest = []
+		for rest in range(MAX_TILES_PER_BLOCK + 1):
+			row = []
+			acc = 0
+			for v in range(5):
+				row.append(acc)
+				if v <= rest:
+					acc += _count_vectors(length - i - 1, rest - v)
+			by_rest.append(row)
+		offsets.append(by_rest)
+	return offsets, _count_vectors(length, MAX_TILES_PER_BLOCK)
+
+
+_SUIT_OFFSETS, NUM_SUIT_VECTORS = _build_rank_tables(9)
+_HONOR_OFFSETS, NUM_HONOR_VECTORS = _build_rank_tables(7)
+
+
+def _build_split_rank(length: int, head: int, offsets):
+	"""
+	ランクを「先頭 head 種」と「残り」の2回の表引きで求めるための表を作る
+
+	head_rank[h] / head_rest[h]: 先頭部分（5進数 h）までのランク寄与と残り枚数
+	tail_rank[rest * 5**tail + t]: 残り部分（5進数 t）のランク寄与
+	"""
+	tail = length - head
+	head_rank = []
+	head_rest = []
+	for h in range(5 ** head):
+		digits = [(h // 5 ** (head - 1 - i)) % 5 for i in range(head)]
+		rank = 0
+		rest = MAX_TILES_PER_BLOCK
+		for i, v in enumerate(digits):
+			if rest < 0 or v > rest:
+				rest = -1
+				break
+			rank += offsets[i][rest][v]
+			rest -= v
+		head_rank.append(rank)
+		head_rest.append(rest)
+	size = 5 ** tail
+	tail_rank = [0] * ((MAX_TILES_PER_BLOCK + 1) * size)
+	for rest in range(MAX_TILES_PER_BLOCK + 1):
+		for t in range(size):
+			digits = [(t // 5 ** (tail - 1 - i)) % 5 for i in range(tail)]
+			rank = 0
+			r = rest
+			for i, v in enumerate(digits):
+				if v > r:
+					break
+				rank += offsets[head + i][r][v]
+				r -= v
+			tail_rank[rest * size + t] = rank
+	return head_rank, head_rest, tail_rank
+
+
+_SUIT_HEAD_RANK, _SUIT_HEAD_REST, _SUIT_TAIL_RANK = _build_split_rank(9, 4, _SUIT_OFFSETS)
+_HONOR_HEAD_RANK, _HONOR_HEAD_REST, _HONOR_TAIL_RANK = _build_split_rank(7, 3, _HONOR_OFFSETS)
+
+
+def suit_rank(counts: Sequence[int], start: int) -> int:
+	"""数牌1スート（counts[start:start+9]）のランク"""
+	c0, c1, c2, c3, c4, c5, c6, c7, c8 = counts[start:start + 9]
+	h = ((c0 * 5 + c1) * 5 + c2) * 5 + c3
+	return _SUIT_HEAD_RANK[h] + _SUIT_TAIL_RANK[
+		_SUIT_HEAD_REST[h] * 3125 + (((c4 * 5 + c5) * 5 + c6) * 5 + c7) * 5 + c8
+	]
+
+
+def honor_rank(counts: Sequence[int], start: int = 27) -> int:
+	"""字牌（counts[start:start+7]）のランク"""
+	c0, c1, c2, c3, c4, c5, c6 = counts[start:start + 7]
+	h = (c0 * 5 + c1) * 5 + c2
+	return _HONOR_HEAD_RANK[h] + _HONOR_TAIL_RANK[
+		_HONOR_HEAD_REST[h] * 625 + ((c3 * 5 + c4) * 5 + c5) * 5 + c6
+	]
+
+
+def _transitions(base: int, pair_used: int, can_start: bool, have: int) -> List[Tuple[int, int, int, int]]:
+	"""
+	1種ぶんの遷移候補 (新しく始める順子数, 増える面子数, 増える雀頭数, 不足枚数) を列挙する
+
+	base はこの牌を使う進行中の順子数、pair_used は雀頭を既に取ったかどうか。
+	"""
+	result = []
+	for t in (0, 1):
+		for q in ((0, 1) if pair_used == 0 else (0,)):
+			for s in range(5 if can_start else 1):
+				need = base + 3 * t + 2 * q + s
+				if need > 4:
+					break
+				result.append((s, t + s, q, need - have if need > have else 0))
+	return result
+
+
+_TRANSITIONS = {
+	(base, pair_used, can_start, have): _transitions(base, pair_used, can_start, have)
+	for base in range(9)
+	for pair_used in (0, 1)
+	for can_start in (False, True)
+	for have in range(5)
+}
+
+
+def _step(states: dict, pos: int, have: int, allow_sequences: bool, length: int) -> dict:
+	"""
+	1種ぶん DP を進める
+
+	状態キー: (pos-1 から始まる順子数, pos-2 から始まる順子数, 面子数, 雀頭数)
+	値: ここまでに不足している牌の枚数（最小値）
+	"""
+	out = {}
+	get = out.get
+	can_start = allow_sequences and pos <= length - 3
+	for (c1, c2, m, p), cost in states.items():
+		for s, dm, dq, extra in _TRANSITIONS[(c1 + c2, p, can_start, have)]:
+			m2 = m + dm
+			if m2 > 4:
+				continue
+			value = cost + extra
+			key = (s, c1, m2, p + dq)
+			if value < get(key, _INF):
+				out[key] = value
+	return out
+
+
+def _finalize(states: dict) -> bytes:
+	"""DP 終端状態から 10 バイトのエントリを作る"""
+	entry = [_INF] * ENTRY_SIZE
+	for (c1, c2, m, p), cost in states.items():
+		if c1 or c2:
+			continue
+		k = m * 2 + p
+		if cost < entry[k]:
+			entry[k] = cost
+	return bytes(entry)
+
+
+def _build_block_table(length: int, allow_sequences: bool) -> bytes:
+	"""
+	長さ length のブロック（数牌スート or 字牌）の全ベクトル分のエントリを辞書順に連結して返す
+
+	同じ DP 状態を共有する接頭辞が多いため、状態IDと残り枚数でメモ化する。
+	"""
+	state_ids = {}
+	states_by_id = []
+	child_memo = {}
+	block_memo = {}
+
+	def intern(states: dict) -> int:
+		key = tuple(sorted(states.items()))
+		sid = state_ids.get(key)
+		if sid is None:
+			sid = len(states_by_id)
+			state_ids[key] = sid
+			states_by_id.append(states)
+		return sid
+
+	def child(sid: int, pos: int, have: int) -> int:
+		key = (sid, pos, have)
+		cid = child_memo.get(key)
+		if cid is None:
+			cid = intern(_step(states_by_id[sid], pos, have, allow_sequences, length))
+			child_memo[key] = cid
+		return cid
+
+	def block(pos: int, sid: int, rest: int) -> bytes:
+		if pos == length:
+			return _finalize(states_by_id[sid])
+		key = (pos, sid, rest)
+		cached = block_memo.get(key)
+		if cached is None:
+			cached = b''.join(
+				block(pos + 1, child(sid, pos, have), rest - have)
+				for have in range(min(4, rest) + 1)
+			)
+			block_memo[key] = cached
+		return cached
+
+	root = intern({(0, 0, 0, 0): 0})
+	return block(0, root, MAX_TILES_PER_BLOCK)
+
+
+def build_table_bytes() -> bytes:
+	"""ヘッダ付きのテーブル全体（数牌部＋字牌部）を構築する"""
+	suits = _build_block_table(9, allow_sequences=True)
+	honors = _build_block_table(7, allow_sequences=False)
+	header = TABLE_MAGIC + bytes([TABLE_VERSION, ENTRY_SIZE]) + bytes(_HEADER_SIZE - len(TABLE_MAGIC) - 2)
+	return header + suits + honors
+
+
+def write_table(path: Optional[str] = None) -> str:
+	"""テーブルを構築してファイルへ保存し、そのパスを返す（一時ファイル経由で原子的に置き換える）"""
+	path = path or os.environ.get(TABLE_PATH_ENV) or DEFAULT_TABLE_PATH
+	directory = os.path.dirname(path)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, 'wb') as f:
+		f.write(build_table_bytes())
+	os.replace(tmp_path, path)
+	return path
+
+
+def _expected_size() -> int:
+	return _HEADER_SIZE + (NUM_SUIT_VECTORS + NUM_HONOR_VECTORS) * ENTRY_SIZE
+
+
+class ShantenTable:
+	"""事前計算テーブルを使ったシャンテン数計算器"""
+
+	def __init__(self, data):
+		"""
+		Args:
+			data: build_table_bytes() の内容（bytes / mmap など）
+		"""
+		if len(data) != _expected_size() or bytes(data[:4]) != TABLE_MAGIC or data[4] != TABLE_VERSION:
+			raise ValueError('Invalid shanten table data')
+		self._data = data
+		self._honor_base = _HEADER_SIZE + NUM_SUIT_VECTORS * ENTRY_SIZE
+
+	@classmethod
+	def load(cls, path: Optional[str] = None, build_if_missing: bool = True) -> 'ShantenTable':
+		"""テーブルファイルを mmap で読み込む（無ければ構築して保存）"""
+		path = path or os.environ.get(TABLE_PATH_ENV) or DEFAULT_TABLE_PATH
+		if not os.path.exists(path) or os.path.getsize(path) != _expected_size():
+			if not build_if_missing:
+				raise FileNotFoundError(path)
+			write_table(path)
+		with open(path, 'rb') as f:
+			data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		return cls(data)
+
+	@classmethod
+	def build(cls) -> 'ShantenTable':
+		"""ファイルを使わずメモリ上に構築する"""
+		return cls(build_table_bytes())
+
+	def suit_entry(self, counts: Sequence[int], offset: int) -> bytes:
+		"""counts[offset:offset+9]（1スート）のエントリ"""
+		pos = _HEADER_SIZE + suit_rank(counts, offset) * ENTRY_SIZE
+		return self._data[pos:pos + ENTRY_SIZE]
+
+	def honor_entry(self, counts: Sequence[int], offset: int = 27) -> bytes:
+		"""counts[offset:offset+7]（字牌）のエントリ"""
+		pos = self._honor_base + honor_rank(counts, offset) * ENTRY_SIZE
+		return self._data[pos:pos + ENTRY_SIZE]
+
+	def block_entries(self, counts: Sequence[int]) -> List[bytes]:
+		"""34枚数配列を [萬子, 筒子, 索子, 字牌] の4エントリに分解する"""
+		return [
+			self.suit_entry(counts, 0),
+			self.suit_entry(counts, 9),
+			self.suit_entry(counts, 18),
+			self.honor_entry(counts, 27),
+		]
+
+	def shanten_regular(self, counts: Sequence[int]) -> int:
+		"""通常形（面子＋雀頭）のシャンテン数"""
+		entries = self.block_entries(counts)
+		return combine_regular(entries, sum(counts) // 3) - 1
+
+	def regular_after_discards(self, counts: Sequence[int]) -> Dict[int, int]:
+		"""
+		手牌にある各牌種を1枚捨てたときの通常形シャンテン数
+
+		打牌で変わるのはその牌種を含む1ブロックだけなので、
+		残り3ブロックの合成結果をブロックごとに1回だけ作って使い回す。
+		"""
+		return self._regular_after_change(counts, -1)
+
+	def regular_after_draws(self, counts: Sequence[int]) -> Dict[int, int]:
+		"""まだ4枚持っていない各牌種を1枚加えたときの通常形シャンテン数"""
+		return self._regular_after_change(counts, 1)
+
+	def _regular_after_change(self, counts: Sequence[int], delta: int) -> Dict[int, int]:
+		melds = (sum(counts) + delta) // 3
+		entries = self.block_entries(counts)
+		others = []
+		for b in range(4):
+			rest = [entries[i] for i in range(4) if i != b]
+			others.append(merge_entries(merge_entries(rest[0], rest[1], melds), rest[2], melds))
+
+		work = list(counts)
+		result = {}
+		for kind in range(34):
+			after = work[kind] + delta
+			if after < 0 or after > 4:
+				continue
+			b = kind // 9 if kind < 27 else 3
+			work[kind] = after
+			entry = self.honor_entry(work, 27) if b == 3 else self.suit_entry(work, b * 9)
+			work[kind] -= delta
+			result[kind] = _finish_regular(others[b], entry, melds) - 1
+		return result
+
+
+def merge_entries(a: Sequence[int], b: Sequence[int], max_melds: int = 4) -> List[int]:
+	"""2ブロックのエントリを min-plus 合成する（面子数 max_melds まで）"""
+	merged = [_INF] * ENTRY_SIZE
+	for m in range(max_melds + 1):
+		best0 = _INF
+		best1 = _INF
+		for i in range(m + 1):
+			j = m - i
+			x0 = a[i * 2]
+			x1 = a[i * 2 + 1]
+			y0 = b[j * 2]
+			y1 = b[j * 2 + 1]
+			v = x0 + y0
+			if v < best0:
+				best0 = v
+			v = x1 + y0
+			if v < best1:
+				best1 = v
+			v = x0 + y1
+			if v < best1:
+				best1 = v
+		merged[m * 2] = best0
+		merged[m * 2 + 1] = best1
+	return merged
+
+
+def combine_regular(entries: Sequence[Sequence[int]], melds: int) -> int:
+	"""4ブロックのエントリから「面子 melds 個＋雀頭」までの不足枚数を求める"""
+	acc = merge_entries(entries[0], entries[1], melds)
+	acc = merge_entries(acc, entries[2], melds)
+	return _finish_regular(acc, entries[3], melds)
+
+
+def _finish_regular(acc: Sequence[int], last: Sequence[int], melds: int) -> int:
+	"""3ブロック合成済みのエントリと残り1ブロックから「面子 melds 個＋雀頭」の不足枚数を求める"""
+	best = _INF
+	for i in range(melds + 1):
+		j = melds - i
+		v = acc[i * 2 + 1] + last[j * 2]
+		if v < best:
+			best = v
+		v = acc[i * 2] + last[j * 2 + 1]
+		if v < best:
+			best = v
+	return best
+
+
+_shared_table: Optional[ShantenTable] = None
+_shared_lock = threading.Lock()
+
+
+def get_shanten_table() -> ShantenTable:
+	"""プロセス共有のテーブルを返す（初回のみ読み込み／構築）"""
+	global _shared_table
+	if _shared_table is None:
+		with _shared_lock:
+			if _shared_table is None:
+				_shared_table = ShantenTable.load()
+	return _shared_table
+
+
+if __name__ == '__main__':
+	print(write_table())
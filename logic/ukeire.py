@@ -0,0 +1,147 @@
+"""
+受け入れ（有効牌）計算
+
+手牌の枚数配列と場に見えている牌から、
+「どの牌をツモればシャンテン数が下がるか」と「その牌の残り枚数」を求める。
+シャンテン数は logic.shanten の一括計算（打牌後／ツモ後）を使い、
+34 x 14 通りを個別に計算し直すことはしない。
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from logic.shanten import calculate_shanten_from_counts, shanten_after_discards, shanten_after_draws
+from models.meld import MeldRecord
+from models.tile_utils import NUM_TILE_KINDS, index_to_tile, tile_to_index
+
+
+def _called_kind(meld, kinds: List[int]) -> Optional[int]:
+	"""副露のうち他家の捨て牌から鳴いた牌の34形式インデックス（分からなければ None）"""
+	if isinstance(meld, MeldRecord):
+		if meld.called_tile is not None:
+			return tile_to_index(meld.called_tile)
+		kind = meld.kind
+	elif isinstance(meld, dict):
+		if meld.get('called') is not None:
+			return tile_to_index(meld['called'])
+		kind = meld.get('type')
+	else:
+		kind = None
+	# 鳴いた牌を記録していない副露でも、ポン・明槓は同じ牌種なので分かる
+	if kind != 'ankan' and kinds and len(set(kinds)) == 1:
+		return kinds[0]
+	return None
+
+
+def visible_tile_counts(players: Iterable, dora_indicators: Optional[Iterable[str]] = None) -> List[int]:
+	"""
+	場に見えている牌の34種枚数配列を作る
+
+	- 全員の捨て牌（Player.discards）
+	- 全員の副露（Player.melds。dict / list 両形式）
+	- ドラ表示牌
+
+	鳴かれた牌は捨て牌にも残っているため、副露の鳴いた牌（MeldRecord.called_tile）は
+	捨て牌側で数えた1枚と重複させない。鳴いた牌が分からないチーはすべての牌を数える。
+	"""
+	visible = [0] * NUM_TILE_KINDS
+	for player in players:
+		for tile in player.discards:
+			idx = tile_to_index(tile)
+			if idx is not None:
+				visible[idx] += 1
+	# 鳴かれた可能性のある捨て牌（副露側で二重に数えないための残量）
+	callable_discards = list(visible)
+
+	for player in players:
+		for meld in player.melds:
+			tiles = meld.get('tiles', []) if isinstance(meld, dict) else meld
+			kinds = [k for k in (tile_to_index(t) for t in tiles) if k is not None]
+			called = _called_kind(meld, kinds)
+			if called is not None and called in kinds and callable_discards[called] > 0:
+				callable_discards[called] -= 1
+				kinds.remove(called)
+			for k in kinds:
+				visible[k] += 1
+
+	for tile in dora_indicators or []:
+		idx = tile_to_index(tile)
+		if idx is not None:
+			visible[idx] += 1
+	return visible
+
+
+def _live_count(hand_counts: Sequence[int], visible: Optional[Sequence[int]], kind: int) -> int:
+	"""自分から見た残り枚数"""
+	seen = hand_counts[kind] + (visible[kind] if visible is not None else 0)
+	return max(0, 4 - seen)
+
+
+def _improving_tiles(
+	counts: Sequence[int],
+	shanten: int,
+	live_base: Sequence[int],
+	visible: Optional[Sequence[int]],
+	open_melds_count: int,
+) -> Dict[str, int]:
+	"""counts にツモるとシャンテン数が shanten 未満になる牌と残り枚数"""
+	tiles = {}
+	for kind, value in shanten_after_draws(counts, open_melds_count).items():
+		if value < shanten:
+			tiles[index_to_tile(kind)] = _live_count(live_base, visible, kind)
+	return tiles
+
+
+def calculate_ukeire(
+	hand_counts: Sequence[int],
+	visible_counts: Optional[Sequence[int]] = None,
+	open_melds_count: int = 0,
+) -> Dict:
+	"""
+	ツモ前（3n+1枚）の手牌の受け入れを計算
+
+	Args:
+		hand_counts: 手牌の34種枚数配列
+		visible_counts: visible_tile_counts() の結果（None なら手牌以外は見えていない扱い）
+		open_melds_count: 副露数
+
+	Returns:
+		{
+			'shanten': 現在のシャンテン数,
+			'tiles': {有効牌: 残り枚数},
+			'total': 残り枚数の合計,
+		}
+	"""
+	shanten = calculate_shanten_from_counts(hand_counts, open_melds_count)
+	tiles = _improving_tiles(hand_counts, shanten, hand_counts, visible_counts, open_melds_count)
+	return {'shanten': shanten, 'tiles': tiles, 'total': sum(tiles.values())}
+
+
+def calculate_ukeire_per_discard(
+	hand_counts: Sequence[int],
+	visible_counts: Optional[Sequence[int]] = None,
+	open_melds_count: int = 0,
+) -> Dict[str, Dict]:
+	"""
+	ツモ後（3n+2枚）の手牌について、打牌候補ごとの受け入れを計算
+
+	同じ牌種の打牌は1候補にまとめる。捨てた牌は自分の捨て牌として見えるため、
+	残り枚数は打牌前の手牌を基準に数える。
+
+	Returns:
+		{打牌: {'shanten': 打牌後のシャンテン数, 'tiles': {有効牌: 残り枚数}, 'total': 合計}}
+	"""
+	result = {}
+	work = list(hand_counts)
+	for kind, shanten in shanten_after_discards(hand_counts, open_melds_count).items():
+		work[kind] -= 1
+		tiles = _improving_tiles(work, shanten, hand_counts, visible_counts, open_melds_count)
+		work[kind] += 1
+		result[index_to_tile(kind)] = {'shanten': shanten, 'tiles': tiles, 'total': sum(tiles.values())}
+	return result
+
+
+def best_ukeire_discards(per_discard: Dict[str, Dict]) -> List[str]:
+	"""シャンテン数最小の中で受け入れ枚数が最大の打牌候補を返す"""
+	if not per_discard:
+		return []
+	best_key = min((info['shanten'], -info['total']) for info in per_discard.values())
+	return [tile for tile, info in per_discard.items() if (info['shanten'], -info['total']) == best_key]
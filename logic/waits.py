@@ -0,0 +1,173 @@
+"""
+待ち牌（和了牌）計算
+
+3n+1 枚の暗部の枚数配列から、手牌の分解結果をもとに和了牌を直接求める。
+34種の候補を1枚ずつ足して和了判定する総当たりは行わない。
+結果は暗部の枚数配列ごとにキャッシュする。
+"""
+from functools import lru_cache
+from typing import List, Sequence, Set, Tuple
+
+from infra.metrics import timed
+from models.tile_utils import NUM_TILE_KINDS, TILE_KINDS, index_to_tile
+
+
+_TERMINAL_AND_HONOR_INDICES = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+
+# 残り牌（雀頭・塔子・単騎）として取り置ける最大枚数（雀頭2枚＋塔子2枚）
+_MAX_LEFTOVER = 4
+
+
+def _same_suit(a: int, b: int) -> bool:
+	return a < 27 and b < 27 and a // 9 == b // 9
+
+
+def _waits_for_partial(a: int, b: int, waits: Set[int]) -> None:
+	"""2枚の塔子（a <= b）を完成させる牌を追加"""
+	if a == b:
+		waits.add(a)
+		return
+	if not _same_suit(a, b):
+		return
+	if b - a == 1:
+		# 両面・辺張
+		if a % 9 > 0:
+			waits.add(a - 1)
+		if b % 9 < 8:
+			waits.add(b + 1)
+	elif b - a == 2:
+		# 嵌張
+		waits.add(a + 1)
+
+
+def _waits_from_leftover(leftover: List[int], waits: Set[int]) -> None:
+	"""面子を取り除いた残り牌（1枚 or 4枚）から待ちを求める"""
+	if len(leftover) == 1:
+		waits.add(leftover[0])
+		return
+	if len(leftover) != 4:
+		return
+	# 4枚 = 雀頭 + 塔子
+	for i in range(3):
+		if leftover[i] == leftover[i + 1] and (i == 0 or leftover[i - 1] != leftover[i]):
+			rest = leftover[:i] + leftover[i + 2:]
+			_waits_for_partial(rest[0], rest[1], waits)
+
+
+def _collect_regular(counts: List[int], pos: int, leftover: List[int], waits: Set[int]) -> None:
+	"""
+	pos 以降の牌を「面子」か「残り牌」に振り分けるすべての分解を列挙する
+
+	counts / leftover は探索中に変更し、戻る前に元に戻す。
+	"""
+	while pos < NUM_TILE_KINDS and counts[pos] == 0:
+		pos += 1
+	if pos == NUM_TILE_KINDS:
+		_waits_from_leftover(leftover, waits)
+		return
+
+	c = counts[pos]
+	for keep in range(min(c, _MAX_LEFTOVER - len(leftover)) + 1):
+		rest = c - keep
+		for triplets in (0, 1):
+			seqs = rest - 3 * triplets
+			if seqs < 0:
+				break
+			if seqs and (pos >= 27 or pos % 9 > 6 or counts[pos + 1] < seqs or counts[pos + 2] < seqs):
+				continue
+			counts[pos] = 0
+			if seqs:
+				counts[pos + 1] -= seqs
+				counts[pos + 2] -= seqs
+			leftover.extend([pos] * keep)
+			_collect_regular(counts, pos + 1, leftover, waits)
+			del leftover[len(leftover) - keep:]
+			if seqs:
+				counts[pos + 1] += seqs
+				counts[pos + 2] += seqs
+			counts[pos] = c
+
+
+def _chiitoitsu_waits(counts: Sequence[int], waits: Set[int]) -> None:
+	"""6対子＋1枚の形なら単騎の牌を追加"""
+	pairs = 0
+	single = None
+	for i, c in enumerate(counts):
+		if c == 2:
+			pairs += 1
+		elif c == 1 and single is None:
+			single = i
+		elif c:
+			return
+	if pairs == 6 and single is not None:
+		waits.add(single)
+
+
+def _kokushi_waits(counts: Sequence[int], waits: Set[int]) -> None:
+	"""国士無双の待ちを追加"""
+	if sum(counts[i] for i in _TERMINAL_AND_HONOR_INDICES) != 13:
+		return
+	missing = [i for i in _TERMINAL_AND_HONOR_INDICES if counts[i] == 0]
+	if not missing:
+		# 13面待ち
+		waits.update(_TERMINAL_AND_HONOR_INDICES)
+	elif len(missing) == 1 and max(counts[i] for i in _TERMINAL_AND_HONOR_INDICES) == 2:
+		waits.add(missing[0])
+
+
+@lru_cache(maxsize=8192)
+def _wait_kinds_cached(counts: Tuple[int, ...]) -> Tuple[int, ...]:
+	waits: Set[int] = set()
+	_collect_regular(list(counts), 0, [], waits)
+	if sum(counts) == 13:
+		_chiitoitsu_waits(counts, waits)
+		_kokushi_waits(counts, waits)
+	return tuple(sorted(w for w in waits if counts[w] < 4))
+
+
+@timed('waits')
+def wait_kinds(counts: Sequence[int]) -> Tuple[int, ...]:
+	"""
+	3n+1 枚の暗部の枚数配列から待ち牌の34種インデックスを求める（昇順）
+
+	副露分は暗部の枚数から暗黙に決まる（13枚 = 副露なし、10枚 = 1副露 ...）。
+	手牌で既に4枚使っている牌種（存在しない5枚目）は待ちに含めない。
+	"""
+	if sum(counts) % 3 != 1:
+		return ()
+	return _wait_kinds_cached(tuple(counts))
+
+
+def wait_tiles(counts: Sequence[int]) -> List[str]:
+	"""wait_kinds() の牌文字列版"""
+	return [index_to_tile(i) for i in wait_kinds(counts)]
+
+
+@timed('waits_after_discards')
+def wait_tiles_after_discards(counts: Sequence[int]) -> List[str]:
+	"""
+	3n+2 枚の暗部から、いずれか1枚を切った後に成立する待ち牌の和集合を求める
+
+	同じ牌種の打牌は1回だけ評価する。
+	"""
+	if sum(counts) % 3 != 2:
+		return []
+	work = list(counts)
+	winners: Set[int] = set()
+	for kind in range(NUM_TILE_KINDS):
+		if not work[kind]:
+			continue
+		work[kind] -= 1
+		winners.update(_wait_kinds_cached(tuple(work)))
+		work[kind] += 1
+	return [TILE_KINDS[i] for i in sorted(winners)]
+
+
+def clear_wait_cache() -> None:
+	"""待ち牌キャッシュを破棄"""
+	_wait_kinds_cached.cache_clear()
+
+
+def wait_cache_info():
+	"""待ち牌キャッシュの統計（functools.lru_cache の cache_info）"""
+	return _wait_kinds_cached.cache_info()
@@ -0,0 +1,182 @@
+"""
+役の有無の事前判定
+
+和了形の手について、点数計算（mahjong の HandCalculator）をせずに
+「役が必ずある」「役が絶対にない」「点数計算しないと分からない」を判定する。
+ドラは役にならないので判定に使わない。
+
+使う情報は暗部の枚数配列・副露・和了牌・ツモ/ロン・立直・自風・場風だけで、
+海底・河底・嶺上・槍槓・天和などの状況役は考えない（AgariChecker.can_win と同じ条件）。
+平和（待ちの形で決まる）や、ロン和了で暗刻の数が変わる三暗刻は判定を保留する。
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from mahjong.constants import CHUN, EAST, HAKU, HATSU
+from mahjong.meld import Meld
+
+from models.meld import to_meld_record
+
+
+YAKU_YES = 'yes'
+YAKU_NO = 'no'
+YAKU_MAYBE = 'maybe'
+
+_TERMINAL_AND_HONOR_INDICES = frozenset((0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33))
+_WIND_INDICES = (27, 28, 29, 30)
+
+# 面子: (種類, 先頭の牌種インデックス)。種類は 'seq'（順子）/ 'trip'（刻子・槓子）
+Block = Tuple[str, int]
+
+
+def _split_sets(counts: List[int], start: int) -> List[List[Block]]:
+	"""枚数配列（3n枚）を面子だけに分ける分解をすべて返す"""
+	i = start
+	while i < 34 and counts[i] == 0:
+		i += 1
+	if i == 34:
+		return [[]]
+	results: List[List[Block]] = []
+	if counts[i] >= 3:
+		counts[i] -= 3
+		results.extend([('trip', i)] + rest for rest in _split_sets(counts, i))
+		counts[i] += 3
+	if i < 27 and i % 9 <= 6 and counts[i + 1] and counts[i + 2]:
+		for k in (i, i + 1, i + 2):
+			counts[k] -= 1
+		results.extend([('seq', i)] + rest for rest in _split_sets(counts, i))
+		for k in (i, i + 1, i + 2):
+			counts[k] += 1
+	return results
+
+
+@lru_cache(maxsize=8192)
+def decompositions(counts: Tuple[int, ...]) -> Tuple[Tuple[int, Tuple[Block, ...]], ...]:
+	"""暗部（3n+2枚）の 雀頭 + 面子 への分解をすべて返す（七対子・国士無双は含まない）"""
+	result = []
+	for pair in range(34):
+		if counts[pair] < 2:
+			continue
+		rest = list(counts)
+		rest[pair] -= 2
+		for sets in _split_sets(rest, 0):
+			result.append((pair, tuple(sets)))
+	return tuple(result)
+
+
+def _meld_blocks(melds: Optional[List[Any]]) -> Optional[List[Tuple[str, int, bool, bool]]]:
+	"""副露を (種類, 先頭インデックス, 槓子か, 明副露か) にする（解釈できないものがあれば None）"""
+	blocks = []
+	for meld in melds or []:
+		if isinstance(meld, Meld):
+			kinds = sorted(t // 4 for t in meld.tiles or ())
+			if len(kinds) not in (3, 4):
+				return None
+			kind = 'trip' if kinds[0] == kinds[-1] else 'seq'
+			blocks.append((kind, kinds[0], len(kinds) == 4, bool(meld.opened)))
+			continue
+		record = to_meld_record(meld)
+		if record is None:
+			return None
+		kind = 'seq' if record.kind == 'chow' else 'trip'
+		blocks.append((kind, record.index_34, len(record.tiles_34) == 4, record.opened))
+	return blocks
+
+
+def _is_terminal_block(kind: str, idx: int) -> bool:
+	if kind == 'seq':
+		return idx % 9 in (0, 6)
+	return idx in _TERMINAL_AND_HONOR_INDICES
+
+
+def yaku_verdict(
+	counts: Sequence[int],
+	win_index: int,
+	melds: Optional[List[Any]] = None,
+	is_tsumo: bool = False,
+	is_riichi: bool = False,
+	player_wind: int = EAST,
+	round_wind: int = EAST,
+) -> str:
+	"""
+	和了形の手に役があるかを点数計算なしで判定する
+
+	Args:
+		counts: 和了牌を含む暗部の34種枚数配列（3n+2枚の和了形）
+		win_index: 和了牌の34形式インデックス
+		melds: 副露（MeldRecord / dict / 牌リスト / Meld）
+		is_tsumo: ツモ和了か
+		is_riichi: 立直しているか
+		player_wind: 自風（mahjong.constants の EAST など）
+		round_wind: 場風
+
+	Returns:
+		YAKU_YES（役が必ずある）/ YAKU_NO（役はない）/ YAKU_MAYBE（点数計算が必要）
+	"""
+	blocks = _meld_blocks(melds)
+	if blocks is None:
+		return YAKU_MAYBE
+	menzen = not any(opened for _, _, _, opened in blocks)
+	# 立直・門前清自摸和
+	if menzen and (is_riichi or is_tsumo):
+		return YAKU_YES
+
+	kinds = {i for i in range(34) if counts[i]}
+	for kind, idx, is_kan, _ in blocks:
+		kinds.update((idx, idx + 1, idx + 2) if kind == 'seq' else (idx,))
+	# 断么九（喰いタンあり）
+	if not kinds & _TERMINAL_AND_HONOR_INDICES:
+		return YAKU_YES
+	# 役牌（字牌3枚は必ず刻子になる）
+	valued = (HAKU, HATSU, CHUN, player_wind, round_wind)
+	if any(counts[v] >= 3 for v in valued) or any(kind == 'trip' and idx in valued for kind, idx, _, _ in blocks):
+		return YAKU_YES
+	# 混一色・清一色・字一色
+	if len({k // 9 for k in kinds if k < 27}) <= 1:
+		return YAKU_YES
+	# 三槓子・四槓子
+	if sum(is_kan for _, _, is_kan, _ in blocks) >= 3:
+		return YAKU_YES
+	if menzen and sum(counts) == 14:
+		# 七対子・国士無双
+		if all(c in (0, 2) for c in counts) or kinds <= _TERMINAL_AND_HONOR_INDICES:
+			return YAKU_YES
+
+	maybe = False
+	meld_sets = [(kind, idx) for kind, idx, _, _ in blocks]
+	closed_kans = sum(1 for _, _, is_kan, opened in blocks if is_kan and not opened)
+	for pair, sets in decompositions(tuple(counts)):
+		all_sets = list(sets) + meld_sets
+		trips = [idx for kind, idx in all_sets if kind == 'trip']
+		seqs = [idx for kind, idx in all_sets if kind == 'seq']
+		# 対々和
+		if not seqs:
+			return YAKU_YES
+		# 三色同順・三色同刻
+		for group in (seqs, trips):
+			if any(i < 9 and i + 9 in group and i + 18 in group for i in group):
+				return YAKU_YES
+		# 一気通貫
+		if any(base in seqs and base + 3 in seqs and base + 6 in seqs for base in (0, 9, 18)):
+			return YAKU_YES
+		# 混全帯么九・純全帯么九・混老頭
+		if pair in _TERMINAL_AND_HONOR_INDICES and all(_is_terminal_block(kind, idx) for kind, idx in all_sets):
+			return YAKU_YES
+		# 小四喜・大四喜
+		wind_trips = sum(1 for i in trips if i in _WIND_INDICES)
+		if wind_trips == 4 or (wind_trips == 3 and pair in _WIND_INDICES):
+			return YAKU_YES
+		# 一盃口・二盃口
+		if menzen and len(set(seqs)) < len(seqs):
+			return YAKU_YES
+		# 三暗刻（ロンで完成した刻子は明刻扱いになることがある）
+		concealed_trips = [idx for kind, idx in sets if kind == 'trip']
+		sure = closed_kans + sum(1 for i in concealed_trips if is_tsumo or i != win_index)
+		if sure >= 3:
+			return YAKU_YES
+		if closed_kans + len(concealed_trips) >= 3:
+			maybe = True
+		# 平和（待ちの形で決まる）
+		if menzen and not trips and pair not in valued:
+			maybe = True
+	return YAKU_MAYBE if maybe else YAKU_NO
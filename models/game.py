@@ -1,15 +1,27 @@
 """
 ゲーム全体の管理
 """
+import logging
+import os
+import random
 from typing import List, Optional, Dict, Any
 
-from models.tile_utils import build_wall
+from infra.log import get_logger, log_event
+from infra.metrics import timed
+from models.game_record import GameRecorder
+from models.meld import restore_melds, serialize_melds
+from models.tile_utils import TILE_KINDS, hand_to_counts
+from models.wall_source import ShuffledWallSource, WallSource
 from models.player import Player, AIPlayer
-from logic.agari import AgariChecker
+from logic.analysis import AnalysisService, get_analysis_service
 from logic.calls import CallChecker, CallAction
 from mahjong.constants import EAST, SOUTH, WEST, NORTH
 
 
+DEBUG_WAIT_CHECK_ENV = 'MAHJONG_DEBUG_WAITS'
+
+logger = get_logger(__name__)
+
 
 class Game:
 	"""麻雀ゲーム全体を管理するクラス"""
@@ -26,9 +38,7 @@ class Game:
 		if player_id < 0 or player_id >= len(self.players):
 			return []
 		player = self.players[player_id]
-		hand_tiles = player.hand.to_list()
-		candidates = set([t for t in hand_tiles if hand_tiles.count(t) >= 4])
-		return list(candidates)
+		return [TILE_KINDS[i] for i, c in enumerate(player.hand.counts) if c >= 4]
 
 	def apply_ankan(self, player_id: int, tile: str) -> bool:
 		"""
@@ -45,31 +55,51 @@ class Game:
 		if getattr(player, 'is_riichi', False):
 			return False
 		# 暗槓は手牌に4枚必要
-		if player.hand.to_list().count(tile) < 4:
+		if player.hand.count(tile) < 4:
 			return False
 		ok = player.call_kan(tile, is_closed=True)
 		if ok:
+			self._record('kan', player=player_id, tile=tile, closed=True)
 			self.ippatsu_eligible = [False] * self.num_players
 			self.kan_count += 1
 			next_dora_idx = 4 + 2 * self.kan_count
 			if self.dead_wall and next_dora_idx < len(self.dead_wall):
 				self.dora_indicator = self.dead_wall[next_dora_idx]
+				self._record('dora', indicator=self.dora_indicator)
 			# カンをしたプレイヤーに番が移る
 			self.current_turn = player_id
 			# 補充牌を1枚ツモさせる（山があれば）
 			if self.wall:
 				repl = self.wall.pop()
 				player.add_tile(repl)
+				self._record('draw', player=player_id, tile=repl)
 		return ok
 
-	def __init__(self, num_players: int = 4, human_player_id: int = 0):
+	def __init__(
+		self,
+		num_players: int = 4,
+		human_player_id: int = 0,
+		rng: Optional[random.Random] = None,
+		wall_source: Optional[WallSource] = None,
+		recorder: Optional[GameRecorder] = None,
+		analysis: Optional[AnalysisService] = None,
+	):
 		"""
 		Args:
 			num_players: プレイヤー数（デフォルト: 4）
 			human_player_id: 人間プレイヤーのID
+			rng: 牌山のシャッフルと AI の打牌選択に使う乱数生成器
+				（省略時は random モジュールの共有乱数）
+			wall_source: 配牌ごとの牌山の供給元（省略時は rng でシャッフルした牌山）
+			recorder: 対局イベント（牌譜）の記録先（models.game_record、省略時は記録しない）
+			analysis: 手牌解析サービス（省略時はプロセス共有のもの。全プレイヤーの手牌で共有する）
 		"""
 		self.num_players = num_players
 		self.human_player_id = human_player_id
+		self.rng = rng or random
+		self.wall_source: WallSource = wall_source or ShuffledWallSource(rng)
+		self.recorder: Optional[GameRecorder] = recorder
+		self.analysis: AnalysisService = analysis or get_analysis_service()
 		self.players: List[Player] = []
 		self.wall: List[str] = []
 		self.dead_wall: List[str] = []  # 王牌
@@ -89,7 +119,7 @@ class Game:
 			'end_on_negative_points': True,
 			'ignore_dealer_win_for_end': True,
 		}
-		self._agari_checker = AgariChecker()
+		self._agari_checker = self.analysis.agari
 		self._call_checker = CallChecker()
 		self.last_discarded: Optional[str] = None
 		self.phase: str = 'discard'  # discard | call_wait
@@ -104,6 +134,12 @@ class Game:
 		self.ippatsu_eligible: List[bool] = [False] * self.num_players
 		self.riichi_locked_hands: List[Optional[List[str]]] = [None] * self.num_players
 		self.riichi_wait_tiles: List[List[str]] = [[] for _ in range(self.num_players)]
+		# プレイヤーごとの待ち牌・フリテン状態（手牌か副露が変わるまで再利用する）
+		self._wait_states: Dict[int, Dict[str, Any]] = {}
+		# True なら待ち牌・フリテンを毎回総当たり版と照合する（デバッグ用）
+		self.debug_wait_check: bool = os.environ.get(DEBUG_WAIT_CHECK_ENV) == '1'
+		# この対局で発生した流局（牌山切れ）の回数
+		self.ryuukyoku_count: int = 0
 		if 0 <= self.dealer_id < self.num_players:
 			self.dealer_experience[self.dealer_id] = True
 
@@ -173,19 +209,60 @@ class Game:
 		"""終局処理を確定して精算情報を返す。"""
 		self.is_game_over = True
 		self.final_settlement = self._build_final_settlement()
+		self._record('game_end', points=self._build_points_snapshot())
 		return self.final_settlement
 
+	def _record(self, event_type: str, **fields: Any) -> None:
+		"""牌譜イベントを記録先へ渡す（記録先がなければ何もしない）"""
+		if self.recorder is not None:
+			fields['type'] = event_type
+			self.recorder.record(fields)
+
+	def _record_deal(self) -> None:
+		"""配牌直後の状態とドラ表示牌を記録"""
+		if self.recorder is None:
+			return
+		self._record(
+			'deal',
+			round_wind=self.round_wind, dealer=self.dealer_id, honba=self.honba, kyotaku=self.kyotaku_riichi,
+			points=self._build_points_snapshot(), dead_wall=list(self.dead_wall),
+			hands=[p.hand.to_list() for p in self.players],
+		)
+		if self.dora_indicator is not None:
+			self._record('dora', indicator=self.dora_indicator)
+
+	def _record_agari(
+		self,
+		winner_id: int,
+		from_player: Optional[int],
+		win_tile: str,
+		value: Optional[Dict[str, Any]],
+		movements: List[Dict[str, int]],
+	) -> None:
+		"""和了と点数移動を記録（from_player はツモなら None、記録上は -1）"""
+		if self.recorder is None:
+			return
+		value = value or {}
+		cost = value.get('cost') or {}
+		self._record(
+			'agari',
+			player=winner_id, from_player=-1 if from_player is None else from_player, win_tile=win_tile,
+			han=int(value.get('han') or 0), fu=int(value.get('fu') or 0),
+			cost=int(cost.get('total', cost.get('main', 0)) or 0),
+		)
+		self._record('points', movements=movements)
+
 	def _initialize_players(self) -> None:
 		"""プレイヤーを初期化"""
 		for i in range(self.num_players):
 			if i == self.human_player_id:
-				self.players.append(Player(i, is_ai=False))
+				self.players.append(Player(i, is_ai=False, analysis=self.analysis))
 			else:
-				self.players.append(AIPlayer(i))
+				self.players.append(AIPlayer(i, rng=self.rng, analysis=self.analysis))
 
 	def start_game(self) -> None:
 		"""新規対局を開始"""
-		full_wall = build_wall()
+		full_wall = self.wall_source.next_wall()
 		for player in self.players:
 			player.hand.tiles = []
 			player.discards = []
@@ -225,10 +302,11 @@ class Game:
 		# 親に1枚多く与える
 		if self.wall:
 			self.players[self.dealer_id].add_tile(self.wall.pop())
+		self._record_deal()
 
 	def start_debug_tenpai_for_player0(self) -> None:
 		"""デバッグ用: Player0 に聴牌形の固定配牌を与えて局を開始する。"""
-		full_wall = build_wall()
+		full_wall = self.wall_source.next_wall()
 		target_hand = list(self.DEBUG_PLAYER0_TENPAI_HAND)
 
 		for tile in target_hand:
@@ -268,6 +346,7 @@ class Game:
 			for _ in range(13):
 				if self.wall:
 					self.players[pid].add_tile(self.wall.pop())
+		self._record_deal()
 
 	def _effective_meld_tiles_count(self, melds) -> int:
 		"""和了計算上の副露枚数を返す（カンは3枚相当として扱う）。"""
@@ -407,6 +486,7 @@ class Game:
 		movements.append({'from': target_loser, 'to': winner_id, 'amount': total})
 		return movements
 
+	@timed('call_options')
 	def _build_call_options(self, discarder_id: int, discarded_tile: str) -> List[Dict[str, Any]]:
 		"""捨て牌に対する鳴き候補（プレイヤー別）を作成"""
 		raw_options: List[Dict[str, Any]] = []
@@ -415,16 +495,23 @@ class Game:
 		for i in range(1, self.num_players):
 			pid = (discarder_id + i) % self.num_players
 			player = self.players[pid]
-			player_melds = [m["tiles"] if isinstance(m, dict) else m for m in self.players[pid].melds]
+			player_melds = player.melds
 			is_furiten = self.is_furiten(pid)
+			hand_tiles = player.hand.tiles
+			hand_counts = player.hand.counts
 			calls = {
-				'can_pong': self._call_checker.can_pong(player.hand.to_list(), discarded_tile),
-				'can_kan': self._call_checker.can_kan(player.hand.to_list(), discarded_tile),
+				'can_pong': self._call_checker.can_pong(hand_tiles, discarded_tile, hand_counts),
+				'can_kan': self._call_checker.can_kan(hand_tiles, discarded_tile, hand_counts),
 				'can_ron': (not is_furiten) and self._call_checker.can_ron(
-					player.hand.to_list(),
+					hand_tiles,
 					discarded_tile,
 					self._agari_checker,
 					melds=player_melds,
+					hand_counts=hand_counts,
+					check_yaku=True,
+					is_riichi=getattr(player, 'is_riichi', False),
+					player_wind=self.get_player_wind(pid),
+					round_wind=self.round_wind,
 				),
 				'can_chow': False,
 			}
@@ -437,7 +524,7 @@ class Game:
 
 			chow_combos: List[List[str]] = []
 			if pid == next_player and not getattr(player, 'is_riichi', False):
-				calls['can_chow'] = self._call_checker.can_chow(player.hand.to_list(), discarded_tile)
+				calls['can_chow'] = self._call_checker.can_chow(hand_tiles, discarded_tile, hand_counts)
 				if calls['can_chow']:
 					chow_combos = self.find_chow_combinations(pid, discarded_tile)
 
@@ -483,12 +570,15 @@ class Game:
 		"""鳴きなし確定後に次プレイヤーへ進めてツモ。引いた牌を返す。"""
 		self.current_turn = (self.current_turn + 1) % self.num_players
 		if not self.wall:
+			self.ryuukyoku_count += 1
+			self._record('ryuukyoku')
 			self.honba += 1
 			self.start_game()
 			return None
 
 		drawn_tile = self.wall.pop()
 		self.players[self.current_turn].add_tile(drawn_tile)
+		self._record('draw', player=self.current_turn, tile=drawn_tile)
 		return drawn_tile
 
 	def _can_tsumo_with_drawn_tile(self, player_id: int, drawn_tile: str) -> bool:
@@ -501,7 +591,7 @@ class Game:
 			return drawn_tile in self.riichi_wait_tiles[player_id]
 
 		player = self.players[player_id]
-		melds = self._agari_checker.meld_strings_to_objects([m["tiles"] if isinstance(m, dict) else m for m in player.melds])
+		melds = player.melds
 		player_wind = self.get_player_wind(player_id)
 		return self._agari_checker.can_win(
 			hand_tiles=player.hand.to_list(),
@@ -514,16 +604,9 @@ class Game:
 
 	def _compute_wait_tiles_from_hand(self, hand_tiles: List[str], melds) -> List[str]:
 		"""13枚手牌（＋副露）から待ち牌一覧を算出する。"""
-		meld_list = [m["tiles"] if isinstance(m, dict) else m for m in melds]
-		candidates = ['1m','2m','3m','4m','5m','6m','7m','8m','9m',
-					  '1p','2p','3p','4p','5p','6p','7p','8p','9p',
-					  '1s','2s','3s','4s','5s','6s','7s','8s','9s',
-					  'E','S','W','N','P','F','C']
-		winners: List[str] = []
-		for candidate in candidates:
-			if self._agari_checker.is_agari(hand_tiles + [candidate], melds=meld_list):
-				winners.append(candidate)
-		return winners
+		if len(hand_tiles) + 3 * len(melds) != 13:
+			return []
+		return self.analysis.wait_tiles(hand_to_counts(hand_tiles))
 
 	def _auto_discard_after_riichi_if_needed(self, drawn_tile: Optional[str]) -> Dict[str, Any]:
 		"""リーチ者のツモ後、非和了牌なら自動ツモ切りして必要なら鳴き待ちへ遷移。"""
@@ -545,6 +628,7 @@ class Game:
 			else:
 				discard_idx = len(player.hand) - 1
 			discarded_tile = player.discard_tile(discard_idx)
+			self._record('discard', player=pid, tile=discarded_tile)
 			self.ippatsu_eligible[pid] = False
 			self.last_discarded = discarded_tile
 			self.current_discarder_id = pid
@@ -638,12 +722,15 @@ class Game:
 		if declare_riichi:
 			current_player.is_riichi = True
 			self.ippatsu_eligible[discarder_id] = True
-			self._apply_riichi_deposit(discarder_id)
+			self._record('riichi', player=discarder_id)
+			if self._apply_riichi_deposit(discarder_id):
+				self._record('points', movements=[{'from': discarder_id, 'to': -1, 'amount': 1000}])
 		elif current_player.is_riichi:
 			# リーチ後最初の自摸番を消化したら一発権は消える
 			self.ippatsu_eligible[discarder_id] = False
 
 		discarded_tile = current_player.discard_tile(discard_index)
+		self._record('discard', player=discarder_id, tile=discarded_tile)
 		if declare_riichi:
 			self.riichi_locked_hands[discarder_id] = current_player.hand.to_list()
 			self.riichi_wait_tiles[discarder_id] = self._compute_wait_tiles_from_hand(
@@ -680,6 +767,9 @@ class Game:
 		self.last_discarded = None
 		self.current_discarder_id = None
 		auto_result = self._auto_discard_after_riichi_if_needed(drawn)
+		if auto_result.get('agari'):
+			# リーチ者の自動ツモ切りがロンされた
+			return auto_result
 
 		# 暗槓可能な牌リストを返却
 		available_ankan_tiles = []
@@ -779,7 +869,7 @@ class Game:
 		response_data = {}
 
 		if ron_calls:
-			print("[DEBUG] _execute_highest_priority_call: RON called")
+			log_event(logger, logging.DEBUG, 'ron_called', players=sorted(ron_calls))
 			winner_id = int(list(ron_calls.keys())[0])
 			winner = self.players[winner_id]
 			is_winner_riichi = bool(getattr(winner, 'is_riichi', False))
@@ -800,6 +890,7 @@ class Game:
 			kyotaku_movement = self._apply_kyotaku_to_winner(winner_id)
 			if kyotaku_movement is not None:
 				point_movements.append(kyotaku_movement)
+			self._record_agari(winner_id, self.current_discarder_id, self.last_discarded, value, point_movements)
 			winner_was_dealer = (winner_id == self.dealer_id)
 			self._apply_agari_round_progression(winner_id)
 			response_data = {
@@ -838,17 +929,21 @@ class Game:
 			drawn = self._advance_turn_after_no_call()
 			auto_result = self._auto_discard_after_riichi_if_needed(drawn)
 			action_taken = 'pass'
-			response_data = {
-				'ok': True, 'action': 'pass',
-				'awaiting_call': auto_result.get('awaiting_call', False),
-				'available_calls': auto_result.get('available_calls', []),
-				'discarded_tile': auto_result.get('discarded_tile'),
-				'discarder_id': auto_result.get('discarder_id'),
-				'next_draw': auto_result.get('next_draw', drawn),
-				'auto_log': auto_result.get('auto_log', []),
-				'current_turn': self.current_turn, 'is_game_over': self.is_game_over,
-				'wall_count': len(self.wall), 'remaining_draws': max(len(self.wall), 0),
-			}
+			if auto_result.get('agari'):
+				# リーチ者の自動ツモ切りがロンされた
+				response_data = auto_result
+			else:
+				response_data = {
+					'ok': True, 'action': 'pass',
+					'awaiting_call': auto_result.get('awaiting_call', False),
+					'available_calls': auto_result.get('available_calls', []),
+					'discarded_tile': auto_result.get('discarded_tile'),
+					'discarder_id': auto_result.get('discarder_id'),
+					'next_draw': auto_result.get('next_draw', drawn),
+					'auto_log': auto_result.get('auto_log', []),
+					'current_turn': self.current_turn, 'is_game_over': self.is_game_over,
+					'wall_count': len(self.wall), 'remaining_draws': max(len(self.wall), 0),
+				}
 
 		is_awaiting_new_call = bool(response_data.get('awaiting_call', False))
 		if not is_awaiting_new_call:
@@ -878,6 +973,7 @@ class Game:
 			'players': [p.to_dict() for p in self.players],
 		}
 
+	@timed('session_serialize')
 	def to_json_serializable(self) -> Dict[str, Any]:
 		"""JSON化できる辞書形式で返す(Flaskで使用)"""
 		return {
@@ -910,7 +1006,7 @@ class Game:
 					'hand': p.hand.to_list(),
 					'shanten': p.get_shanten(),
 					'discards': p.discards,
-					'melds': p.melds,
+					'melds': serialize_melds(p.melds),
 					'is_ai': p.is_ai,
 					'is_riichi': getattr(p, 'is_riichi', False),
 					'is_menzen': getattr(p, 'is_menzen', len(p.melds) == 0)
@@ -924,6 +1020,48 @@ class Game:
 			'available_ankan_tiles': self.check_available_ankan(self.human_player_id) if self.current_turn == self.human_player_id and self.phase == 'discard' else [],
 		}
 
+	@classmethod
+	@timed('session_deserialize')
+	def from_json_serializable(cls, data: Dict[str, Any], human_player_id: int = 0) -> 'Game':
+		"""to_json_serializable() の辞書からゲーム状態を復元"""
+		players_data = data.get('players', [])
+		game = cls(num_players=len(players_data) or 4, human_player_id=human_player_id)
+		game.current_turn = data.get('current_turn', 0)
+		game.is_game_over = data.get('is_game_over', False)
+		game.wall = data.get('wall', [])
+		game.dora_indicator = data.get('dora_indicator')
+		game.dead_wall = data.get('dead_wall', [])
+		game.ura_dora_indicator = data.get('ura_dora_indicator')
+		game.round_wind = data.get('round_wind', EAST)
+		game.dealer_id = data.get('dealer_id', 0)
+		game.honba = data.get('honba', 0)
+		game.kyotaku_riichi = data.get('kyotaku_riichi', 0)
+		game.kan_count = data.get('kan_count', 0)
+		game.phase = data.get('phase', 'discard')
+		game.last_discarded = data.get('last_discarded')
+		game.pending_calls = data.get('pending_calls', [])
+		game.passed_callers = data.get('passed_callers', [])
+		game.current_discarder_id = data.get('current_discarder_id')
+
+		# プレイヤーの手牌を復元
+		for i, p_data in enumerate(players_data):
+			game.players[i].points = p_data.get('points', game.players[i].points)
+			game.players[i].hand.tiles = p_data.get('hand', [])
+			game.players[i].discards = p_data.get('discards', [])
+			game.players[i].melds = restore_melds(p_data.get('melds', []))
+			game.players[i].is_riichi = p_data.get('is_riichi', False)
+
+		game.received_calls = data.get('received_calls', {})
+		game.ippatsu_eligible = data.get('ippatsu_eligible', [False] * game.num_players)
+		game.riichi_locked_hands = data.get('riichi_locked_hands', [None] * game.num_players)
+		game.riichi_wait_tiles = data.get('riichi_wait_tiles', [[] for _ in range(game.num_players)])
+		game.dealer_experience = data.get('dealer_experience', [False] * game.num_players)
+		if not any(game.dealer_experience) and 0 <= game.dealer_id < game.num_players:
+			game.dealer_experience[game.dealer_id] = True
+		game.end_game_config = data.get('end_game_config', game._get_end_game_config())
+		game.final_settlement = data.get('final_settlement')
+		return game
+
 	def check_agari(self, player_id: int) -> bool:
 		"""
 		指定プレイヤーがアガり形かどうかを判定
@@ -938,9 +1076,12 @@ class Game:
 			return False
 		
 		player = self.players[player_id]
-		melds = self._agari_checker.meld_strings_to_objects(player.melds)
-		if not player.hand.to_list():
+		if not player.hand.tiles:
+			return False
+		# 和了形でなければ役判定（点数計算）まで進まない
+		if not self._agari_checker.is_agari(None, melds=player.melds, hand_counts=player.hand.counts):
 			return False
+		melds = self._agari_checker.meld_strings_to_objects(player.melds)
 		for win_tile in set(player.hand.to_list()):
 			if self._agari_checker.can_win(player.hand.to_list(), win_tile, melds=melds, is_tsumo=True):
 				return True
@@ -992,7 +1133,7 @@ class Game:
 				if idx < len(self.dead_wall):
 					ura_dora = self.dead_wall[idx]
 					dora_indicators.append(self.dead_wall[idx])
-		print(f"[DEBUG] estimate_agari_value: ura_dora={ura_dora} (dead_wall={self.dead_wall})")
+		log_event(logger, logging.DEBUG, 'ura_dora', ura_dora=ura_dora, dead_wall=self.dead_wall)
 		if not dora_indicators:
 			dora_indicators = None
 		effective_is_ippatsu = bool(
@@ -1027,7 +1168,7 @@ class Game:
 				'ura_dora_indicator': str | None
 			}
 		"""
-		print("[DEBUG] check_and_calculate_win called")
+		log_event(logger, logging.DEBUG, 'check_and_calculate_win', player_id=player_id)
 		is_agari = self.check_agari(player_id)
 		player = self.players[player_id]
 		actual_is_riichi = getattr(player, 'is_riichi', False) or is_riichi
@@ -1050,6 +1191,7 @@ class Game:
 			kyotaku_movement = self._apply_kyotaku_to_winner(player_id)
 			if kyotaku_movement is not None:
 				point_movements.append(kyotaku_movement)
+			self._record_agari(player_id, None if is_tsumo else self.current_discarder_id, win_tile, value, point_movements)
 		result = {
 			'agari': is_agari,
 			'player_id': player_id,
@@ -1095,7 +1237,8 @@ class Game:
 			return {'can_pong': False, 'can_chow': False, 'can_ron': False}
 		
 		player = self.players[player_id]
-		hand_tiles = player.hand.to_list()
+		hand_tiles = player.hand.tiles
+		hand_counts = player.hand.counts
 		player_melds = player.melds
 		is_furiten = self.is_furiten(player_id)
 		
@@ -1103,7 +1246,11 @@ class Game:
 		can_chow = False
 		
 		# ロン判定
-		can_ron = (not is_furiten) and self._call_checker.can_ron(hand_tiles, discarded_tile, self._agari_checker, melds=player_melds)
+		can_ron = (not is_furiten) and self._call_checker.can_ron(
+			hand_tiles, discarded_tile, self._agari_checker, melds=player_melds, hand_counts=hand_counts,
+			check_yaku=True, is_riichi=getattr(player, 'is_riichi', False),
+			player_wind=self.get_player_wind(player_id), round_wind=self.round_wind,
+		)
 
 		if getattr(player, 'is_riichi', False):
 			return {
@@ -1113,8 +1260,8 @@ class Game:
 			}
 		
 		return {
-			'can_pong': self._call_checker.can_pong(hand_tiles, discarded_tile),
-			'can_chow': self._call_checker.can_chow(hand_tiles, discarded_tile),
+			'can_pong': self._call_checker.can_pong(hand_tiles, discarded_tile, hand_counts),
+			'can_chow': self._call_checker.can_chow(hand_tiles, discarded_tile, hand_counts),
 			'can_ron': can_ron,
 		}
 
@@ -1142,11 +1289,13 @@ class Game:
 			return False
 		ok = player.call_kan(tile, is_closed=is_closed)
 		if ok:
+			self._record('kan', player=player_id, tile=tile, closed=is_closed)
 			self.ippatsu_eligible = [False] * self.num_players
 			self.kan_count += 1
 			next_dora_idx = 4 + 2 * self.kan_count
 			if self.dead_wall and next_dora_idx < len(self.dead_wall):
 				self.dora_indicator = self.dead_wall[next_dora_idx]
+				self._record('dora', indicator=self.dora_indicator)
 			# 明槓なら捨て牌は場から消費済み（last_discarded をクリア）
 			if not is_closed:
 				self.last_discarded = None
@@ -1156,6 +1305,7 @@ class Game:
 			if self.wall:
 				repl = self.wall.pop()
 				player.add_tile(repl)
+				self._record('draw', player=player_id, tile=repl)
 				# 補充牌は process_discard の auto_log で追記される
 		return ok
 
@@ -1175,7 +1325,7 @@ class Game:
 		
 		player = self.players[player_id]
 		
-		if not self._call_checker.can_pong(player.hand.to_list(), discarded_tile):
+		if not self._call_checker.can_pong(player.hand.tiles, discarded_tile, player.hand.counts):
 			return []
 		
 		# ポンは常に1つの組み合わせのみ
@@ -1196,9 +1346,7 @@ class Game:
 			return []
 		
 		player = self.players[player_id]
-		hand_tiles = player.hand.to_list()
-		
-		possible = CallChecker._find_possible_chows(hand_tiles, discarded_tile)
+		possible = CallChecker._find_possible_chows(player.hand.tiles, discarded_tile, player.hand.counts)
 		return [list(combo) for combo in possible]
 
 	def apply_pong(self, player_id: int, tiles: List[str]) -> bool:
@@ -1219,11 +1367,17 @@ class Game:
 
 		ok = self.players[player_id].call_pong(tiles)
 		if ok:
+			self._record_call(player_id, 'pon', tiles)
 			self.ippatsu_eligible = [False] * self.num_players
 			self.current_turn = player_id
 			self.last_discarded = None
 		return ok
 
+	def _record_call(self, player_id: int, call: str, tiles: List[str]) -> None:
+		"""ポン・チーを記録"""
+		from_player = self.current_discarder_id
+		self._record('call', player=player_id, call=call, tiles=list(tiles), from_player=-1 if from_player is None else from_player)
+
 	def apply_chow(self, player_id: int, tiles: List[str]) -> bool:
 		"""
 		チーを適用
@@ -1244,6 +1398,7 @@ class Game:
 
 		ok = self.players[player_id].call_chow(tiles, discarded_tile=self.last_discarded)
 		if ok:
+			self._record_call(player_id, 'chow', tiles)
 			self.ippatsu_eligible = [False] * self.num_players
 			self.current_turn = player_id
 			self.last_discarded = None
@@ -1269,10 +1424,15 @@ class Game:
 			return {'can_ron': False, 'value': None}
 		
 		can_ron = self._call_checker.can_ron(
-			self.players[player_id].hand.to_list(),
+			self.players[player_id].hand.tiles,
 			discarded_tile,
 			self._agari_checker,
 			melds=self.players[player_id].melds,
+			hand_counts=self.players[player_id].hand.counts,
+			check_yaku=True,
+			is_riichi=getattr(self.players[player_id], 'is_riichi', False),
+			player_wind=self.get_player_wind(player_id),
+			round_wind=self.round_wind,
 		)
 		
 		if not can_ron:
@@ -1296,58 +1456,117 @@ class Game:
 		}
 
 	def is_furiten(self, player_id: int) -> bool:
-		"""同巡フリテンは含めない簡易フリテン判定（捨て牌に待ち牌がある）。"""
+		"""
+		同巡フリテンは含めない簡易フリテン判定（捨て牌に待ち牌がある）。
+
+		待ち牌は手牌・副露が変わるまでキャッシュし、捨て牌は前回以降に増えた分だけ照合する。
+		"""
 		if player_id < 0 or player_id >= len(self.players):
 			return False
 
 		player = self.players[player_id]
-		if not player.discards:
+		discards = player.discards
+		if not discards:
 			return False
 
-		wait_tiles = self.get_agari_tiles(player_id)
-		if not wait_tiles:
+		state = self._get_wait_state(player_id)
+		wait_set = state['wait_set']
+		if not wait_set:
 			return False
 
-		discard_set = set(player.discards)
-		return any(tile in discard_set for tile in wait_tiles)
+		# 捨て牌リストが差し替えられた／短くなった場合は最初から照合し直す
+		if state['discards'] is not discards or state['checked'] > len(discards):
+			state['discards'] = discards
+			state['checked'] = 0
+			state['furiten'] = False
+		if not state['furiten']:
+			state['furiten'] = any(tile in wait_set for tile in discards[state['checked']:])
+		state['checked'] = len(discards)
+
+		if self.debug_wait_check:
+			expected = any(tile in discards for tile in self._get_agari_tiles_brute_force(player_id))
+			if state['furiten'] != expected:
+				raise AssertionError(
+					f"furiten mismatch for player {player_id}: cached={state['furiten']} brute_force={expected}"
+				)
+		return state['furiten']
 
 	def get_agari_tiles(self, player_id: int) -> List[str]:
 		"""指定プレイヤーの待ち牌(アガリ牌)一覧を返す。"""
 		if player_id < 0 or player_id >= len(self.players):
 			return []
+		return list(self._get_wait_state(player_id)['waits'])
 
+	def _get_wait_state(self, player_id: int) -> Dict[str, Any]:
+		"""
+		プレイヤーの待ち牌・フリテン状態を返す。
+
+		キーは (手牌の version, 副露の実質枚数)。どちらかが変わったときだけ待ち牌を計算し直す。
+		"""
 		player = self.players[player_id]
-		hand_tiles = player.hand.to_list()
-		melds = player.melds
+		key = (player.hand.version, self._effective_meld_tiles_count(player.melds))
+		state = self._wait_states.get(player_id)
+		if state is None or state['key'] != key:
+			waits = self._compute_agari_tiles(player_id)
+			state = {
+				'key': key,
+				'waits': waits,
+				'wait_set': frozenset(waits),
+				'discards': None,
+				'checked': 0,
+				'furiten': False,
+			}
+			self._wait_states[player_id] = state
+
+		if self.debug_wait_check:
+			expected = self._get_agari_tiles_brute_force(player_id)
+			if state['waits'] != expected:
+				raise AssertionError(
+					f"wait tiles mismatch for player {player_id}: cached={state['waits']} brute_force={expected}"
+				)
+		return state
+
+	def _compute_agari_tiles(self, player_id: int) -> List[str]:
+		"""待ち牌一覧を手牌の分解から計算する（キャッシュなし）。"""
+		player = self.players[player_id]
+		counts = player.hand.counts
 
 		# 副露分を除いた暗部の期待枚数（14 - 副露枚数）
-		meld_tiles_count = self._effective_meld_tiles_count(melds)
-		expected_concealed = 14 - meld_tiles_count
-
-		all_tiles = ['1m','2m','3m','4m','5m','6m','7m','8m','9m',
-					 '1p','2p','3p','4p','5p','6p','7p','8p','9p',
-					 '1s','2s','3s','4s','5s','6s','7s','8s','9s',
-					 'E','S','W','N','P','F','C']
+		expected_concealed = 14 - self._effective_meld_tiles_count(player.melds)
+		concealed = len(player.hand)
 
 		# 暗部が13枚（1枚待ち）の通常ケース
-		if len(hand_tiles) == expected_concealed - 1:
-			winners: List[str] = []
-			for candidate in all_tiles:
-				trial = hand_tiles + [candidate]
-				if self._agari_checker.is_agari(trial, melds=melds):
-					winners.append(candidate)
-			return winners
+		if concealed == expected_concealed - 1:
+			return self.analysis.wait_tiles(counts)
 
 		# 暗部が14枚のときは、1枚切った後に成立する待ち牌を合算して返す
+		if concealed == expected_concealed:
+			return self.analysis.wait_tiles_after_discards(counts)
+
+		return []
+
+	def _get_agari_tiles_brute_force(self, player_id: int) -> List[str]:
+		"""get_agari_tiles の総当たり版（34種を1枚ずつ足して和了判定する。検証用）。"""
+		if player_id < 0 or player_id >= len(self.players):
+			return []
+
+		player = self.players[player_id]
+		hand_tiles = player.hand.to_list()
+		melds = player.melds
+		expected_concealed = 14 - self._effective_meld_tiles_count(melds)
+
+		def is_wait(tiles: List[str], candidate: str) -> bool:
+			# 手牌で4枚使っている牌種（存在しない5枚目）は待ちにしない
+			return tiles.count(candidate) < 4 and self._agari_checker.is_agari(tiles + [candidate], melds=melds)
+
+		if len(hand_tiles) == expected_concealed - 1:
+			return [c for c in TILE_KINDS if is_wait(hand_tiles, c)]
+
 		if len(hand_tiles) == expected_concealed:
 			winners_set = set()
 			for i in range(len(hand_tiles)):
-				reduced = list(hand_tiles)
-				reduced.pop(i)
-				for candidate in all_tiles:
-					trial = reduced + [candidate]
-					if self._agari_checker.is_agari(trial, melds=melds):
-						winners_set.add(candidate)
-			return [tile for tile in all_tiles if tile in winners_set]
+				reduced = hand_tiles[:i] + hand_tiles[i + 1:]
+				winners_set.update(c for c in TILE_KINDS if is_wait(reduced, c))
+			return [tile for tile in TILE_KINDS if tile in winners_set]
 
 		return []
@@ -0,0 +1,428 @@
+"""
+対局記録（牌譜）のバイナリ形式
+
+Game が発行するイベント（配牌・ツモ・打牌・鳴き・リーチ・カン・ドラ表示・和了・流局・点数移動・終局）を
+コンパクトなバイナリに保存し、AI を動かさずに再生する。
+
+形式:
+	先頭に MAGIC（4バイト）と VERSION（1バイト）
+	以降はイベントの並び。各イベントは「ペイロード長（varint）＋ペイロード」で、
+	ペイロードは「イベント種別（1バイト）＋フィールド」。
+	牌は34種インデックスの1バイト（なしは 0xFF）、整数は varint（符号付きは zigzag）。
+
+イベントは {'type': 'discard', 'player': 1, 'tile': '5m'} のような辞書で扱う。
+フィールドは EVENT_SCHEMAS を参照。1つのストリームに複数の対局を続けて書いてよい（'game_end' で区切る）。
+
+	with open('games.mjr', 'wb') as f:
+		game = Game(recorder=GameRecordWriter(f))
+		...
+	with open('games.mjr', 'rb') as f:
+		state = replay_events(read_events(f))
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.meld import MeldRecord
+from models.tile_utils import NUM_TILE_KINDS, TILE_INDEX, TILE_KINDS
+
+
+MAGIC = b'MJRC'
+VERSION = 1
+
+NO_TILE = 0xFF
+
+# 鳴きの種類（Player.melds の type と同じ表記）
+CALL_KINDS = ('pon', 'chow')
+
+# フィールドの符号化:
+#   u: 非負整数 / i: 符号付き整数 / b: 真偽値 / t: 牌 / c: 鳴きの種類
+#   T: 牌のリスト / H: 牌のリストのリスト / I: 符号付き整数のリスト
+#   M: 点数移動のリスト [{'from', 'to', 'amount'}]（from/to が -1 なら供託）
+EVENT_SCHEMAS: Dict[str, Tuple[int, Tuple[Tuple[str, str], ...]]] = {
+	'deal': (1, (
+		('round_wind', 'u'), ('dealer', 'u'), ('honba', 'u'), ('kyotaku', 'u'),
+		('points', 'I'), ('dead_wall', 'T'), ('hands', 'H'),
+	)),
+	'draw': (2, (('player', 'u'), ('tile', 't'))),
+	'discard': (3, (('player', 'u'), ('tile', 't'))),
+	'riichi': (4, (('player', 'u'),)),
+	'call': (5, (('player', 'u'), ('call', 'c'), ('tiles', 'T'), ('from_player', 'i'))),
+	'kan': (6, (('player', 'u'), ('tile', 't'), ('closed', 'b'))),
+	'dora': (7, (('indicator', 't'),)),
+	'agari': (8, (
+		('player', 'u'), ('from_player', 'i'), ('win_tile', 't'),
+		('han', 'u'), ('fu', 'u'), ('cost', 'u'),
+	)),
+	'ryuukyoku': (9, ()),
+	'points': (10, (('movements', 'M'),)),
+	'game_end': (11, (('points', 'I'),)),
+}
+
+_EVENT_BY_CODE = {code: (name, fields) for name, (code, fields) in EVENT_SCHEMAS.items()}
+
+
+class GameRecorder(ABC):
+	"""Game からイベントを受け取る記録先の基底クラス"""
+
+	@abstractmethod
+	def record(self, event: Dict[str, Any]) -> None:
+		"""イベント1件を記録する"""
+
+
+class ListRecorder(GameRecorder):
+	"""イベントをメモリ上のリストに溜める"""
+
+	def __init__(self):
+		self.events: List[Dict[str, Any]] = []
+
+	def record(self, event: Dict[str, Any]) -> None:
+		self.events.append(event)
+
+	def drain(self) -> List[Dict[str, Any]]:
+		"""溜めたイベントを取り出して空にする"""
+		events, self.events = self.events, []
+		return events
+
+
+class GameRecordWriter(GameRecorder):
+	"""イベントを受け取るたびにバイナリ形式でストリームへ書き込む"""
+
+	def __init__(self, stream: BinaryIO, write_header: bool = True):
+		self.stream = stream
+		if write_header:
+			stream.write(MAGIC + bytes([VERSION]))
+
+	def record(self, event: Dict[str, Any]) -> None:
+		payload = encode_event(event)
+		self.stream.write(_uvarint(len(payload)) + payload)
+
+
+def append_record_file(path: str, events: Iterable[Dict[str, Any]]) -> None:
+	"""記録ファイルの末尾にイベントを追記する（新規ファイルならヘッダも書く）"""
+	with open(path, 'ab') as f:
+		writer = GameRecordWriter(f, write_header=(f.tell() == 0))
+		for event in events:
+			writer.record(event)
+
+
+# ---- 符号化 ----
+
+def _uvarint(value: int) -> bytes:
+	if value < 0:
+		raise ValueError(f"negative value for unsigned varint: {value}")
+	out = bytearray()
+	while value >= 0x80:
+		out.append((value & 0x7F) | 0x80)
+		value >>= 7
+	out.append(value)
+	return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+	return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+	return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _tile_byte(tile: Optional[str]) -> int:
+	if tile is None:
+		return NO_TILE
+	idx = TILE_INDEX.get(tile)
+	if idx is None:
+		raise ValueError(f"unknown tile: {tile!r}")
+	return idx
+
+
+def _encode_field(out: bytearray, kind: str, value: Any) -> None:
+	if kind == 'u':
+		out += _uvarint(int(value))
+	elif kind == 'i':
+		out += _uvarint(_zigzag(int(value)))
+	elif kind == 'b':
+		out.append(1 if value else 0)
+	elif kind == 't':
+		out.append(_tile_byte(value))
+	elif kind == 'c':
+		out.append(CALL_KINDS.index(value))
+	elif kind == 'T':
+		out += _uvarint(len(value))
+		out += bytes(_tile_byte(t) for t in value)
+	elif kind == 'H':
+		out += _uvarint(len(value))
+		for tiles in value:
+			_encode_field(out, 'T', tiles)
+	elif kind == 'I':
+		out += _uvarint(len(value))
+		for v in value:
+			out += _uvarint(_zigzag(int(v)))
+	elif kind == 'M':
+		out += _uvarint(len(value))
+		for m in value:
+			out += _uvarint(_zigzag(int(m['from'])))
+			out += _uvarint(_zigzag(int(m['to'])))
+			out += _uvarint(int(m['amount']))
+	else:
+		raise ValueError(f"unknown field kind: {kind}")
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+	"""イベント辞書をペイロード（長さの前置きなし）に変換"""
+	schema = EVENT_SCHEMAS.get(event.get('type'))
+	if schema is None:
+		raise ValueError(f"unknown event type: {event.get('type')!r}")
+	code, fields = schema
+	out = bytearray([code])
+	for name, kind in fields:
+		_encode_field(out, kind, event[name])
+	return bytes(out)
+
+
+# ---- 復号 ----
+
+class _Cursor:
+	__slots__ = ('data', 'pos')
+
+	def __init__(self, data: bytes):
+		self.data = data
+		self.pos = 0
+
+	def byte(self) -> int:
+		if self.pos >= len(self.data):
+			raise ValueError('truncated event payload')
+		value = self.data[self.pos]
+		self.pos += 1
+		return value
+
+	def uvarint(self) -> int:
+		shift = 0
+		result = 0
+		while True:
+			b = self.byte()
+			result |= (b & 0x7F) << shift
+			if not b & 0x80:
+				return result
+			shift += 7
+
+	def tile(self) -> Optional[str]:
+		idx = self.byte()
+		if idx == NO_TILE:
+			return None
+		if idx >= NUM_TILE_KINDS:
+			raise ValueError(f"invalid tile byte: {idx}")
+		return TILE_KINDS[idx]
+
+	def tiles(self) -> List[Optional[str]]:
+		return [self.tile() for _ in range(self.uvarint())]
+
+
+def _decode_field(cur: _Cursor, kind: str) -> Any:
+	if kind == 'u':
+		return cur.uvarint()
+	if kind == 'i':
+		return _unzigzag(cur.uvarint())
+	if kind == 'b':
+		return bool(cur.byte())
+	if kind == 't':
+		return cur.tile()
+	if kind == 'c':
+		return CALL_KINDS[cur.byte()]
+	if kind == 'T':
+		return cur.tiles()
+	if kind == 'H':
+		return [cur.tiles() for _ in range(cur.uvarint())]
+	if kind == 'I':
+		return [_unzigzag(cur.uvarint()) for _ in range(cur.uvarint())]
+	if kind == 'M':
+		return [
+			{'from': _unzigzag(cur.uvarint()), 'to': _unzigzag(cur.uvarint()), 'amount': cur.uvarint()}
+			for _ in range(cur.uvarint())
+		]
+	raise ValueError(f"unknown field kind: {kind}")
+
+
+def decode_event(payload: bytes) -> Dict[str, Any]:
+	"""ペイロードをイベント辞書に戻す"""
+	cur = _Cursor(payload)
+	code = cur.byte()
+	if code not in _EVENT_BY_CODE:
+		raise ValueError(f"unknown event code: {code}")
+	name, fields = _EVENT_BY_CODE[code]
+	event: Dict[str, Any] = {'type': name}
+	for field, kind in fields:
+		event[field] = _decode_field(cur, kind)
+	if cur.pos != len(payload):
+		raise ValueError(f"trailing bytes in {name} event")
+	return event
+
+
+def _read_uvarint(stream: BinaryIO) -> Optional[int]:
+	"""ストリームから varint を1つ読む（イベント境界で EOF なら None）"""
+	shift = 0
+	result = 0
+	while True:
+		chunk = stream.read(1)
+		if not chunk:
+			if shift == 0:
+				return None
+			raise ValueError('truncated event length')
+		b = chunk[0]
+		result |= (b & 0x7F) << shift
+		if not b & 0x80:
+			return result
+		shift += 7
+
+
+def read_events(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+	"""記録ストリームからイベントを1つずつ読み出す"""
+	header = stream.read(len(MAGIC) + 1)
+	if header[:len(MAGIC)] != MAGIC:
+		raise ValueError('not a game record stream')
+	if header[len(MAGIC):] != bytes([VERSION]):
+		raise ValueError(f"unsupported game record version: {header[len(MAGIC):]!r}")
+	while True:
+		length = _read_uvarint(stream)
+		if length is None:
+			return
+		payload = stream.read(length)
+		if len(payload) != length:
+			raise ValueError('truncated event payload')
+		yield decode_event(payload)
+
+
+def split_games(events: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+	"""イベント列を 'game_end' ごとの対局に分ける（末尾の未終局分もそのまま返す）"""
+	current: List[Dict[str, Any]] = []
+	for event in events:
+		current.append(event)
+		if event['type'] == 'game_end':
+			yield current
+			current = []
+	if current:
+		yield current
+
+
+def read_record_file(path: str) -> List[Dict[str, Any]]:
+	"""記録ファイルのイベントをすべて読み込む"""
+	if not os.path.exists(path):
+		return []
+	with open(path, 'rb') as f:
+		return list(read_events(f))
+
+
+# ---- 再生 ----
+
+class RecordReplayer:
+	"""
+	イベントを順に適用して卓の状態（手牌・捨て牌・副露・点数・ドラ表示牌）を再現する
+
+	AI や和了判定は動かさず、記録された結果だけをなぞる。
+	"""
+
+	def __init__(self, num_players: int = 4):
+		self.num_players = num_players
+		self.hands: List[List[str]] = [[] for _ in range(num_players)]
+		self.discards: List[List[str]] = [[] for _ in range(num_players)]
+		self.melds: List[List[MeldRecord]] = [[] for _ in range(num_players)]
+		self.riichi: List[bool] = [False] * num_players
+		self.points: List[int] = [25000] * num_players
+		self.dora_indicators: List[str] = []
+		self.dead_wall: List[str] = []
+		self.round_wind = 0
+		self.dealer = 0
+		self.honba = 0
+		self.kyotaku = 0
+		self.hands_played = 0
+		self.ryuukyoku = 0
+		self.wins: List[Dict[str, Any]] = []
+		self.last_discard: Optional[str] = None
+		self.is_game_over = False
+
+	def apply(self, event: Dict[str, Any]) -> None:
+		handler = getattr(self, f"_on_{event['type']}", None)
+		if handler is None:
+			raise ValueError(f"unknown event type: {event['type']!r}")
+		handler(event)
+
+	def _on_deal(self, event: Dict[str, Any]) -> None:
+		self.hands = [list(tiles) for tiles in event['hands']]
+		self.discards = [[] for _ in range(self.num_players)]
+		self.melds = [[] for _ in range(self.num_players)]
+		self.riichi = [False] * self.num_players
+		self.points = list(event['points'])
+		self.dead_wall = list(event['dead_wall'])
+		self.dora_indicators = []
+		self.round_wind = event['round_wind']
+		self.dealer = event['dealer']
+		self.honba = event['honba']
+		self.kyotaku = event['kyotaku']
+		self.last_discard = None
+		self.is_game_over = False
+
+	def _on_draw(self, event: Dict[str, Any]) -> None:
+		self.hands[event['player']].append(event['tile'])
+
+	def _on_discard(self, event: Dict[str, Any]) -> None:
+		player = event['player']
+		self.hands[player].remove(event['tile'])
+		self.discards[player].append(event['tile'])
+		self.last_discard = event['tile']
+
+	def _on_riichi(self, event: Dict[str, Any]) -> None:
+		self.riichi[event['player']] = True
+
+	def _on_call(self, event: Dict[str, Any]) -> None:
+		player = event['player']
+		from_hand = list(event['tiles'])
+		from_hand.remove(self.last_discard)
+		for tile in from_hand:
+			self.hands[player].remove(tile)
+		self.melds[player].append(MeldRecord(event['call'], event['tiles'], self.last_discard))
+		self.last_discard = None
+
+	def _on_kan(self, event: Dict[str, Any]) -> None:
+		player, tile = event['player'], event['tile']
+		for _ in range(4 if event['closed'] else 3):
+			self.hands[player].remove(tile)
+		if event['closed']:
+			self.melds[player].append(MeldRecord('ankan', [tile] * 4))
+		else:
+			self.melds[player].append(MeldRecord('minkan', [tile] * 4, tile))
+		if not event['closed']:
+			self.last_discard = None
+
+	def _on_dora(self, event: Dict[str, Any]) -> None:
+		self.dora_indicators.append(event['indicator'])
+
+	def _on_agari(self, event: Dict[str, Any]) -> None:
+		self.wins.append(dict(event))
+		self.hands_played += 1
+
+	def _on_ryuukyoku(self, event: Dict[str, Any]) -> None:
+		self.ryuukyoku += 1
+		self.hands_played += 1
+
+	def _on_points(self, event: Dict[str, Any]) -> None:
+		for m in event['movements']:
+			if m['from'] >= 0:
+				self.points[m['from']] -= m['amount']
+			else:
+				self.kyotaku = 0
+			if m['to'] >= 0:
+				self.points[m['to']] += m['amount']
+			else:
+				self.kyotaku += m['amount'] // 1000
+
+	def _on_game_end(self, event: Dict[str, Any]) -> None:
+		self.points = list(event['points'])
+		self.is_game_over = True
+
+
+def replay_events(events: Iterable[Dict[str, Any]], num_players: int = 4) -> RecordReplayer:
+	"""イベントをすべて適用した RecordReplayer を返す"""
+	replayer = RecordReplayer(num_players)
+	for event in events:
+		replayer.apply(event)
+	return replayer
@@ -1,43 +1,187 @@
 """
 手牌を表すクラス
 """
-from typing import List, Dict, Optional, Any
+from bisect import bisect_right
+from itertools import count
+from typing import List, Dict, Optional, Any, Iterable
 
-from models.tile_utils import sort_hand, format_hand_compact
-from logic.shanten import calculate_shanten
-from logic.agari import AgariChecker
+from models.tile_utils import format_hand_compact, hand_to_counts, tile_to_index
+from logic.analysis import AnalysisService, get_analysis_service
 from mahjong.constants import EAST
 
 
+def _tile_key(tile: str) -> int:
+	"""ソート用のキー（不明な牌は末尾）"""
+	idx = tile_to_index(tile)
+	return 999 if idx is None else idx
+
+
+# 手牌内容の変更ごとに払い出す通し番号（TileList を作り直しても重複しない）
+_version_counter = count(1)
+
+
+class TileList(list):
+	"""
+	34種の枚数配列を常に同期して保持する牌リスト
+
+	list を継承しているため既存コードからは通常のリストとして扱えるが、
+	変更操作のたびに枚数配列とソート済みフラグを O(1)（スライス操作などは O(n)）で更新する。
+	牌の構成が変わるたびに version を更新するので、手牌に依存する計算結果のキャッシュキーに使える。
+	"""
+
+	def __init__(self, tiles: Iterable[str] = ()):
+		super().__init__(tiles)
+		self._resync()
+
+	def _resync(self) -> None:
+		"""枚数配列とソート済みフラグを再計算する"""
+		self.counts: List[int] = hand_to_counts(self)
+		self.version = next(_version_counter)
+		keys = [_tile_key(t) for t in self]
+		self.is_sorted = all(keys[i] <= keys[i + 1] for i in range(len(keys) - 1))
+
+	def _add(self, tile: str) -> None:
+		idx = tile_to_index(tile)
+		if idx is not None:
+			self.counts[idx] += 1
+		self.version = next(_version_counter)
+
+	def _discard(self, tile: str) -> None:
+		idx = tile_to_index(tile)
+		if idx is not None:
+			self.counts[idx] -= 1
+		self.version = next(_version_counter)
+
+	def append(self, tile: str) -> None:
+		if self.is_sorted and self and _tile_key(self[-1]) > _tile_key(tile):
+			self.is_sorted = False
+		super().append(tile)
+		self._add(tile)
+
+	def insert_sorted(self, tile: str) -> None:
+		"""ソート順を保ったまま牌を挿入する（未ソートなら追加後にソート）"""
+		if not self.is_sorted:
+			self.append(tile)
+			self.sort()
+			return
+		super().insert(bisect_right(self, _tile_key(tile), key=_tile_key), tile)
+		self._add(tile)
+
+	def insert(self, index: int, tile: str) -> None:
+		super().insert(index, tile)
+		self._resync()
+
+	def extend(self, tiles: Iterable[str]) -> None:
+		for tile in list(tiles):
+			self.append(tile)
+
+	def __iadd__(self, tiles: Iterable[str]) -> 'TileList':
+		self.extend(tiles)
+		return self
+
+	def pop(self, index: int = -1) -> str:
+		tile = super().pop(index)
+		self._discard(tile)
+		return tile
+
+	def remove(self, tile: str) -> None:
+		super().remove(tile)
+		self._discard(tile)
+
+	def clear(self) -> None:
+		super().clear()
+		self.counts = [0] * 34
+		self.is_sorted = True
+		self.version = next(_version_counter)
+
+	def sort(self, *args, **kwargs) -> None:
+		if not args and not kwargs:
+			if not self.is_sorted:
+				super().sort(key=_tile_key)
+				self.is_sorted = True
+			return
+		super().sort(*args, **kwargs)
+		self._resync()
+
+	def reverse(self) -> None:
+		super().reverse()
+		self._resync()
+
+	def __setitem__(self, index, value) -> None:
+		super().__setitem__(index, value)
+		self._resync()
+
+	def __delitem__(self, index) -> None:
+		super().__delitem__(index)
+		self._resync()
+
+	def __imul__(self, n: int) -> 'TileList':
+		result = super().__imul__(n)
+		self._resync()
+		return result
+
+	def __reduce__(self):
+		# pickle / copy 時に枚数配列を作り直せるよう牌リストから復元する
+		return (self.__class__, (list(self),))
+
+
 class Hand:
 	"""手牌を管理するクラス"""
 
-	def __init__(self, tiles: List[str] = None):
+	def __init__(self, tiles: List[str] = None, analysis: Optional[AnalysisService] = None):
 		"""
 		Args:
 			tiles: 手牌リスト（初期値: 空）
+			analysis: 手牌解析サービス（省略時はプロセス共有のもの）
 		"""
 		self.tiles = tiles if tiles is not None else []
-		self._agari_checker = AgariChecker()
+		self.analysis = analysis or get_analysis_service()
+
+	@property
+	def tiles(self) -> TileList:
+		"""手牌リスト（変更は枚数配列へ自動反映される）"""
+		return self._tiles
+
+	@tiles.setter
+	def tiles(self, tiles: Iterable[str]) -> None:
+		self._tiles = TileList(tiles)
+
+	@property
+	def counts(self) -> List[int]:
+		"""
+		34種の枚数配列（手牌と常に同期）
+
+		内部状態をそのまま返すため、呼び出し側で変更しないこと。
+		"""
+		return self._tiles.counts
+
+	@property
+	def version(self) -> int:
+		"""手牌の構成が変わるたびに変化する番号（キャッシュの無効化判定用）"""
+		return self._tiles.version
 
 	def add_tile(self, tile: str) -> None:
 		"""牌を手に追加"""
-		self.tiles.append(tile)
-		self.sort()
+		self._tiles.insert_sorted(tile)
 
 	def remove_tile(self, index: int) -> str:
 		"""指定インデックスの牌を削除して返す"""
-		if index < 0 or index >= len(self.tiles):
+		if index < 0 or index >= len(self._tiles):
 			raise IndexError(f"Invalid tile index: {index}")
-		return self.tiles.pop(index)
+		return self._tiles.pop(index)
+
+	def count(self, tile: str) -> int:
+		"""指定牌の枚数を返す"""
+		idx = tile_to_index(tile)
+		return 0 if idx is None else self._tiles.counts[idx]
 
 	def sort(self) -> None:
-		"""手牌をソート"""
-		self.tiles = sort_hand(self.tiles)
+		"""手牌をソート（ソート済みなら何もしない）"""
+		self._tiles.sort()
 
 	def get_shanten(self, open_melds_count: int = 0) -> int:
 		"""シャンテン数を取得"""
-		return calculate_shanten(self.tiles, open_melds_count=open_melds_count)
+		return self.analysis.shanten(self.counts, open_melds_count)
 
 	def get_compact_format(self) -> str:
 		"""コンパクト形式で取得"""
@@ -52,7 +196,7 @@ class Hand:
 		"""
 		if len(self.tiles) != 14:
 			return False
-		return self._agari_checker.is_agari(self.tiles)
+		return self.analysis.is_agari(self.tiles, hand_counts=self.counts)
 
 	def estimate_win_value(
 		self,
@@ -89,7 +233,7 @@ class Hand:
 				'yaku': List[str],
 			}
 		"""
-		return self._agari_checker.estimate_hand_value(
+		return self.analysis.estimate_hand_value(
 			self.tiles, win_tile, is_tsumo, is_dealer,
 			melds=melds,
 			player_wind=player_wind, round_wind=round_wind,
@@ -101,7 +245,17 @@ class Hand:
 
 	def copy(self) -> 'Hand':
 		"""手牌をコピー"""
-		return Hand(self.tiles[:])
+		return Hand(self.tiles[:], analysis=self.analysis)
+
+	def __getstate__(self) -> Dict[str, Any]:
+		# 解析サービス（ロックを含む共有キャッシュ）は pickle / deepcopy の対象にしない
+		state = self.__dict__.copy()
+		state.pop('analysis', None)
+		return state
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		self.__dict__.update(state)
+		self.analysis = get_analysis_service()
 
 	def to_list(self) -> List[str]:
 		"""牌リストとして取得"""
@@ -0,0 +1,196 @@
+"""
+副露（鳴き）の正規化済みレコード
+
+Player.call_pong / call_chow / call_kan の時点で1度だけ作り、和了判定・点数計算の
+すべての経路で使い回す。以前は is_agari / estimate_hand_value のたびに
+dict の副露から mahjong.meld.Meld を one_line_string 経由で作り直していた。
+"""
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from mahjong.meld import Meld
+
+from models.tile_ids import TileIdAllocator
+from models.tile_utils import TILE_INDEX
+
+
+# 種類 → mahjong.meld.Meld の種類
+_LIBRARY_MELD_TYPES = {
+	'pon': Meld.PON,
+	'chow': Meld.CHI,
+	'minkan': Meld.KAN,
+	'ankan': Meld.KAN,
+}
+
+# セッション保存形式（"chow:3m,4m,5m@5m"）の区切り
+_SESSION_KIND_SEP = ':'
+_SESSION_TILE_SEP = ','
+_SESSION_CALLED_SEP = '@'
+
+
+def _infer_kind(indices: Sequence[int], is_closed: bool) -> Optional[str]:
+	"""34形式インデックスの並びから副露の種類を判定（成立しなければ None）"""
+	if len(indices) == 4 and all(k == indices[0] for k in indices):
+		return 'ankan' if is_closed else 'minkan'
+	if len(indices) != 3:
+		return None
+	if all(k == indices[0] for k in indices):
+		return 'pon'
+	low, mid, high = sorted(indices)
+	if high < 27 and low // 9 == high // 9 and mid == low + 1 and high == low + 2:
+		return 'chow'
+	return None
+
+
+class MeldRecord(dict):
+	"""
+	変更不可の副露レコード
+
+	dict を継承しているため、従来どおり meld['type'] / meld['tiles'] / meld.get() で参照でき、
+	JSON 化すると {type, tiles}（鳴いた牌が分かれば called も）になる。作成時に以下を計算して属性に保持する。
+
+	- kind: 'pon' / 'chow' / 'minkan' / 'ankan'
+	- index_34: 先頭（チーは最小）の牌の34形式インデックス
+	- tiles_34: 34形式インデックス（昇順）
+	- tiles_136: 136形式ID（同種の牌は 0, 1, 2, ... 枚目を割り当てる）
+	- opened: 明副露か（暗槓のみ False）
+	- meld: 対応する mahjong.meld.Meld
+	- called_tile: 他家の捨て牌から鳴いた牌（暗槓・不明なら None）
+	"""
+
+	__slots__ = ('kind', 'index_34', 'tiles_34', 'tiles_136', 'opened', 'meld', 'called_tile')
+
+	def __init__(self, kind: str, tiles: Iterable[str], called_tile: Optional[str] = None):
+		"""
+		Args:
+			kind: 'pon' / 'chow' / 'minkan' / 'ankan'
+			tiles: 副露の牌（例: ['3s', '4s', '5s']）
+			called_tile: 他家の捨て牌から鳴いた牌（tiles のどれか。暗槓では指定しない）
+
+		Raises:
+			ValueError: 牌が種類どおりの面子になっていない場合、鳴いた牌が副露にない場合
+		"""
+		tiles = tuple(tiles)
+		if any(t not in TILE_INDEX for t in tiles):
+			raise ValueError(f'Invalid meld tiles: {tiles}')
+		indices = tuple(sorted(TILE_INDEX[t] for t in tiles))
+		if kind not in _LIBRARY_MELD_TYPES or _infer_kind(indices, kind == 'ankan') != kind:
+			raise ValueError(f'Invalid {kind} meld: {tiles}')
+		if called_tile is not None and (kind == 'ankan' or called_tile not in tiles):
+			raise ValueError(f'Invalid called tile {called_tile} for {kind} meld: {tiles}')
+
+		allocator = TileIdAllocator()
+		tiles_136 = [allocator.take_index(idx) for idx in indices]
+		opened = kind != 'ankan'
+
+		super().__init__(type=kind, tiles=tiles)
+		if called_tile is not None:
+			dict.__setitem__(self, 'called', called_tile)
+		set_attr = object.__setattr__
+		set_attr(self, 'kind', kind)
+		set_attr(self, 'index_34', indices[0])
+		set_attr(self, 'tiles_34', indices)
+		set_attr(self, 'tiles_136', tuple(tiles_136))
+		set_attr(self, 'opened', opened)
+		set_attr(self, 'meld', Meld(meld_type=_LIBRARY_MELD_TYPES[kind], tiles=tiles_136, opened=opened))
+		set_attr(self, 'called_tile', called_tile)
+
+	@classmethod
+	def from_tiles(
+		cls, tiles: Sequence[str], is_closed: bool = False, called_tile: Optional[str] = None,
+	) -> Optional['MeldRecord']:
+		"""牌だけから種類を判定して作成（面子にならなければ None）"""
+		if any(t not in TILE_INDEX for t in tiles):
+			return None
+		kind = _infer_kind([TILE_INDEX[t] for t in tiles], is_closed)
+		if kind is None or (called_tile is not None and (kind == 'ankan' or called_tile not in tiles)):
+			return None
+		return cls(kind, tiles, called_tile)
+
+	@classmethod
+	def from_session(cls, text: str) -> 'MeldRecord':
+		"""to_session() の文字列から復元（鳴いた牌のない旧形式も読める）"""
+		kind, _, rest = text.partition(_SESSION_KIND_SEP)
+		tiles, _, called_tile = rest.partition(_SESSION_CALLED_SEP)
+		return cls(kind, tiles.split(_SESSION_TILE_SEP), called_tile or None)
+
+	def to_session(self) -> str:
+		"""セッション保存用の短い文字列（例: 'pon:1m,1m,1m@1m'）"""
+		text = self.kind + _SESSION_KIND_SEP + _SESSION_TILE_SEP.join(self['tiles'])
+		if self.called_tile is not None:
+			text += _SESSION_CALLED_SEP + self.called_tile
+		return text
+
+	@property
+	def cache_key(self) -> Tuple:
+		"""点数計算キャッシュのキー（牌の並び順によらない）"""
+		return ('record', self.kind, self.tiles_34)
+
+	def _readonly(self, *args: Any, **kwargs: Any) -> None:
+		raise TypeError('MeldRecord is immutable')
+
+	__setitem__ = __delitem__ = _readonly
+	clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+	def __setattr__(self, name: str, value: Any) -> None:
+		raise AttributeError('MeldRecord is immutable')
+
+	def __reduce__(self):
+		# pickle / copy 時はコンストラクタから作り直す
+		return (self.__class__, (self.kind, self['tiles'], self.called_tile))
+
+	def __copy__(self) -> 'MeldRecord':
+		return self
+
+	def __deepcopy__(self, memo: dict) -> 'MeldRecord':
+		return self
+
+	def __repr__(self) -> str:
+		if self.called_tile is None:
+			return f"MeldRecord({self.kind!r}, {list(self['tiles'])!r})"
+		return f"MeldRecord({self.kind!r}, {list(self['tiles'])!r}, {self.called_tile!r})"
+
+
+def to_meld_record(meld: Any) -> Optional[MeldRecord]:
+	"""
+	副露表現（MeldRecord / dict / 牌リスト）を MeldRecord に変換する
+
+	dict は type が 'ankan' かどうかと called（鳴いた牌）だけを使い、種類は牌から判定する
+	（従来の AgariChecker の Meld 化と同じ扱い）。牌リストは明副露とみなす。
+	面子にならないものは None。
+	"""
+	if isinstance(meld, MeldRecord):
+		return meld
+	if isinstance(meld, dict):
+		return MeldRecord.from_tiles(
+			meld.get('tiles', []), is_closed=meld.get('type') == 'ankan', called_tile=meld.get('called'),
+		)
+	if isinstance(meld, (list, tuple)):
+		return MeldRecord.from_tiles(meld)
+	return None
+
+
+def serialize_melds(melds: Iterable[Any]) -> List[Any]:
+	"""セッション保存用に副露リストを変換（MeldRecord 以外はそのまま）"""
+	return [m.to_session() if isinstance(m, MeldRecord) else m for m in melds]
+
+
+def restore_melds(data: Iterable[Any]) -> List[Any]:
+	"""
+	セッションの副露リストを復元する
+
+	文字列（to_session() 形式）と {type, tiles} の dict は MeldRecord に戻す。
+	面子にならない dict や旧形式の牌リストはそのまま残す。
+	"""
+	melds: List[Any] = []
+	for item in data:
+		if isinstance(item, str):
+			melds.append(MeldRecord.from_session(item))
+			continue
+		if isinstance(item, dict) and not isinstance(item, MeldRecord):
+			try:
+				melds.append(MeldRecord(item.get('type'), item.get('tiles', []), item.get('called')))
+				continue
+			except ValueError:
+				pass
+		melds.append(item)
+	return melds
@@ -2,26 +2,29 @@
 プレイヤーのモデル
 """
 import random
-from typing import List
+from typing import List, Optional
 
 from models.hand import Hand
-from logic.shanten import calculate_shanten
+from models.meld import MeldRecord
+from logic.analysis import AnalysisService
+from models.tile_utils import tile_to_index
 
 
 class Player:
 	"""プレイヤーの基本クラス"""
 
-	def __init__(self, player_id: int, is_ai: bool = False):
+	def __init__(self, player_id: int, is_ai: bool = False, analysis: Optional[AnalysisService] = None):
 		"""
 		Args:
 			player_id: プレイヤーID (0-3)
 			is_ai: AIプレイヤーか
+			analysis: 手牌解析サービス（省略時はプロセス共有のもの）
 		"""
 		self.player_id = player_id
 		self.is_ai = is_ai
-		self.hand = Hand()
+		self.hand = Hand(analysis=analysis)
 		self.discards: List[str] = []
-		# 鳴きのリスト（各鳴きは dict: {type, tiles}）
+		# 鳴きのリスト（各鳴きは MeldRecord: dict として {type, tiles} を持つ）
 		# type: 'pon', 'chow', 'minkan', 'ankan'
 		self.melds: List[dict] = []
 		self.is_riichi: bool = False  # リーチ状態
@@ -80,14 +83,17 @@ class Player:
 		"""
 		if len(tiles) != 3 or not all(t == tiles[0] for t in tiles):
 			return False
+		meld = MeldRecord.from_tiles(tiles, called_tile=tiles[0])
+		if meld is None or self.hand.count(tiles[0]) < 2:
+			return False
 		# 手牌から牌を削除
 		for tile in tiles[:2]:  # 捨てられた牌を除く2枚を削除
-			if tile in self.hand.tiles:
+			if self.hand.count(tile) > 0:
 				self.hand.remove_tile(self.hand.tiles.index(tile))
 			else:
 				return False
 		# メルドに追加
-		self.melds.append({"type": "pon", "tiles": tiles})
+		self.melds.append(meld)
 		self.hand.sort()
 		return True
 
@@ -102,6 +108,10 @@ class Player:
 		"""
 		if len(tiles) != 3:
 			return False
+		# 従来互換動作では tiles[0] を鳴いた牌とみなす（tiles[1:] を手牌から除く）
+		meld = MeldRecord.from_tiles(tiles, called_tile=tiles[0] if discarded_tile is None else discarded_tile)
+		if meld is None or meld.kind != 'chow':
+			return False
 
 		tiles_to_remove = []
 		if discarded_tile is None:
@@ -113,12 +123,12 @@ class Player:
 			tiles_to_remove.remove(discarded_tile)
 
 		for tile in tiles_to_remove:
-			if tile in self.hand.tiles:
+			if self.hand.count(tile) > 0:
 				self.hand.remove_tile(self.hand.tiles.index(tile))
 			else:
 				return False
 
-		self.melds.append({"type": "chow", "tiles": tiles})
+		self.melds.append(meld)
 		self.hand.sort()
 		return True
 
@@ -132,15 +142,15 @@ class Player:
 			成功なら True
 		"""
 		required = 4 if is_closed else 3
-		if self.hand.to_list().count(tile) < required:
+		meld = MeldRecord.from_tiles([tile] * 4, is_closed=is_closed, called_tile=None if is_closed else tile)
+		if meld is None or self.hand.count(tile) < required:
 			return False
 		for _ in range(required):
-			if tile in self.hand.tiles:
+			if self.hand.count(tile) > 0:
 				self.hand.remove_tile(self.hand.tiles.index(tile))
 			else:
 				return False
-		meld_type = "ankan" if is_closed else "minkan"
-		self.melds.append({"type": meld_type, "tiles": [tile]*4})
+		self.melds.append(meld)
 		self.hand.sort()
 		return True
 
@@ -163,8 +173,15 @@ class Player:
 class AIPlayer(Player):
 	"""AI制御のプレイヤー"""
 
-	def __init__(self, player_id: int):
-		super().__init__(player_id, is_ai=True)
+	def __init__(self, player_id: int, rng: Optional[random.Random] = None, analysis: Optional[AnalysisService] = None):
+		"""
+		Args:
+			player_id: プレイヤーID (0-3)
+			rng: 打牌候補の選択に使う乱数生成器（省略時は random モジュールの共有乱数）
+			analysis: 手牌解析サービス（省略時はプロセス共有のもの）
+		"""
+		super().__init__(player_id, is_ai=True, analysis=analysis)
+		self.rng = rng or random
 
 	def choose_discard(self) -> int:
 		"""
@@ -177,15 +194,19 @@ class AIPlayer(Player):
 		if len(self.hand) == 0:
 			return 0
 
-		# 各牌を捨てた場合のシャンテン数を計算
+		# 各牌種を捨てた場合のシャンテン数を一括計算（同じ牌種は1回だけ）
+		open_melds_count = len(self.melds)
+		after_discard = self.hand.analysis.shanten_after_discards(self.hand.counts, open_melds_count)
 		min_shanten = None
 		best_discards = []
 
+		hand_tiles = self.hand.tiles
 		for i in range(len(self.hand)):
-			# 一時的に牌を削除してシャンテン数を計算
-			temp_tiles = self.hand.to_list()
-			removed = temp_tiles.pop(i)
-			s = calculate_shanten(temp_tiles)
+			idx = tile_to_index(hand_tiles[i])
+			if idx is not None:
+				s = after_discard[idx]
+			else:
+				s = self.hand.analysis.shanten(self.hand.counts, open_melds_count)
 
 			if min_shanten is None or s < min_shanten:
 				min_shanten = s
@@ -194,4 +215,18 @@ class AIPlayer(Player):
 				best_discards.append(i)
 
 		# 複数候補がある場合はランダムに選択
-		return random.choice(best_discards)
+		return self.rng.choice(best_discards)
+
+	def should_declare_riichi(self, discard_index: int) -> bool:
+		"""
+		指定の牌を捨てるとテンパイになる門前手ならリーチする
+
+		Args:
+			discard_index: 捨てる予定の牌のインデックス
+		"""
+		if self.is_riichi or not self.is_menzen or self.points < 1000:
+			return False
+		idx = tile_to_index(self.hand.tiles[discard_index])
+		if idx is None:
+			return False
+		return self.hand.analysis.shanten_after_discards(self.hand.counts, len(self.melds))[idx] == 0
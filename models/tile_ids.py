@@ -0,0 +1,104 @@
+"""
+牌文字列 ⇔ 136形式の物理牌ID の変換
+
+mahjong ライブラリへ渡す牌はすべてここで136形式にする。以前は
+'11m2p...' のような one_line_string を組み立てて TilesConverter に解析させていたが、
+34形式のインデックス × 4 + コピー番号 を直接計算する。
+
+同じ牌種の4枚は 0..3 のコピー番号で区別する。TileIdAllocator は1回の変換
+（手牌・副露・ドラ表示牌）の中で使用済みのコピーを記録するので、
+副露の牌とドラ表示牌と手牌が同じ物理牌IDになることはない。
+"""
+from typing import Iterable, List, Optional
+
+from models.tile_utils import NUM_TILE_KINDS, tile_to_index
+
+
+COPIES_PER_KIND = 4
+_ALL_COPIES = (1 << COPIES_PER_KIND) - 1
+
+# 使用済みビット集合 → 最小の未使用コピー番号（すべて使用済みなら None）
+_FIRST_FREE_COPY = tuple(
+	next((c for c in range(COPIES_PER_KIND) if not used >> c & 1), None)
+	for used in range(_ALL_COPIES + 1)
+)
+
+
+def tile_to_id(tile: str, copy: int = 0) -> Optional[int]:
+	"""牌文字列を136形式のIDへ変換（不明な牌は None）"""
+	idx = tile_to_index(tile)
+	if idx is None or not 0 <= copy < COPIES_PER_KIND:
+		return None
+	return idx * COPIES_PER_KIND + copy
+
+
+class TileIdAllocator:
+	"""
+	136形式の物理牌IDの払い出し
+
+	牌種ごとに使用済みコピーをビット集合で持ち、take() は最小の未使用コピーを返す。
+	"""
+
+	__slots__ = ('_used',)
+
+	def __init__(self):
+		self._used: List[int] = [0] * NUM_TILE_KINDS
+
+	def take_index(self, idx: int) -> Optional[int]:
+		"""34形式インデックスの牌を1枚払い出す（4枚とも使用済みなら None）"""
+		used = self._used[idx]
+		copy = _FIRST_FREE_COPY[used]
+		if copy is None:
+			return None
+		self._used[idx] = used | (1 << copy)
+		return idx * COPIES_PER_KIND + copy
+
+	def take(self, tile: str) -> Optional[int]:
+		"""牌文字列の牌を1枚払い出す（不明な牌・4枚とも使用済みなら None）"""
+		idx = tile_to_index(tile)
+		return None if idx is None else self.take_index(idx)
+
+	def take_tiles(self, tiles: Iterable[str]) -> List[int]:
+		"""
+		牌リストをまとめて払い出す（不明な牌は除外）
+
+		Raises:
+			ValueError: 同じ牌種が5枚以上になる場合
+		"""
+		ids: List[int] = []
+		for tile in tiles:
+			idx = tile_to_index(tile)
+			if idx is None:
+				continue
+			tile_id = self.take_index(idx)
+			if tile_id is None:
+				raise ValueError(f'More than {COPIES_PER_KIND} copies of {tile}')
+			ids.append(tile_id)
+		return ids
+
+	def is_free(self, tile_id: int) -> bool:
+		"""指定IDが未使用か"""
+		return not self._used[tile_id // COPIES_PER_KIND] >> (tile_id % COPIES_PER_KIND) & 1
+
+	def claim(self, tile_ids: Iterable[int]) -> bool:
+		"""
+		指定したIDをまとめて使用済みにする
+
+		1つでも使用済み（または重複）があれば何も変更せず False を返す。
+		"""
+		tile_ids = list(tile_ids)
+		if len(set(tile_ids)) != len(tile_ids) or not all(self.is_free(t) for t in tile_ids):
+			return False
+		for tile_id in tile_ids:
+			self._used[tile_id // COPIES_PER_KIND] |= 1 << (tile_id % COPIES_PER_KIND)
+		return True
+
+
+def tiles_to_ids(tiles: Iterable[str]) -> List[int]:
+	"""
+	牌リストを重複のない136形式IDのリストへ変換（不明な牌は除外）
+
+	Raises:
+		ValueError: 同じ牌種が5枚以上になる場合
+	"""
+	return TileIdAllocator().take_tiles(tiles)
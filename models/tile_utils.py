@@ -1,41 +1,41 @@
 """
 牌操作ユーティリティ
+
+内部では牌種を 0..33 の整数（34形式）、物理牌を 0..135 の整数（136形式）で扱う。
+'1m' / 'E' などの文字列表現との変換はこのモジュールに集約する。
 """
 import random
-from typing import List
+from typing import Iterable, List, Optional, Tuple
+
+
+SUITS = ('m', 'p', 's')
+HONOR_TILES = ('E', 'S', 'W', 'N', 'P', 'F', 'C')
 
+# 34種の牌（インデックス順）: 1m..9m, 1p..9p, 1s..9s, E S W N P F C
+TILE_KINDS: Tuple[str, ...] = tuple(
+	[f"{n}{s}" for s in SUITS for n in range(1, 10)] + list(HONOR_TILES)
+)
 
-def build_wall() -> List[str]:
+NUM_TILE_KINDS = 34
+NUM_TILE_IDS = 136
+
+
+def build_wall(rng: Optional[random.Random] = None) -> List[str]:
 	"""
 	標準的な麻雀の壁を生成する（136枚）
+
+	Args:
+		rng: シャッフルに使う乱数生成器（省略時は random モジュールの共有乱数）
 	"""
-	suits = ['m', 'p', 's']
-	tiles = []
-	for s in suits:
-		for n in range(1, 10):
-			tiles.append(f"{n}{s}")
-	honors = ['E', 'S', 'W', 'N', 'P', 'F', 'C']
-	tiles += honors
 	# 34 unique tiles, 4 copies each -> 136
-	wall = []
-	for t in tiles:
-		wall.extend([t] * 4)
-	random.shuffle(wall)
+	wall = [TILE_KINDS[tile_id // 4] for tile_id in range(NUM_TILE_IDS)]
+	(rng or random).shuffle(wall)
 	return wall
 
 
 def get_tile_order() -> dict:
 	"""牌の順序マッピングを返す"""
-	order = {}
-	idx = 0
-	for s in ['m', 'p', 's']:
-		for n in range(1, 10):
-			order[f"{n}{s}"] = idx
-			idx += 1
-	for h in ['E', 'S', 'W', 'N', 'P', 'F', 'C']:
-		order[h] = idx
-		idx += 1
-	return order
+	return {tile: idx for idx, tile in enumerate(TILE_KINDS)}
 
 
 def get_tile_index() -> tuple:
@@ -47,11 +47,51 @@ def get_tile_index() -> tuple:
 
 TILE_INDEX, INDEX_TILE = get_tile_index()
 
+# 字牌の数字表記（'1z'..'7z'）も受け付ける変換表
+_TILE_LOOKUP = dict(TILE_INDEX)
+_TILE_LOOKUP.update({f"{i + 1}z": 27 + i for i in range(len(HONOR_TILES))})
+
+
+def tile_to_index(tile: str) -> Optional[int]:
+	"""牌文字列を34形式のインデックスへ変換（不明な牌は None）"""
+	return _TILE_LOOKUP.get(tile)
+
+
+def index_to_tile(idx: int) -> str:
+	"""34形式のインデックスを牌文字列へ変換"""
+	return TILE_KINDS[idx]
+
+
+def tiles_to_indices(tiles: Iterable[str]) -> List[int]:
+	"""牌文字列のリストを34形式インデックスのリストへ変換（不明な牌は除外）"""
+	lookup = _TILE_LOOKUP
+	return [lookup[t] for t in tiles if t in lookup]
+
+
+def indices_to_tiles(indices: Iterable[int]) -> List[str]:
+	"""34形式インデックスのリストを牌文字列のリストへ変換"""
+	return [TILE_KINDS[i] for i in indices]
+
+
+def tile_id_to_index(tile_id: int) -> int:
+	"""136形式の物理牌IDを34形式のインデックスへ変換"""
+	return tile_id // 4
+
+
+def tile_id_to_tile(tile_id: int) -> str:
+	"""136形式の物理牌IDを牌文字列へ変換"""
+	return TILE_KINDS[tile_id // 4]
+
+
+def is_number_index(idx: int) -> bool:
+	"""数牌（萬子・筒子・索子）のインデックスかどうか"""
+	return 0 <= idx < 27
+
 
 def sort_hand(hand: List[str]) -> List[str]:
 	"""手牌を標準順序でソート"""
-	order = get_tile_order()
-	return sorted(hand, key=lambda t: order.get(t, 999))
+	lookup = _TILE_LOOKUP
+	return sorted(hand, key=lambda t: lookup.get(t, 999))
 
 
 def format_hand_compact(hand: List[str]) -> str:
@@ -67,7 +107,7 @@ def format_hand_compact(hand: List[str]) -> str:
 		else:
 			honors.append(t)
 	parts = []
-	for s in ['m', 'p', 's']:
+	for s in SUITS:
 		if suits[s]:
 			parts.append(''.join(suits[s]) + s)
 	if honors:
@@ -75,11 +115,12 @@ def format_hand_compact(hand: List[str]) -> str:
 	return ' '.join(parts)
 
 
-def hand_to_counts(hand: List[str]) -> List[int]:
+def hand_to_counts(hand: Iterable[str]) -> List[int]:
 	"""手牌をカウント配列に変換（34要素）"""
-	counts = [0] * 34
+	counts = [0] * NUM_TILE_KINDS
+	lookup = _TILE_LOOKUP
 	for t in hand:
-		i = TILE_INDEX.get(t)
+		i = lookup.get(t)
 		if i is not None:
 			counts[i] += 1
 	return counts
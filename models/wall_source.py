@@ -0,0 +1,94 @@
+"""
+牌山の供給元
+
+Game は配牌のたびに WallSource.next_wall() から136枚の牌山を受け取る。
+牌山は末尾から配られ、末尾14枚が王牌になる（Game.start_game を参照）。
+"""
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+import random
+
+from models.tile_utils import NUM_TILE_IDS, TILE_KINDS, build_wall
+
+
+class WallSource(ABC):
+	"""牌山の供給元の基底クラス"""
+
+	@abstractmethod
+	def next_wall(self) -> List[str]:
+		"""次の局で使う136枚の牌山を返す"""
+
+
+class ShuffledWallSource(WallSource):
+	"""乱数でシャッフルした牌山を返す（既定の供給元）"""
+
+	def __init__(self, rng: Optional[random.Random] = None):
+		"""
+		Args:
+			rng: シャッフルに使う乱数生成器（省略時は random モジュールの共有乱数）
+		"""
+		self.rng = rng
+
+	def next_wall(self) -> List[str]:
+		return build_wall(self.rng)
+
+
+class PredefinedWallSource(WallSource):
+	"""
+	あらかじめ与えた牌山を順に返す（テスト・ベンチマーク・障害の再現用）
+
+	用意した牌山を使い切ったら fallback に委ねる。fallback が無ければ IndexError。
+	"""
+
+	def __init__(self, walls: Iterable[Sequence[str]], fallback: Optional[WallSource] = None):
+		self._walls = [validate_wall(wall) for wall in walls]
+		self._position = 0
+		self.fallback = fallback
+
+	@property
+	def remaining(self) -> int:
+		"""まだ返していない牌山の数"""
+		return len(self._walls) - self._position
+
+	def next_wall(self) -> List[str]:
+		if self._position < len(self._walls):
+			wall = self._walls[self._position]
+			self._position += 1
+			return list(wall)
+		if self.fallback is not None:
+			return self.fallback.next_wall()
+		raise IndexError('predefined walls are exhausted')
+
+
+class RecordingWallSource(WallSource):
+	"""
+	別の供給元が返した牌山を記録する
+
+	記録した walls を PredefinedWallSource に渡せば同じ牌山で打ち直せる。
+	"""
+
+	def __init__(self, source: WallSource):
+		self.source = source
+		self.walls: List[List[str]] = []
+
+	def next_wall(self) -> List[str]:
+		wall = self.source.next_wall()
+		self.walls.append(list(wall))
+		return wall
+
+	def replay(self) -> PredefinedWallSource:
+		"""記録した牌山を同じ順序で返す供給元を作る"""
+		return PredefinedWallSource(self.walls)
+
+
+def validate_wall(wall: Sequence[str]) -> List[str]:
+	"""136枚・各牌4枚の牌山であることを確認してリストで返す（不正なら ValueError）"""
+	wall = list(wall)
+	if len(wall) != NUM_TILE_IDS:
+		raise ValueError(f"wall must have {NUM_TILE_IDS} tiles, got {len(wall)}")
+	counts = Counter(wall)
+	invalid = sorted(tile for tile in counts if tile not in TILE_KINDS or counts[tile] != 4)
+	if invalid or len(counts) != len(TILE_KINDS):
+		raise ValueError(f"wall must contain every tile exactly 4 times: {invalid}")
+	return wall
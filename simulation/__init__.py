@@ -0,0 +1 @@
+"""Simulation package"""
@@ -0,0 +1,138 @@
+"""
+複数プロセスでの並列自己対戦
+
+対局番号 0..N-1 を連続した区間（シャード）に分けて ProcessPoolExecutor で実行し、
+各ワーカーの SimulationStats と対局ログを1つのレポートにまとめる。
+各対局のシードは derive_game_seed(master_seed, 対局番号) なので、
+ワーカー数やシャードの切り方によらず結果は run_simulation() と一致し、
+replay_game(master_seed, 対局番号) で任意の対局を再現できる。
+
+	python -m simulation.parallel --games 100000 --seed 42 --workers 16 --log games.jsonl
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from logic.shanten import SHANTEN_BACKENDS, set_shanten_backend
+from simulation.self_play import DEFAULT_MAX_HANDS, SimulationStats, derive_game_seed, play_hanchan
+
+
+# 1ワーカーあたりのシャード数（終わるのが早いワーカーに次の区間を回すため）
+SHARDS_PER_WORKER = 4
+
+
+def _play_shard(
+	master_seed: int,
+	start: int,
+	stop: int,
+	max_hands: int,
+	shanten_backend: Optional[str],
+	collect_logs: bool,
+) -> Tuple[SimulationStats, List[Dict[str, Any]]]:
+	"""ワーカープロセスで対局番号 start..stop-1 を打つ"""
+	if shanten_backend:
+		set_shanten_backend(shanten_backend)
+	stats = SimulationStats()
+	logs: List[Dict[str, Any]] = []
+	for game_index in range(start, stop):
+		seed = derive_game_seed(master_seed, game_index)
+		record = play_hanchan(seed, max_hands=max_hands)
+		stats.add(record)
+		if collect_logs:
+			record['game_index'] = game_index
+			record['seed'] = seed
+			logs.append(record)
+	return stats, logs
+
+
+def split_shards(num_games: int, num_shards: int) -> List[Tuple[int, int]]:
+	"""0..num_games-1 をほぼ同じ長さの連続区間に分割する"""
+	num_shards = max(1, min(num_shards, num_games))
+	base, extra = divmod(num_games, num_shards)
+	shards = []
+	start = 0
+	for i in range(num_shards):
+		stop = start + base + (1 if i < extra else 0)
+		if stop > start:
+			shards.append((start, stop))
+		start = stop
+	return shards
+
+
+def run_parallel(
+	num_games: int,
+	master_seed: int = 0,
+	workers: Optional[int] = None,
+	max_hands: int = DEFAULT_MAX_HANDS,
+	shanten_backend: Optional[str] = None,
+	log_path: Optional[str] = None,
+) -> Dict[str, Any]:
+	"""
+	num_games 回の半荘を複数プロセスで打って集計する
+
+	Args:
+		num_games: 対局数
+		master_seed: 各対局のシードの元になるシード
+		workers: プロセス数（省略時は CPU 数）
+		max_hands: 1半荘の最大局数
+		shanten_backend: ワーカーで使うシャンテン数バックエンド
+		log_path: 指定すると対局記録を対局番号順に JSON Lines で書き出す
+
+	Returns:
+		SimulationStats.summary() に 'workers' と 'master_seed' を加えた辞書
+	"""
+	workers = workers or os.cpu_count() or 1
+	shards = split_shards(num_games, workers * SHARDS_PER_WORKER)
+	collect_logs = log_path is not None
+	stats = SimulationStats()
+	logs: List[Dict[str, Any]] = []
+
+	started = time.perf_counter()
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		futures = [
+			executor.submit(_play_shard, master_seed, start, stop, max_hands, shanten_backend, collect_logs)
+			for start, stop in shards
+		]
+		# シャード順に結合するのでログは対局番号順になる
+		for future in futures:
+			shard_stats, shard_logs = future.result()
+			stats.merge(shard_stats)
+			logs.extend(shard_logs)
+	stats.elapsed = time.perf_counter() - started
+
+	if log_path is not None:
+		with open(log_path, 'w', encoding='utf-8') as f:
+			for record in logs:
+				f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+	summary = stats.summary()
+	summary['workers'] = workers
+	summary['master_seed'] = master_seed
+	return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='AI 同士の自己対戦シミュレーション（並列）')
+	parser.add_argument('--games', type=int, default=1000, help='対局数（半荘）')
+	parser.add_argument('--seed', type=int, default=0, help='マスターシード')
+	parser.add_argument('--workers', type=int, default=None, help='プロセス数（省略時は CPU 数）')
+	parser.add_argument('--max-hands', type=int, default=DEFAULT_MAX_HANDS, help='1半荘の最大局数')
+	parser.add_argument('--shanten-backend', choices=SHANTEN_BACKENDS, default=None, help='シャンテン数計算のバックエンド')
+	parser.add_argument('--log', default=None, help='対局記録の出力先（JSON Lines）')
+	args = parser.parse_args(argv)
+	summary = run_parallel(
+		args.games,
+		master_seed=args.seed,
+		workers=args.workers,
+		max_hands=args.max_hands,
+		shanten_backend=args.shanten_backend,
+		log_path=args.log,
+	)
+	print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,301 @@
+"""
+ヘッドレスの自己対戦シミュレータ
+
+4人の AIPlayer で半荘を最後まで打ち、Game.process_discard / resolve_pending_call を
+直接呼び出して進行する。表示・デバッグ出力は行わず、集計統計だけを返す。
+
+	python -m simulation.self_play --games 1000 --seed 42
+	MAHJONG_METRICS=1 python -m simulation.self_play --games 20 --metrics   # 計測値も出力
+	python -m simulation.self_play --games 100 --seed 1 --record games.mjr  # 牌譜を保存
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from infra.log import configure_logging
+from infra.metrics import cache_gauges, get_metrics_registry, metrics_enabled
+from logic.shanten import SHANTEN_BACKENDS, set_shanten_backend
+from models.game import Game
+from models.game_record import GameRecorder, GameRecordWriter
+from models.player import AIPlayer
+from models.wall_source import WallSource
+
+
+# 人間プレイヤーを置かない（全員 AIPlayer になる）
+NO_HUMAN_PLAYER = -1
+
+# 終局条件を満たさない対局を打ち切る局数（連荘・流局が続いた場合の保険）
+DEFAULT_MAX_HANDS = 32
+
+# 1局あたりの行動回数の上限（進行不能な状態を検出するための保険）
+_MAX_ACTIONS_PER_HAND = 1000
+
+
+def derive_game_seed(master_seed: int, game_index: int) -> int:
+	"""
+	マスターシードと対局番号から対局ごとのシードを決める
+
+	ハッシュで導出するので、隣り合う対局の乱数系列が偏らず、
+	並列実行でも (master_seed, game_index) だけで任意の対局を再現できる。
+	"""
+	digest = hashlib.sha256(f"{master_seed}:{game_index}".encode('ascii')).digest()
+	return int.from_bytes(digest[:8], 'big')
+
+
+def create_headless_game(
+	rng: Optional[random.Random] = None,
+	wall_source: Optional[WallSource] = None,
+	recorder: Optional[GameRecorder] = None,
+) -> Game:
+	"""全員 AI・デバッグ出力なしのゲームを作成して配牌する"""
+	game = Game(num_players=4, human_player_id=NO_HUMAN_PLAYER, rng=rng, wall_source=wall_source, recorder=recorder)
+	game.debug_wait_check = False
+	game.start_game()
+	return game
+
+
+def _record_win(record: Dict[str, Any], result: Dict[str, Any], win_type: str) -> None:
+	value = result.get('value') or {}
+	record['wins'].append({
+		'player_id': result['player_id'],
+		'type': win_type,
+		'han': value.get('han', 0),
+		'fu': value.get('fu', 0),
+		'cost': (value.get('cost') or {}).get('main', 0),
+	})
+
+
+def _resolve_calls(game: Game) -> Dict[str, Any]:
+	"""鳴き待ちを解決する（AI はロン以外の鳴きをしない）"""
+	result: Dict[str, Any] = {}
+	for entry in list(game.pending_calls):
+		if game.phase != 'call_wait':
+			break
+		action = 'ron' if entry['calls'].get('can_ron') else 'pass'
+		result = game.resolve_pending_call(entry['player_id'], action)
+	return result
+
+
+def play_hanchan(
+	seed: Optional[int] = None,
+	max_hands: int = DEFAULT_MAX_HANDS,
+	wall_source: Optional[WallSource] = None,
+	recorder: Optional[GameRecorder] = None,
+) -> Dict[str, Any]:
+	"""
+	半荘を1回打ち、対局記録を返す
+
+	Args:
+		seed: この対局専用の乱数生成器のシード（None なら random モジュールの共有乱数）
+		max_hands: この局数に達したら終局条件を満たさなくても打ち切る
+		wall_source: 牌山の供給元（省略時は seed の乱数でシャッフル）
+		recorder: 牌譜イベントの記録先（models.game_record）
+
+	Returns:
+		{
+			'final_points': [...], 'hands': 局数, 'ryuukyoku': 流局数,
+			'wins': [{'player_id', 'type', 'han', 'fu', 'cost'}, ...],
+			'completed': 終局条件で終わったか, 'actions': 打牌・鳴き解決の回数,
+		}
+	"""
+	game = create_headless_game(random.Random(seed) if seed is not None else None, wall_source, recorder)
+	record: Dict[str, Any] = {'wins': [], 'actions': 0}
+	drawn: Optional[str] = None
+	actions_in_hand = 0
+
+	def hands_played() -> int:
+		return len(record['wins']) + game.ryuukyoku_count
+
+	while not game.is_game_over and hands_played() < max_hands:
+		hands_before = hands_played()
+		if game.phase == 'call_wait':
+			result = _resolve_calls(game)
+			if result.get('agari'):
+				_record_win(record, result, 'ron')
+			drawn = result.get('next_draw')
+		else:
+			pid = game.current_turn
+			player = game.players[pid]
+			if drawn is not None and game.check_agari(pid):
+				result = game.check_and_calculate_win(pid, drawn, is_tsumo=True)
+				if result.get('agari'):
+					_record_win(record, result, 'tsumo')
+					drawn = None
+					actions_in_hand = 0
+					continue
+			if player.is_riichi:
+				result = game.process_discard(len(player.hand) - 1, drew_tile=drawn)
+			else:
+				discard_index = player.choose_discard()
+				declare_riichi = (
+					isinstance(player, AIPlayer)
+					and len(game.wall) >= 4
+					and player.should_declare_riichi(discard_index)
+				)
+				result = game.process_discard(discard_index, declare_riichi=declare_riichi)
+			if result.get('agari'):
+				# AI 同士のロンは打牌処理の中で自動解決される
+				_record_win(record, result, 'ron')
+			drawn = result.get('next_draw')
+		record['actions'] += 1
+
+		if result.get('new_hand_started') or hands_played() != hands_before:
+			drawn = None
+			actions_in_hand = 0
+		else:
+			actions_in_hand += 1
+			if actions_in_hand > _MAX_ACTIONS_PER_HAND:
+				raise RuntimeError('simulation made no progress within one hand')
+
+	if recorder is not None and not game.is_game_over:
+		# 打ち切った対局も牌譜上は終局イベントで区切る
+		recorder.record({'type': 'game_end', 'points': [p.points for p in game.players]})
+	record['final_points'] = [p.points for p in game.players]
+	record['hands'] = hands_played()
+	record['ryuukyoku'] = game.ryuukyoku_count
+	record['completed'] = game.is_game_over
+	return record
+
+
+class SimulationStats:
+	"""対局記録を集計する"""
+
+	def __init__(self, num_players: int = 4):
+		self.num_players = num_players
+		self.games = 0
+		self.completed_games = 0
+		self.hands = 0
+		self.ryuukyoku = 0
+		self.actions = 0
+		self.wins = [0] * num_players
+		self.tsumo = 0
+		self.ron = 0
+		self.total_win_cost = 0
+		self.total_points = [0] * num_players
+		self.rank_counts = [[0] * num_players for _ in range(num_players)]
+		self.elapsed = 0.0
+
+	def add(self, record: Dict[str, Any]) -> None:
+		"""play_hanchan() の対局記録を1件加える"""
+		self.games += 1
+		self.completed_games += 1 if record['completed'] else 0
+		self.hands += record['hands']
+		self.ryuukyoku += record['ryuukyoku']
+		self.actions += record['actions']
+		for win in record['wins']:
+			self.wins[win['player_id']] += 1
+			if win['type'] == 'tsumo':
+				self.tsumo += 1
+			else:
+				self.ron += 1
+			self.total_win_cost += win['cost']
+		points = record['final_points']
+		for pid, p in enumerate(points):
+			self.total_points[pid] += p
+		order = sorted(range(self.num_players), key=lambda pid: (-points[pid], pid))
+		for rank, pid in enumerate(order):
+			self.rank_counts[pid][rank] += 1
+
+	def merge(self, other: 'SimulationStats') -> None:
+		"""別の集計（並列実行の各ワーカー分）を足し合わせる（elapsed は足さない）"""
+		self.games += other.games
+		self.completed_games += other.completed_games
+		self.hands += other.hands
+		self.ryuukyoku += other.ryuukyoku
+		self.actions += other.actions
+		self.tsumo += other.tsumo
+		self.ron += other.ron
+		self.total_win_cost += other.total_win_cost
+		for pid in range(self.num_players):
+			self.wins[pid] += other.wins[pid]
+			self.total_points[pid] += other.total_points[pid]
+			for rank in range(self.num_players):
+				self.rank_counts[pid][rank] += other.rank_counts[pid][rank]
+
+	def summary(self) -> Dict[str, Any]:
+		"""集計結果を辞書で返す"""
+		games = self.games or 1
+		hands = self.hands or 1
+		total_wins = sum(self.wins)
+		return {
+			'games': self.games,
+			'completed_games': self.completed_games,
+			'hands': self.hands,
+			'elapsed_sec': round(self.elapsed, 3),
+			'games_per_sec': round(self.games / self.elapsed, 3) if self.elapsed > 0 else None,
+			'hands_per_game': round(self.hands / games, 3),
+			'agari_rate': round(total_wins / hands, 4),
+			'ryuukyoku_rate': round(self.ryuukyoku / hands, 4),
+			'tsumo_ratio': round(self.tsumo / total_wins, 4) if total_wins else 0.0,
+			'average_win_cost': round(self.total_win_cost / total_wins, 1) if total_wins else 0.0,
+			'win_rate': [round(w / hands, 4) for w in self.wins],
+			'average_score': [round(t / games, 1) for t in self.total_points],
+			'average_rank': [
+				round(sum((rank + 1) * c for rank, c in enumerate(counts)) / games, 3)
+				for counts in self.rank_counts
+			],
+		}
+
+
+def run_simulation(
+	num_games: int,
+	seed: Optional[int] = None,
+	max_hands: int = DEFAULT_MAX_HANDS,
+	recorder: Optional[GameRecorder] = None,
+) -> Dict[str, Any]:
+	"""
+	num_games 回の半荘を順に打って集計する
+
+	seed を指定すると i 局目は derive_game_seed(seed, i) で初期化するので、
+	同じ引数なら結果は再現し、replay_game(seed, i) で1局だけ打ち直せる。
+	recorder を渡すと全対局の牌譜を順に記録する。
+	"""
+	stats = SimulationStats()
+	started = time.perf_counter()
+	for i in range(num_games):
+		game_seed = None if seed is None else derive_game_seed(seed, i)
+		stats.add(play_hanchan(game_seed, max_hands=max_hands, recorder=recorder))
+	stats.elapsed = time.perf_counter() - started
+	return stats.summary()
+
+
+def replay_game(master_seed: int, game_index: int, max_hands: int = DEFAULT_MAX_HANDS) -> Dict[str, Any]:
+	"""run_simulation / run_parallel の game_index 番目の対局を打ち直す"""
+	return play_hanchan(derive_game_seed(master_seed, game_index), max_hands=max_hands)
+
+
+def metrics_summary() -> Dict[str, Any]:
+	"""計測値とキャッシュ統計をまとめた辞書（CLI の --metrics 出力用）"""
+	summary: Dict[str, Any] = {'enabled': metrics_enabled()}
+	summary.update(get_metrics_registry().snapshot())
+	summary['caches'] = cache_gauges()
+	return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='AI 同士の自己対戦シミュレーション')
+	parser.add_argument('--games', type=int, default=100, help='対局数（半荘）')
+	parser.add_argument('--seed', type=int, default=None, help='乱数シード')
+	parser.add_argument('--max-hands', type=int, default=DEFAULT_MAX_HANDS, help='1半荘の最大局数')
+	parser.add_argument('--shanten-backend', choices=SHANTEN_BACKENDS, default=None, help='シャンテン数計算のバックエンド')
+	parser.add_argument('--metrics', action='store_true', help='計測値（MAHJONG_METRICS=1 で有効）とキャッシュ統計も出力')
+	parser.add_argument('--record', default=None, help='牌譜（models.game_record のバイナリ形式）の出力先')
+	args = parser.parse_args(argv)
+	configure_logging()
+	if args.shanten_backend:
+		set_shanten_backend(args.shanten_backend)
+	if args.record:
+		with open(args.record, 'wb') as f:
+			summary = run_simulation(args.games, seed=args.seed, max_hands=args.max_hands, recorder=GameRecordWriter(f))
+	else:
+		summary = run_simulation(args.games, seed=args.seed, max_hands=args.max_hands)
+	if args.metrics:
+		summary['metrics'] = metrics_summary()
+	print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+	main()
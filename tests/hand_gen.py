@@ -0,0 +1,54 @@
+"""和了形をランダムに作るテスト用ヘルパー（点数計算・役判定の突き合わせテストで共用）"""
+from models.meld import MeldRecord
+from models.tile_utils import TILE_KINDS, hand_to_counts
+
+
+def random_winning_hand(
+    rng,
+    run_rate=0.55,
+    flush_rate=0.0,
+    chiitoi_rate=0.0,
+    meld_counts=(0, 0, 0, 1, 1, 2, 3, 4),
+    kan_rate=0.25,
+    kan_kinds=('ankan', 'minkan'),
+):
+    """
+    4面子1雀頭（chiitoi_rate の確率で七対子）を作り、先頭の面子を副露にした (暗部, 副露) を返す
+
+    Args:
+        run_rate: 面子を順子にする確率（残りは刻子）
+        flush_rate: 順子の色を1種類に寄せる（染め手）確率
+        chiitoi_rate: 七対子にする確率
+        meld_counts: 副露数の候補（一様に選ぶ）
+        kan_rate: 副露した刻子を槓子にする確率
+        kan_kinds: 槓子の種類の候補
+    """
+    while True:
+        suit = rng.randrange(3) if flush_rate and rng.random() < flush_rate else None
+        blocks = []
+        for _ in range(4):
+            if rng.random() < run_rate:
+                s = suit if suit is not None and rng.random() < 0.8 else rng.randrange(3)
+                start = s * 9 + rng.randrange(7)
+                blocks.append([TILE_KINDS[start + i] for i in range(3)])
+            else:
+                blocks.append([TILE_KINDS[rng.randrange(34)]] * 3)
+        concealed = [TILE_KINDS[rng.randrange(34)]] * 2
+        if chiitoi_rate and rng.random() < chiitoi_rate:
+            concealed = [TILE_KINDS[k] for k in rng.sample(range(34), 7) for _ in range(2)]
+            blocks = []
+        melds = []
+        num_melds = rng.choice(meld_counts)
+        for i, block in enumerate(blocks):
+            if i >= num_melds:
+                concealed += block
+            elif block[0] != block[1]:
+                melds.append(MeldRecord('chow', block))
+            elif rng.random() < kan_rate:
+                kind = kan_kinds[0] if len(kan_kinds) == 1 else rng.choice(kan_kinds)
+                melds.append(MeldRecord(kind, block + block[:1]))
+            else:
+                melds.append(MeldRecord('pon', block))
+        meld_tiles = [t for m in melds for t in m['tiles']]
+        if max(hand_to_counts(concealed + meld_tiles)) <= 4:
+            return concealed, melds
@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mahjong.agari import Agari
+
+from logic.agari import AgariChecker, count_valid_melds, is_agari_counts
+from models.game import Game
+from models.tile_utils import hand_to_counts
+
+
+def test_is_agari_counts_matches_library_on_random_hands():
+    rng = random.Random(2024)
+    checked = 0
+    while checked < 3000:
+        sets = rng.choice([0, 1, 2, 3, 4, 4])
+        counts = [0] * 34
+        for _ in range(sets):
+            if rng.random() < 0.6:
+                start = rng.randrange(3) * 9 + rng.randrange(7)
+                for i in range(3):
+                    counts[start + i] += 1
+            else:
+                counts[rng.randrange(34)] += 3
+        counts[rng.randrange(34)] += 2
+        if rng.random() < 0.4:
+            held = [i for i, c in enumerate(counts) if c]
+            counts[rng.choice(held)] -= 1
+            counts[rng.randrange(34)] += 1
+        if max(counts) > 4:
+            continue
+        open_melds = 4 - sets
+        assert is_agari_counts(counts, open_melds) == Agari.is_agari(counts), counts
+        checked += 1
+
+
+def test_special_forms():
+    chiitoitsu = hand_to_counts(['1m', '1m', '3m', '3m', '5p', '5p', '7p', '7p', '9s', '9s', 'E', 'E', 'C', 'C'])
+    assert is_agari_counts(chiitoitsu)
+    four_of_a_kind = hand_to_counts(['1m', '1m', '1m', '1m', '5p', '5p', '7p', '7p', '9s', '9s', 'E', 'E', 'C', 'C'])
+    assert not is_agari_counts(four_of_a_kind)
+
+    kokushi = hand_to_counts(['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C', 'C'])
+    assert is_agari_counts(kokushi)
+
+    # 副露数と暗部枚数が合わない場合は和了形ではない
+    assert is_agari_counts(hand_to_counts(['2m', '3m', '4m', '7p', '7p']), open_melds_count=3)
+    assert not is_agari_counts(hand_to_counts(['2m', '3m', '4m', '7p', '7p']), open_melds_count=2)
+
+
+def test_agari_checker_counts_melds_without_meld_objects():
+    checker = AgariChecker()
+    melds = [{'type': 'pon', 'tiles': ['E', 'E', 'E']}, ['1m', '1m', '1m', '1m']]
+    hand = ['2p', '3p', '4p', '6s', '7s', '8s', '9s', '9s']
+    assert count_valid_melds(melds) == 2
+    assert checker.is_agari(hand, melds=melds) is True
+    assert checker.is_agari(None, melds=melds, hand_counts=hand_to_counts(hand)) is True
+
+    # 成立していない副露は数えない（ライブラリの Meld 変換と同じ扱い）
+    assert count_valid_melds([['1m', '3m', '5m'], ['E', 'S', 'W'], ['1m', '2m']]) == 0
+
+
+def test_check_agari_skips_scoring_for_non_winning_hand(monkeypatch):
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    game.players[0].hand.tiles = ['1m', '4m', '7m', '1p', '4p', '7p', '1s', '4s', '7s', 'E', 'S', 'W', 'N', 'P']
+
+    def fail(*args, **kwargs):
+        raise AssertionError('scorer should not be called')
+
+    monkeypatch.setattr(game._agari_checker, 'can_win', fail)
+    assert game.check_agari(0) is False
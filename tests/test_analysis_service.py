@@ -0,0 +1,78 @@
+import copy
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logic.agari
+from benchmarks.corpus import agari_hands
+from logic.analysis import AnalysisService, get_analysis_service
+from logic.shanten import ShantenService
+from models.game import Game
+from models.hand import Hand
+from mahjong.constants import EAST
+
+
+def test_game_players_and_restored_games_share_one_service():
+    service = get_analysis_service()
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    restored = Game.from_json_serializable(game.to_json_serializable())
+
+    for g in (game, restored):
+        assert g.analysis is service
+        assert g._agari_checker is service.agari
+        assert all(p.hand.analysis is service for p in g.players)
+    assert game.players[0].hand.copy().analysis is service
+    assert copy.deepcopy(game.players[1].hand).analysis is service
+
+
+def test_injected_service_is_used_by_every_hand():
+    shanten_service = ShantenService(backend='table')
+    service = AnalysisService(shanten_service=shanten_service)
+    game = Game(num_players=4, human_player_id=-1, analysis=service)
+    game.start_game()
+
+    assert all(p.hand.analysis is service for p in game.players)
+    game.players[1].get_shanten()
+    game.players[1].choose_discard()
+    assert shanten_service.stats()['misses'] >= 1
+    assert Hand(['1m'], analysis=service).copy().analysis is service
+
+
+def test_requests_do_not_build_scorers(monkeypatch):
+    import webapp
+
+    built = []
+    original = logic.agari.HandCalculator
+
+    class CountingCalculator(original):
+        def __init__(self, *args, **kwargs):
+            built.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(logic.agari, 'HandCalculator', CountingCalculator)
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    client.get('/reset')
+    client.get('/')
+    client.post('/discard', data={'player_id': '0', 'discard_index': '0'})
+    assert built == []
+
+
+def test_shared_scorer_is_safe_across_threads():
+    service = get_analysis_service()
+    service.agari.value_cache.clear()
+    hands = agari_hands(40, seed=11)
+    expected = [service.agari._estimate_hand_value_uncached(
+        tiles, win, True, False, None, EAST, EAST, None, False, False, 0,
+    ) for tiles, win in hands]
+
+    def score(item):
+        tiles, win = item
+        return service.estimate_hand_value(tiles, win, is_tsumo=True)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(score, hands * 3))
+    assert results == expected * 3
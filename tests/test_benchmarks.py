@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import agari_hands, random_hands, tenpai_hands
+from benchmarks.run import BENCHMARKS, compare_to_baseline, main, run_benchmarks
+from logic.agari import is_agari_counts
+from logic.waits import wait_tiles
+from models.tile_utils import hand_to_counts
+
+
+def test_corpora_are_deterministic_and_well_formed():
+    assert random_hands(3, 13) == random_hands(3, 13)
+    for tiles, win_tile in agari_hands(20):
+        assert is_agari_counts(hand_to_counts(tiles))
+        assert win_tile in tiles
+    assert all(len(tiles) == 13 for tiles in tenpai_hands(20))
+    # 和了形から1枚抜いた形は（5枚目待ちを除き）必ず待ちがある
+    assert sum(1 for tiles in tenpai_hands(50) if wait_tiles(hand_to_counts(tiles))) >= 45
+
+
+def test_compare_to_baseline_flags_regressions():
+    results = {'a': {'per_op_us': 12.0}, 'b': {'per_op_us': 10.0}, 'new': {'per_op_us': 1.0}}
+    baseline = {'a': {'per_op_us': 10.0}, 'b': {'per_op_us': 10.0}}
+    rows = {row['name']: row for row in compare_to_baseline(results, baseline, threshold=0.1)}
+
+    assert rows['a']['regression'] is True
+    assert rows['b']['regression'] is False
+    assert 'new' not in rows
+
+
+def test_every_case_runs_on_a_tiny_corpus():
+    results = run_benchmarks(repeat=1, size=8)
+    assert set(results) == set(BENCHMARKS)
+    assert all(r['per_op_us'] > 0 for r in results.values())
+
+
+def test_main_writes_results_and_exits_nonzero_on_regression(tmp_path, capsys):
+    output = str(tmp_path / 'results.json')
+    baseline = str(tmp_path / 'baseline.json')
+    args = ['--only', 'agari_is_agari', '--repeat', '1', '--size', '20', '--output', output, '--baseline', baseline]
+
+    assert main(args + ['--update-baseline']) == 0
+    with open(output, encoding='utf-8') as f:
+        assert 'agari_is_agari' in json.load(f)['results']
+
+    # ベースラインを極端に速くしておけば必ず悪化と判定される
+    with open(baseline, encoding='utf-8') as f:
+        payload = json.load(f)
+    payload['results']['agari_is_agari']['per_op_us'] = 1e-6
+    with open(baseline, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    assert main(args) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
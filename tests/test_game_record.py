@@ -0,0 +1,141 @@
+import io
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.game import Game
+from models.game_record import (
+    EVENT_SCHEMAS,
+    GameRecordWriter,
+    ListRecorder,
+    append_record_file,
+    decode_event,
+    encode_event,
+    read_events,
+    read_record_file,
+    replay_events,
+    split_games,
+)
+from simulation.self_play import play_hanchan
+
+
+SAMPLE_EVENTS = [
+    {'type': 'deal', 'round_wind': 27, 'dealer': 1, 'honba': 2, 'kyotaku': 1,
+     'points': [25000, -1200, 300, 900], 'dead_wall': ['1m', 'C'], 'hands': [['1m', '9s'], [], ['E']]},
+    {'type': 'draw', 'player': 3, 'tile': 'C'},
+    {'type': 'discard', 'player': 0, 'tile': '5p'},
+    {'type': 'riichi', 'player': 2},
+    {'type': 'call', 'player': 1, 'call': 'chow', 'tiles': ['3s', '4s', '5s'], 'from_player': 0},
+    {'type': 'kan', 'player': 1, 'tile': 'P', 'closed': True},
+    {'type': 'dora', 'indicator': '9m'},
+    {'type': 'agari', 'player': 2, 'from_player': -1, 'win_tile': '2p', 'han': 13, 'fu': 40, 'cost': 48000},
+    {'type': 'ryuukyoku'},
+    {'type': 'points', 'movements': [{'from': 0, 'to': 2, 'amount': 8000}, {'from': -1, 'to': 2, 'amount': 1000}]},
+    {'type': 'game_end', 'points': [17000, 33000, 25000, 25000]},
+]
+
+
+def test_every_event_type_round_trips():
+    assert {e['type'] for e in SAMPLE_EVENTS} == set(EVENT_SCHEMAS)
+    for event in SAMPLE_EVENTS:
+        assert decode_event(encode_event(event)) == event
+    # 1牌1バイト
+    assert len(encode_event({'type': 'discard', 'player': 0, 'tile': '5p'})) == 3
+
+
+def test_stream_reader_and_writer(tmp_path):
+    buf = io.BytesIO()
+    writer = GameRecordWriter(buf)
+    for event in SAMPLE_EVENTS:
+        writer.record(event)
+    assert list(read_events(io.BytesIO(buf.getvalue()))) == SAMPLE_EVENTS
+
+    with pytest.raises(ValueError):
+        list(read_events(io.BytesIO(buf.getvalue()[:-1])))
+    with pytest.raises(ValueError):
+        list(read_events(io.BytesIO(b'XXXX\x01')))
+
+    path = str(tmp_path / 'games.mjr')
+    append_record_file(path, SAMPLE_EVENTS[:3])
+    append_record_file(path, SAMPLE_EVENTS[3:])
+    assert read_record_file(path) == SAMPLE_EVENTS
+
+
+def _play_with_calls(seed, steps):
+    """鳴きも含めて打ち進め、記録と対局を返す（ロン > ポン/カン > チー を優先して受ける）"""
+    recorder = ListRecorder()
+    game = Game(num_players=4, human_player_id=-1, rng=random.Random(seed), recorder=recorder)
+    game.debug_wait_check = False
+    game.start_game()
+    for _ in range(steps):
+        if game.is_game_over:
+            break
+        if game.phase == 'call_wait':
+            entry = game.pending_calls[0]
+            calls = entry['calls']
+            priority = (('ron', 'can_ron'), ('kan', 'can_kan'), ('pong', 'can_pong'), ('chow', 'can_chow'))
+            action = next((a for a, key in priority if calls.get(key)), 'pass')
+            game.resolve_pending_call(entry['player_id'], action)
+            continue
+        player = game.get_current_player()
+        game.process_discard(player.choose_discard())
+    return game, recorder.events
+
+
+def test_replay_reproduces_table_state_without_ai():
+    seen = set()
+    for seed in range(6):
+        game, events = _play_with_calls(seed, 300)
+        seen.update(e['type'] for e in events)
+        encoded = io.BytesIO()
+        writer = GameRecordWriter(encoded)
+        for event in events:
+            writer.record(event)
+        state = replay_events(read_events(io.BytesIO(encoded.getvalue())))
+
+        assert state.points == [p.points for p in game.players]
+        assert state.kyotaku == game.kyotaku_riichi
+        for pid, player in enumerate(game.players):
+            assert sorted(state.hands[pid]) == sorted(player.hand.to_list())
+            assert state.discards[pid] == player.discards
+            assert state.melds[pid] == player.melds
+    assert {'deal', 'draw', 'discard', 'call', 'dora'} <= seen
+
+
+def test_self_play_archive_splits_into_games():
+    buf = io.BytesIO()
+    writer = GameRecordWriter(buf)
+    records = [play_hanchan(seed=seed, max_hands=6, recorder=writer) for seed in (1, 2)]
+
+    games = list(split_games(read_events(io.BytesIO(buf.getvalue()))))
+    assert len(games) == 2
+    for record, events in zip(records, games):
+        state = replay_events(events)
+        assert state.points == record['final_points']
+        assert [(w['player'], w['han'], w['fu']) for w in state.wins] == [
+            (w['player_id'], w['han'], w['fu']) for w in record['wins']
+        ]
+        assert state.ryuukyoku == record['ryuukyoku']
+
+
+def test_webapp_appends_events_per_session(tmp_path, monkeypatch):
+    import webapp
+
+    monkeypatch.setattr(webapp, 'GAME_RECORD_DIR', str(tmp_path))
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    client.get('/reset')
+    client.post('/debug_tenpai', json={})
+    client.post('/discard', data={'player_id': '0', 'discard_index': '0'})
+
+    with client.session_transaction() as sess:
+        token = sess['game_token']
+    events = read_record_file(str(tmp_path / f'{token}.mjr'))
+    types = [e['type'] for e in events]
+    assert types[:2] == ['deal', 'dora']
+    assert types.count('deal') == 2  # 通常の配牌 → デバッグ配牌
+    assert events[types.index('discard')]['player'] == 0
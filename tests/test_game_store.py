@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from infra.game_store import GameStoreConflict, MemoryGameStore, SQLiteGameStore
+from models.game import Game
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _started_game():
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    return game
+
+
+def test_memory_store_returns_live_game_and_expires():
+    clock = FakeClock()
+    store = MemoryGameStore(ttl_seconds=10, clock=clock)
+    game = _started_game()
+    store.put('t1', game)
+
+    clock.now += 9
+    assert store.get('t1') is game
+    # アクセスで期限が延長される
+    clock.now += 9
+    assert store.get('t1') is game
+    clock.now += 11
+    assert store.get('t1') is None
+    assert len(store) == 0
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryGameStore(max_entries=2)
+    games = [_started_game() for _ in range(3)]
+    store.put('a', games[0])
+    store.put('b', games[1])
+    store.get('a')
+    store.put('c', games[2])
+
+    assert store.get('b') is None
+    assert store.get('a') is games[0]
+    assert store.get('c') is games[2]
+
+
+def test_sqlite_store_round_trips_game_state(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'games.sqlite3')
+    game = _started_game()
+    game.players[1].discards = ['E', '9m']
+    game.honba = 2
+
+    store = SQLiteGameStore(path, ttl_seconds=60, clock=clock)
+    store.put('tok', game)
+    store.close()
+
+    reopened = SQLiteGameStore(path, ttl_seconds=60, clock=clock)
+    restored = reopened.get('tok')
+    assert restored is not None
+    assert restored.to_json_serializable() == game.to_json_serializable()
+
+    clock.now += 61
+    assert reopened.get('tok') is None
+    reopened.close()
+
+
+def test_webapp_session_cookie_holds_only_token():
+    import webapp
+
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    assert client.get('/').status_code == 200
+
+    with client.session_transaction() as sess:
+        assert set(sess.keys()) == {'game_token'}
+        token = sess['game_token']
+    game = webapp.game_store.get(token)
+    assert game is not None
+
+    response = client.post('/discard', data={'player_id': '0', 'discard_index': '0'})
+    assert response.status_code == 200
+    assert webapp.game_store.get(token) is game
+
+    client.get('/reset')
+    assert webapp.game_store.get(token) is None
+
+
+def test_memory_store_revert_discards_unsaved_changes():
+    store = MemoryGameStore()
+    game = _started_game()
+    store.put('tok', game)
+    saved = json.loads(json.dumps(game.to_json_serializable()))
+
+    live = store.get('tok')
+    live.players[0].discards.append('E')
+    live.honba += 1
+    store.revert('tok')
+
+    restored = store.get('tok')
+    assert restored is not live
+    assert restored.to_json_serializable() == saved
+    # put() した変更は revert() しても残る
+    restored.honba = 5
+    store.put('tok', restored)
+    store.revert('tok')
+    assert store.get('tok').honba == 5
+
+
+def test_store_lock_is_shared_per_token():
+    store = MemoryGameStore()
+    lock = store.lock('a')
+    assert store.lock('a') is lock
+    assert store.lock('b') is not lock
+
+
+def test_webapp_failed_request_keeps_stored_game():
+    import webapp
+
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    assert client.get('/').status_code == 200
+    with client.session_transaction() as sess:
+        token = sess['game_token']
+    before = json.loads(json.dumps(webapp.game_store.get(token).to_json_serializable()))
+
+    # 捨て牌を変更してから失敗する打牌
+    def broken_discard(*args, **kwargs):
+        game = webapp.game_store.get(token)
+        game.players[0].discards.append('E')
+        return {'error': 'broken'}
+
+    game = webapp.game_store.get(token)
+    game.process_discard = broken_discard
+    response = client.post('/discard', data={'player_id': '0', 'discard_index': '0'})
+    assert response.status_code == 400
+    assert webapp.game_store.get(token).to_json_serializable() == before
+    assert not webapp.game_store.lock(token).locked()
+
+
+def test_sqlite_store_rejects_stale_put_from_another_process(tmp_path):
+    path = str(tmp_path / 'games.sqlite3')
+    worker_a = SQLiteGameStore(path)
+    worker_b = SQLiteGameStore(path)
+    worker_a.put('tok', _started_game())
+
+    game_a = worker_a.get('tok')
+    game_b = worker_b.get('tok')
+    game_a.honba = 1
+    worker_a.put('tok', game_a)
+    game_b.honba = 2
+    with pytest.raises(GameStoreConflict):
+        worker_b.put('tok', game_b)
+    assert worker_b.get('tok').honba == 1
+
+    # 同じリクエスト内で続けて保存するのは問題ない
+    game_a.honba = 3
+    worker_a.put('tok', game_a)
+    assert worker_b.get('tok').honba == 3
+    worker_a.close()
+    worker_b.close()
+
+
+def test_webapp_metrics_does_not_wait_for_game_lock(monkeypatch):
+    import webapp
+
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    assert client.get('/').status_code == 200
+
+    def fail(token):
+        raise AssertionError('metrics should not take the game lock')
+
+    monkeypatch.setattr(webapp.game_store, 'lock', fail)
+    assert client.get('/metrics').status_code == 200
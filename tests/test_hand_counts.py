@@ -0,0 +1,57 @@
+import copy
+import os
+import pickle
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.hand import Hand
+from models.player import Player
+from models.tile_utils import hand_to_counts
+
+
+def test_counts_follow_add_and_remove():
+    hand = Hand(['5m', '1m', 'E'])
+    assert hand.counts == hand_to_counts(['5m', '1m', 'E'])
+
+    hand.add_tile('3m')
+    assert hand.tiles == ['1m', '3m', '5m', 'E']
+    assert hand.counts == hand_to_counts(hand.tiles)
+
+    removed = hand.remove_tile(0)
+    assert removed == '1m'
+    assert hand.counts == hand_to_counts(hand.tiles)
+
+
+def test_counts_follow_direct_list_mutation_and_assignment():
+    hand = Hand()
+    for tile in ['9s', '1m', '1m']:
+        hand.tiles.append(tile)
+    assert hand.counts == hand_to_counts(['9s', '1m', '1m'])
+
+    hand.sort()
+    assert hand.tiles == ['1m', '1m', '9s']
+
+    hand.tiles = ['2p', '2p', 'C']
+    assert hand.count('2p') == 2
+    assert hand.counts == hand_to_counts(['2p', '2p', 'C'])
+
+    hand.tiles[0] = '3p'
+    assert hand.count('2p') == 1
+    assert hand.count('3p') == 1
+
+
+def test_counts_follow_calls():
+    player = Player(0)
+    player.hand.tiles = ['1m', '1m', '2m', '3m', '4m', '5m', '6m', '7m', '8m', '9m', '1p', '2p', '3p']
+    assert player.call_pong(['1m', '1m', '1m'])
+    assert player.hand.count('1m') == 0
+    assert player.hand.counts == hand_to_counts(player.hand.tiles)
+
+
+def test_tile_list_survives_copy_and_pickle():
+    hand = Hand(['1m', '2m', '3m'])
+    for clone in (copy.deepcopy(hand), pickle.loads(pickle.dumps(hand))):
+        clone.add_tile('4m')
+        assert clone.counts == hand_to_counts(['1m', '2m', '3m', '4m'])
+    assert hand.counts == hand_to_counts(['1m', '2m', '3m'])
@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.agari import AgariChecker, HandValueCache
+
+
+TANYAO_HAND = ['2m', '3m', '4m', '3p', '4p', '5p', '6s', '7s', '8s', '2p', '2p', '5m', '6m', '7m']
+
+
+def test_estimate_hand_value_is_cached_by_conditions():
+    checker = AgariChecker()
+    checker.value_cache.clear()
+
+    first = checker.estimate_hand_value(TANYAO_HAND, '7m', is_tsumo=True)
+    first['yaku'].append('mutated')
+    second = checker.estimate_hand_value(list(reversed(TANYAO_HAND)), '7m', is_tsumo=True)
+
+    assert second['valid'] is True
+    assert 'mutated' not in second['yaku']
+    stats = checker.value_cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+    # 条件（ドラ表示牌）が違えば別エントリ
+    with_dora = checker.estimate_hand_value(TANYAO_HAND, '7m', is_tsumo=True, dora_indicators=['1m'])
+    assert with_dora['han'] > second['han']
+    assert checker.value_cache.stats()['misses'] == 2
+
+    # インスタンス間で共有される
+    AgariChecker().estimate_hand_value(TANYAO_HAND, '7m', is_tsumo=True)
+    assert checker.value_cache.stats()['hits'] == 2
+
+
+def test_hand_value_cache_evicts_least_recently_used():
+    cache = HandValueCache(maxsize=2)
+    cache.put(('a',), {'valid': True, 'yaku': []})
+    cache.put(('b',), {'valid': True, 'yaku': []})
+    assert cache.get(('a',)) is not None
+    cache.put(('c',), {'valid': True, 'yaku': []})
+
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None
+    assert cache.stats()['size'] == 2
+
+
+def test_can_win_skips_scorer_for_closed_tsumo_and_non_agari(monkeypatch):
+    checker = AgariChecker()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('scorer should not be called')
+
+    monkeypatch.setattr(checker, '_estimate_hand_value_uncached', fail)
+    checker.value_cache.clear()
+
+    assert checker.can_win(TANYAO_HAND, '7m', is_tsumo=True) is True
+    assert checker.can_win(['1m', '4m', '7m', '1p', '4p', '7p', '1s', '4s', '7s', 'E', 'S', 'W', 'N', 'P'], 'P', is_tsumo=True) is False
+    # 暗槓だけなら門前扱い
+    ankan = [{'type': 'ankan', 'tiles': ['9s', '9s', '9s', '9s']}]
+    assert checker.can_win(TANYAO_HAND[:11], '2p', melds=ankan, is_tsumo=True) is True
+
+
+def test_can_win_requires_yaku_for_open_hand():
+    checker = AgariChecker()
+    # 役なしの副露手（ロン）
+    melds = [{'type': 'pon', 'tiles': ['1m', '1m', '1m']}]
+    hand = ['2p', '3p', '4p', '6s', '7s', '8s', '9s', '9s', '3m', '4m']
+    assert checker.can_win(hand, '2m', melds=melds, is_tsumo=False) is False
+    # 断么九は付く（喰いタン有り）
+    melds = [{'type': 'pon', 'tiles': ['2m', '2m', '2m']}]
+    hand = ['2p', '3p', '4p', '6s', '7s', '8s', '5s', '5s', '3m', '4m']
+    assert checker.can_win(hand, '5m', melds=melds, is_tsumo=False) is True
@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infra.log import configure_logging, get_logger, log_event, parse_levels, shutdown_logging
+
+
+def _lines(stream):
+    shutdown_logging()  # キューを書き出してから読む
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_module_levels_gate_events_as_json_lines():
+    stream = io.StringIO()
+    configure_logging(level=logging.WARNING, module_levels={'models.game': logging.DEBUG}, stream=stream)
+    try:
+        log_event(get_logger('models.game'), logging.DEBUG, 'ura_dora', ura_dora='5m', dead_wall=['1m'])
+        log_event(get_logger('webapp'), logging.DEBUG, 'riichi_check', can_riichi=True)
+        log_event(get_logger('webapp'), logging.WARNING, 'slow_request', ms=12)
+        events = _lines(stream)
+    finally:
+        configure_logging(stream=io.StringIO())
+
+    assert [e['event'] for e in events] == ['ura_dora', 'slow_request']
+    assert events[0]['logger'] == 'mahjong.models.game'
+    assert events[0]['ura_dora'] == '5m' and events[0]['dead_wall'] == ['1m']
+    assert events[1]['level'] == 'WARNING'
+
+
+def test_disabled_events_are_not_built():
+    class Exploding:
+        def __str__(self):
+            raise AssertionError('should not be formatted')
+
+    stream = io.StringIO()
+    configure_logging(level=logging.WARNING, module_levels={}, stream=stream)
+    log_event(get_logger('webapp'), logging.DEBUG, 'ignored', value=Exploding())
+    assert _lines(stream) == []
+    configure_logging(stream=io.StringIO())
+
+
+def test_debug_events_are_sampled_but_warnings_are_not():
+    stream = io.StringIO()
+    configure_logging(level=logging.DEBUG, module_levels={}, debug_sample_rate=0.25, stream=stream, rng=random.Random(1))
+    logger = get_logger('sampling')
+    for i in range(400):
+        log_event(logger, logging.DEBUG, 'tick', i=i)
+    for i in range(5):
+        log_event(logger, logging.WARNING, 'warn', i=i)
+    events = _lines(stream)
+    configure_logging(stream=io.StringIO())
+
+    ticks = [e for e in events if e['event'] == 'tick']
+    assert 50 < len(ticks) < 150
+    assert len([e for e in events if e['event'] == 'warn']) == 5
+
+
+def test_parse_levels_ignores_bad_items():
+    assert parse_levels('webapp=debug, models.game=INFO,bad,x=NOPE') == {
+        'webapp': logging.DEBUG,
+        'models.game': logging.INFO,
+    }
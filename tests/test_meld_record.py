@@ -0,0 +1,84 @@
+import copy
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.agari import AgariChecker
+from mahjong.meld import Meld
+from models.game import Game
+from models.meld import MeldRecord, restore_melds, serialize_melds, to_meld_record
+from models.player import Player
+
+
+def test_record_precomputes_library_fields():
+    chow = MeldRecord('chow', ['5s', '3s', '4s'])
+    assert chow == {'type': 'chow', 'tiles': ('5s', '3s', '4s')}
+    assert chow.tiles_34 == (20, 21, 22) and chow.index_34 == 20
+    assert chow.tiles_136 == (80, 84, 88)
+    assert chow.meld.type == Meld.CHI and chow.meld.opened
+
+    ankan = MeldRecord('ankan', ['P'] * 4)
+    assert ankan.tiles_136 == (124, 125, 126, 127)
+    assert not ankan.opened and ankan.meld.type == Meld.KAN
+
+    for kind, tiles in (('pon', ['1m', '1m', '2m']), ('chow', ['8p', '9p', '1s']), ('minkan', ['E'] * 3)):
+        with pytest.raises(ValueError):
+            MeldRecord(kind, tiles)
+    assert to_meld_record({'type': 'pon', 'tiles': ['E', 'E', 'E']}).kind == 'pon'
+    assert to_meld_record(['1m', '1m', '1m', '1m']).kind == 'minkan'
+    assert to_meld_record(['1m', '3m', '5m']) is None
+
+
+def test_record_is_immutable_and_copyable():
+    pon = MeldRecord('pon', ['W', 'W', 'W'])
+    with pytest.raises(TypeError):
+        pon['type'] = 'chow'
+    with pytest.raises(TypeError):
+        pon.update(tiles=[])
+    with pytest.raises(AttributeError):
+        pon.opened = False
+    assert copy.deepcopy(pon) is pon
+    restored = pickle.loads(pickle.dumps(pon))
+    assert restored == pon and restored.tiles_136 == pon.tiles_136
+    assert json.loads(json.dumps(pon)) == {'type': 'pon', 'tiles': ['W', 'W', 'W']}
+
+
+def test_calls_store_records_reused_by_scoring(monkeypatch):
+    player = Player(0)
+    player.hand.tiles = ['2m', '2m', '3p', '4p', '6s', '6s', '6s', '7s', '7s', '7s', '4m', '4m', '4m', '4m']
+    assert player.call_pong(['2m', '2m', '2m'])
+    assert player.call_chow(['2p', '3p', '4p'], discarded_tile='2p')
+    assert player.call_kan('4m', is_closed=True)
+    assert [type(m) for m in player.melds] == [MeldRecord] * 3
+    assert not player.call_chow(['6s', '7s', '9s'], discarded_tile='9s')
+
+    def fail(*args, **kwargs):
+        raise AssertionError('meld rebuilt')
+
+    monkeypatch.setattr(AgariChecker, '_build_meld_object', fail)
+    checker = AgariChecker()
+    hand = player.hand.to_list()
+    assert checker.is_agari(hand, melds=player.melds) is False
+    result = checker.estimate_hand_value(['6s', '6s', '6s', '7s'], '7s', is_tsumo=False, melds=player.melds)
+    assert result['valid'] and '断么九' in result['yaku']
+
+
+def test_session_stores_compact_melds():
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    game.players[1].melds = [MeldRecord('ankan', ['C'] * 4), MeldRecord('chow', ['1p', '2p', '3p'])]
+    game.players[2].melds = [{'type': 'pon', 'tiles': ['N', 'N', 'N']}, ['1m', '1m', '1m', '1m']]
+
+    data = json.loads(json.dumps(game.to_json_serializable()))
+    assert data['players'][1]['melds'] == ['ankan:C,C,C,C', 'chow:1p,2p,3p']
+    restored = Game.from_json_serializable(data)
+    assert restored.players[1].melds == game.players[1].melds
+    assert restored.players[1].is_menzen is False
+    assert isinstance(restored.players[2].melds[0], MeldRecord)
+    assert restored.players[2].melds[1] == ['1m', '1m', '1m', '1m']
+    assert restore_melds(serialize_melds(game.players[1].melds)) == game.players[1].melds
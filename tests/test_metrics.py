@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infra.metrics import MetricsRegistry, render_prometheus, timed
+from webapp import app
+
+
+def test_disabled_timer_returns_the_original_function():
+    def func(x):
+        return x + 1
+
+    assert timed('noop', enabled=False)(func) is func
+
+
+def test_enabled_timer_records_counts_and_quantiles():
+    registry = MetricsRegistry()
+
+    @timed('double', registry=registry, enabled=True)
+    def double(x):
+        return x * 2
+
+    assert [double(i) for i in range(10)] == [i * 2 for i in range(10)]
+    stats = registry.snapshot()['timers']['double']
+    assert stats['count'] == 10
+    assert 0 <= stats['p50_us'] <= stats['p90_us'] <= stats['p99_us'] <= stats['max_us']
+
+
+def test_prometheus_output_contains_summary_and_gauges():
+    registry = MetricsRegistry()
+    registry.observe('shanten', 0.001)
+    registry.observe('shanten', 0.003)
+    text = render_prometheus(registry, gauges={'mahjong_cache_hits': {'shanten': 5}})
+
+    assert '# TYPE mahjong_call_duration_seconds summary' in text
+    assert 'mahjong_call_duration_seconds_count{name="shanten"} 2' in text
+    assert 'mahjong_call_duration_seconds{name="shanten",quantile="0.99"} 0.003000000' in text
+    assert 'mahjong_cache_hits{name="shanten"} 5' in text
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    app.config['TESTING'] = True
+    client = app.test_client()
+    client.get('/reset')
+
+    res = client.get('/metrics')
+    assert res.status_code == 200
+    assert res.mimetype == 'text/plain'
+    body = res.get_data(as_text=True)
+    assert 'mahjong_metrics_enabled' in body
+    assert 'mahjong_cache_size{name="shanten"}' in body
@@ -0,0 +1,50 @@
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.game import Game
+from simulation.parallel import run_parallel, split_shards
+from simulation.self_play import replay_game, run_simulation
+
+
+def _strip_timing(summary):
+    return {k: v for k, v in summary.items() if k not in ('elapsed_sec', 'games_per_sec', 'workers', 'master_seed')}
+
+
+def test_game_rng_makes_deals_reproducible():
+    state = random.getstate()
+    first = Game(num_players=4, human_player_id=-1, rng=random.Random(99))
+    second = Game(num_players=4, human_player_id=-1, rng=random.Random(99))
+    first.start_game()
+    second.start_game()
+
+    assert first.wall == second.wall
+    assert [p.hand.to_list() for p in first.players] == [p.hand.to_list() for p in second.players]
+    assert [p.choose_discard() for p in first.players] == [p.choose_discard() for p in second.players]
+    # 共有乱数は消費しない
+    assert random.getstate() == state
+
+
+def test_split_shards_covers_all_games():
+    assert split_shards(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_shards(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_parallel_run_matches_serial_and_logs_replayable_games(tmp_path):
+    log_path = str(tmp_path / 'games.jsonl')
+    parallel = run_parallel(4, master_seed=5, workers=2, log_path=log_path)
+    serial = run_simulation(4, seed=5)
+
+    assert parallel['workers'] == 2
+    assert _strip_timing(parallel) == _strip_timing(serial)
+
+    with open(log_path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [r['game_index'] for r in records] == [0, 1, 2, 3]
+
+    replayed = replay_game(5, 2)
+    assert replayed['final_points'] == records[2]['final_points']
+    assert replayed['wins'] == records[2]['wins']
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.game import Game
+
+
+def _game_with_riichi_auto_discard_into_ron(discard_tile):
+    """
+    Player 0(AI) が discard_tile を捨て、リーチ中の Player 1(AI) が 8p をツモ切りし、
+    リーチ中の Player 3(AI) がそれをロンできる局面（人間は Player 2）
+    """
+    game = Game(num_players=4, human_player_id=2)
+    game.start_game()
+    game.current_turn = 0
+    game.phase = 'discard'
+    game.players[0].hand.tiles = [discard_tile, '1s', '1s', '1s', '2s', '2s', '2s', '3s', '3s', '3s', 'E', 'E', 'E', 'S']
+    # 5s 単騎待ち（8p は和了牌ではないので自動ツモ切りされる）
+    game.players[1].hand.tiles = ['1m', '2m', '3m', '4m', '5m', '6m', '7m', '8m', '9m', '2p', '3p', '4p', '5s']
+    game.players[2].hand.tiles = ['7s', '7s', '1m', '1m', '9m', '9m', '1p', '1p', '9p', '9p', 'W', 'W', 'P']
+    # 5p/8p 待ち
+    game.players[3].hand.tiles = ['2s', '3s', '4s', '6m', '7m', '8m', '3p', '4p', '5p', '6p', '7p', '9s', '9s']
+    for pid in (1, 3):
+        game.players[pid].is_riichi = True
+        game.riichi_wait_tiles[pid] = game._compute_wait_tiles_from_hand(game.players[pid].hand.to_list(), [])
+    game.wall[-1] = '8p'
+    return game
+
+
+def test_process_discard_returns_ron_on_riichi_auto_discard():
+    game = _game_with_riichi_auto_discard_into_ron('N')
+
+    result = game.process_discard(0)
+    assert result.get('agari')
+    assert (result['player_id'], result['win_tile']) == (3, '8p')
+    assert result['point_movements'][0]['from'] == 1
+
+
+def test_pass_returns_ron_on_riichi_auto_discard():
+    game = _game_with_riichi_auto_discard_into_ron('7s')
+
+    result = game.process_discard(0)
+    assert result['awaiting_call']
+    assert [entry['player_id'] for entry in result['available_calls']] == [2]
+
+    result = game.resolve_pending_call(player_id=2, action='pass')
+    assert result.get('agari')
+    assert (result['player_id'], result['win_tile']) == (3, '8p')
+    assert result['point_movements'][0]['from'] == 1
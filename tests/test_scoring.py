@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mahjong.constants import EAST, NORTH, SOUTH, WEST
+
+from hand_gen import random_winning_hand
+from logic import agari
+from logic.agari import AgariChecker
+from logic.scoring import score_hand
+from models.meld import MeldRecord
+from models.tile_utils import TILE_KINDS, hand_to_counts, tile_to_index
+
+
+def test_native_scores_match_library(monkeypatch):
+    checker = AgariChecker()
+    rng = random.Random(11)
+    native_count = 0
+    for _ in range(1500):
+        concealed, melds = random_winning_hand(rng, flush_rate=0.3, chiitoi_rate=0.05)
+        win = rng.choice(concealed)
+        is_tsumo = rng.random() < 0.4
+        is_riichi = all(not m.opened for m in melds) and rng.random() < 0.4
+        player_wind = rng.choice([EAST, SOUTH, WEST, NORTH])
+        dora = [TILE_KINDS[rng.randrange(34)] for _ in range(rng.choice([0, 1, 2, 5]))]
+        hand = list(concealed)
+        if not is_tsumo:
+            hand.remove(win)
+        args = (
+            hand, win, is_tsumo, player_wind == EAST, melds, player_wind, rng.choice([EAST, SOUTH]),
+            dora, is_riichi, rng.random() < 0.2, rng.choice([0, 1, 3]),
+        )
+        native = score_hand(hand_to_counts(concealed), tile_to_index(win), melds, is_tsumo=is_tsumo)
+        native_count += native is not None
+
+        with monkeypatch.context() as m:
+            m.setattr(agari, 'score_hand', lambda *a, **k: None)
+            expected = checker._estimate_hand_value_uncached(*args)
+        assert checker._estimate_hand_value_uncached(*args) == expected, args
+    # ライブラリに任せるのは役満の可能性がある手だけ
+    assert native_count > 1400
+
+
+def test_native_score_examples():
+    def score(tiles, win, melds=None, **kwargs):
+        return score_hand(hand_to_counts(tiles), tile_to_index(win), melds, **kwargs)
+
+    # 門前ツモ平和は20符、ロンは30符
+    pinfu = ['2m', '3m', '4m', '4p', '5p', '6p', '6s', '7s', '8s', '2s', '3s', '4s', '9p', '9p']
+    result = score(pinfu, '4s', is_tsumo=True)
+    assert (result['han'], result['fu'], result['yaku']) == (2, 20, ['Menzen Tsumo', 'Pinfu'])
+    assert result['cost']['main'] == 700 and result['cost']['additional'] == 400
+    assert score(pinfu, '4s')['fu'] == 30
+    # 喰い平和形は30符、副露の一気通貫は1翻
+    ittsu = [MeldRecord('chow', ['1m', '2m', '3m'])]
+    result = score(['4m', '5m', '6m', '7m', '8m', '9m', '3p', '4p', '5p', '9s', '9s'], '9m', ittsu)
+    assert (result['han'], result['fu'], result['yaku']) == (1, 30, ['Ittsu'])
+    # 役なし
+    result = score(['4m', '5m', '6m', '7m', '8m', '9m', '3p', '4p', '5p', '9s', '9s'], '9m', [MeldRecord('chow', ['1p', '2p', '3p'])])
+    assert result['error'] == 'no_yaku'
+    # 数え役満: 清一色・立直・一発・ツモ・平和・一盃口＋ドラ
+    result = score(
+        ['1p', '2p', '3p', '1p', '2p', '3p', '4p', '5p', '6p', '7p', '8p', '9p', '5p', '5p'], '9p',
+        is_tsumo=True, is_riichi=True, is_ippatsu=True, dora_indicators=[tile_to_index('4p')] * 2,
+    )
+    assert result['han'] >= 13 and result['cost']['yaku_level'] == 'yakuman'
+    # 役満の可能性がある手はライブラリに任せる
+    kokushi = ['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C', 'C']
+    assert score(kokushi, 'C') is None
+    suuankou = ['1m', '1m', '1m', '4p', '4p', '4p', '7s', '7s', '7s', '2m', '2m', '2m', '5s', '5s']
+    assert score(suuankou, '5s', is_tsumo=True) is None
+
+
+def test_checker_falls_back_to_library_for_yakuman():
+    checker = AgariChecker()
+    result = checker._estimate_hand_value_uncached(
+        ['P', 'P', 'P', 'F', 'F', 'F', 'C', 'C', 'C', '2m', '3m', '4m', '9s'], '9s',
+        False, False, None, EAST, EAST, None, False, False, 0,
+    )
+    assert result['valid'] and '大三元' in result['yaku']
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.player import AIPlayer
+from simulation.self_play import SimulationStats, play_hanchan, run_simulation
+
+
+def test_play_hanchan_is_silent_and_conserves_points(capsys):
+    record = play_hanchan(seed=11)
+
+    assert capsys.readouterr().out == ''
+    assert record['hands'] == len(record['wins']) + record['ryuukyoku']
+    assert record['hands'] > 0
+    # 供託が残っていれば、その分だけ合計が減る
+    total = sum(record['final_points'])
+    assert total <= 100000 and (100000 - total) % 1000 == 0
+
+
+def test_run_simulation_is_reproducible_with_seed():
+    first = run_simulation(3, seed=7)
+    second = run_simulation(3, seed=7)
+    for summary in (first, second):
+        summary.pop('elapsed_sec')
+        summary.pop('games_per_sec')
+    assert first == second
+    assert first['games'] == 3
+    assert abs(first['agari_rate'] + first['ryuukyoku_rate'] - 1.0) < 1e-3
+
+
+def test_max_hands_caps_long_games():
+    record = play_hanchan(seed=3, max_hands=1)
+    assert record['hands'] == 1
+
+    stats = SimulationStats()
+    stats.add(record)
+    assert stats.summary()['completed_games'] == (1 if record['completed'] else 0)
+
+
+def test_ai_riichi_only_when_discard_reaches_tenpai():
+    player = AIPlayer(1)
+    player.hand.tiles = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', '3s', '4s', 'C']
+    assert player.should_declare_riichi(player.hand.tiles.index('C')) is True
+    assert player.should_declare_riichi(player.hand.tiles.index('E')) is False
+
+    player.melds = [{'type': 'pon', 'tiles': ['W', 'W', 'W']}]
+    assert player.should_declare_riichi(player.hand.tiles.index('C')) is False
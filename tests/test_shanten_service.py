@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.shanten import ShantenService, calculate_shanten, calculate_shanten_from_counts, get_shanten_service
+from models.player import AIPlayer
+from models.tile_utils import hand_to_counts
+
+
+TENPAI = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', 'E', 'C']
+
+
+def test_service_counts_hits_and_misses():
+    service = ShantenService()
+    counts = hand_to_counts(TENPAI)
+
+    assert service.shanten(counts) == 0
+    assert service.shanten(list(counts)) == 0
+    assert service.shanten(counts, open_melds_count=1) == 0
+
+    stats = service.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['size'] == 2
+
+    service.clear()
+    assert service.stats()['size'] == 0
+    assert service.stats()['hits'] == 0
+
+
+def test_service_evicts_oldest_entry():
+    service = ShantenService(maxsize=2)
+    hands = [hand_to_counts(TENPAI[:i]) for i in (13, 11, 10)]
+    for counts in hands:
+        service.shanten(counts)
+    assert service.stats()['size'] == 2
+
+    service.shanten(hands[0])
+    assert service.stats()['misses'] == 4
+
+
+def test_service_matches_uncached_backends():
+    service = ShantenService(backend='fallback')
+    counts = hand_to_counts(['1m', '1m', '1m', '2m', '3m', '4m', '5p', '5p', 'W', 'N', 'C', 'C', '9s'])
+    assert service.shanten(counts) == calculate_shanten_from_counts(counts, backend='fallback')
+    assert service.backend == 'fallback'
+
+    with pytest.raises(ValueError):
+        ShantenService(backend='unknown')
+
+
+def test_service_is_thread_safe():
+    service = ShantenService()
+    counts = hand_to_counts(TENPAI)
+    results = []
+
+    def worker():
+        for _ in range(200):
+            results.append(service.shanten(counts))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(results) == {0}
+    stats = service.stats()
+    assert stats['hits'] + stats['misses'] == 800
+    assert stats['size'] == 1
+
+
+def test_calculate_shanten_uses_shared_service():
+    service = get_shanten_service()
+    counts = hand_to_counts(['1m', '4m', '7m', '1p', '4p', '7p', '1s', '4s', '7s', 'E', 'S', 'W', 'N'])
+    before = service.stats()['hits']
+    calculate_shanten_from_counts(counts)
+    calculate_shanten_from_counts(counts)
+    assert service.stats()['hits'] >= before + 1
+
+
+def test_ai_choose_discard_picks_minimum_shanten_tile():
+    player = AIPlayer(1)
+    player.hand.tiles = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', 'E', 'C', 'N']
+    for _ in range(20):
+        idx = player.choose_discard()
+        remaining = player.hand.tiles[:idx] + player.hand.tiles[idx + 1:]
+        assert calculate_shanten(remaining) == 0
+        assert player.hand.tiles[idx] in ('C', 'N')
@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mahjong.shanten import Shanten
+
+from logic.shanten import calculate_shanten, calculate_shanten_from_counts, shanten_after_discards
+from logic.shanten_table import NUM_SUIT_VECTORS, ShantenTable, suit_rank
+from models.tile_utils import build_wall, hand_to_counts
+
+
+HAND_SIZES = [1, 2, 4, 5, 7, 8, 10, 11, 13, 14]
+
+
+def test_table_matches_mahjong_library_on_random_hands():
+    rng = random.Random(20240501)
+    for _ in range(3000):
+        wall = build_wall()
+        rng.shuffle(wall)
+        counts = hand_to_counts(wall[:rng.choice(HAND_SIZES)])
+        expected = Shanten.calculate_shanten(counts)
+        assert calculate_shanten_from_counts(counts, backend='table') == expected, counts
+
+
+def test_table_matches_mahjong_library_on_clustered_hands():
+    # 同じ牌が重なりやすい手（4枚使い・刻子多め）も比較する
+    rng = random.Random(7)
+    for _ in range(3000):
+        size = rng.choice(HAND_SIZES)
+        pool = rng.sample(range(34), rng.randint(4, 8))
+        counts = [0] * 34
+        while sum(counts) < size:
+            i = rng.choice(pool)
+            if counts[i] < 4:
+                counts[i] += 1
+        expected = Shanten.calculate_shanten(counts)
+        assert calculate_shanten_from_counts(counts, backend='table') == expected, counts
+
+
+def test_table_backend_known_hands():
+    complete = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', 'E', 'C', 'C']
+    assert calculate_shanten(complete, backend='table') == -1
+    assert calculate_shanten(complete[:13], backend='table') == 0
+
+    chiitoitsu = ['1m', '1m', '3m', '3m', '5p', '5p', '7p', '7p', '9s', '9s', 'E', 'E', 'C']
+    assert calculate_shanten(chiitoitsu, backend='table') == 0
+
+    kokushi = ['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C']
+    assert calculate_shanten(kokushi, backend='table') == 0
+
+    # 3副露後の和了形（5枚）
+    assert calculate_shanten(['2m', '3m', '4m', '7p', '7p'], open_melds_count=3, backend='table') == -1
+
+
+def test_suit_rank_covers_all_vectors():
+    assert suit_rank([0] * 9, 0) == 0
+    assert suit_rank([4, 4, 4, 2, 0, 0, 0, 0, 0], 0) == NUM_SUIT_VECTORS - 1
+
+
+def test_invalid_table_data_is_rejected():
+    with pytest.raises(ValueError):
+        ShantenTable(b'not a table')
+
+
+def test_shanten_after_discards_matches_per_discard_computation():
+    rng = random.Random(99)
+    for _ in range(300):
+        wall = build_wall()
+        rng.shuffle(wall)
+        counts = hand_to_counts(wall[:rng.choice([2, 5, 8, 11, 14])])
+        for backend in ('table', 'mahjong'):
+            result = shanten_after_discards(counts, backend=backend)
+            assert set(result) == {i for i, c in enumerate(counts) if c}
+            for kind, value in result.items():
+                work = list(counts)
+                work[kind] -= 1
+                assert value == Shanten.calculate_shanten(work), (backend, counts, kind)
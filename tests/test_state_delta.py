@@ -0,0 +1,90 @@
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infra.state_delta import VersionedState, diff_states
+
+
+def _apply(previous, response):
+    """index.html の applyStateResponse と同じ手順で差分を適用"""
+    merged = copy.deepcopy(previous)
+    merged.update(response['changed'])
+    for key in response['removed']:
+        merged.pop(key, None)
+    for key, players in response['changed_players'].items():
+        for idx, value in players.items():
+            merged[key][int(idx)] = value
+    if 'version' in response:
+        merged['version'] = response['version']
+    return merged
+
+
+def test_diff_states_sends_only_changed_players():
+    old = {'phase': 'discard', 'discards': [['1m'], [], [], []], 'agari': {'han': 1}}
+    new = {'phase': 'discard', 'discards': [['1m'], ['E'], [], []], 'next_draw': '5p'}
+
+    delta = diff_states(old, new)
+    assert delta['changed'] == {'next_draw': '5p'}
+    assert delta['changed_players'] == {'discards': {'1': ['E']}}
+    assert delta['removed'] == ['agari']
+    assert _apply(old, delta) == new
+
+
+def test_versioned_state_falls_back_to_full_on_version_mismatch():
+    tracker = VersionedState()
+    first = tracker.respond({'phase': 'discard', 'hands': [['1m'], ['2m']]})
+    assert first['delta'] is False and first['version'] == 1
+
+    second = tracker.respond({'phase': 'call_wait', 'hands': [['1m'], ['3m']]}, since_version=1)
+    assert second['delta'] is True
+    assert second['base_version'] == 1 and second['version'] == 2
+    assert second['changed'] == {'phase': 'call_wait'}
+    assert 'hands' not in second['changed']
+
+    # 古いバージョンからの要求には全量を返す
+    third = tracker.respond({'phase': 'discard', 'hands': [['1m'], ['3m']]}, since_version=1)
+    assert third['delta'] is False
+    assert third['hands'] == [['1m'], ['3m']]
+
+
+def test_webapp_delta_responses_rebuild_full_state():
+    import webapp
+
+    webapp.app.config['TESTING'] = True
+    client = webapp.app.test_client()
+    client.get('/reset')
+    client.get('/')
+
+    full = client.post('/debug_tenpai', json={}).get_json()
+    assert full['delta'] is False
+    state = {k: v for k, v in full.items() if k != 'delta'}
+
+    deltas = 0
+    for _ in range(6):
+        with client.session_transaction() as sess:
+            game = webapp.game_store.get(sess['game_token'])
+        if game.is_game_over:
+            break
+        if game.phase == 'call_wait' and game.pending_calls:
+            response = client.post('/apply_call', json={
+                'player_id': game.pending_calls[0]['player_id'],
+                'action': 'pass',
+                'since_version': state['version'],
+            })
+        else:
+            response = client.post('/discard', data={
+                'player_id': str(game.current_turn),
+                'discard_index': '0',
+                'since_version': str(state['version']),
+            })
+        assert response.status_code == 200
+        delta = response.get_json()
+        assert delta['delta'] is True
+        deltas += 1
+        expected = webapp.build_state_response(game)
+        state = _apply(state, delta)
+        for key in ('hands', 'discards', 'melds', 'points', 'wall_count', 'current_turn', 'phase'):
+            assert state[key] == expected[key]
+    assert deltas > 0
@@ -0,0 +1,76 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import webapp
+from models.game import Game
+
+
+def _game_with_call_log(monkeypatch):
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    calls = []
+    original = game.get_agari_tiles
+
+    def logging_agari_tiles(player_id):
+        calls.append(player_id)
+        return original(player_id)
+
+    monkeypatch.setattr(game, 'get_agari_tiles', logging_agari_tiles)
+    return game, calls
+
+
+def test_analysis_fields_default_to_human_seat(monkeypatch):
+    game, calls = _game_with_call_log(monkeypatch)
+    state = webapp.build_state_response(game)
+
+    assert calls == [0]
+    assert state['shanten_list'][0] is not None
+    assert state['shanten_list'][1:] == [None, None, None]
+    assert state['agari_tiles'][1:] == [None, None, None]
+    # フリテン表示は他家の分も必要
+    assert all(isinstance(flag, bool) for flag in state['furiten_list'])
+
+
+def test_field_mask_requests_all_players(monkeypatch):
+    game, calls = _game_with_call_log(monkeypatch)
+    state = webapp.build_state_response(game, fields=frozenset({'agari_tiles', 'shanten_list'}))
+
+    assert calls == [0, 1, 2, 3]
+    assert None not in state['shanten_list']
+
+
+def test_tsumo_and_ankan_only_checked_on_human_discard_turn(monkeypatch):
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    game.current_turn = 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError('should not be computed off-turn')
+
+    monkeypatch.setattr(game, 'check_agari', fail)
+    monkeypatch.setattr(game, 'check_available_ankan', fail)
+    state = webapp.build_state_response(game)
+    assert state['can_tsumo_agari'] is False
+    assert state['available_ankan_tiles'] == []
+
+
+def test_requested_fields_parsing():
+    with webapp.app.test_request_context('/discard', method='POST', data={'fields': 'agari_tiles, bogus'}):
+        assert webapp.get_requested_fields() == frozenset({'agari_tiles'})
+    with webapp.app.test_request_context('/apply_call', method='POST', json={'fields': ['all']}):
+        assert webapp.get_requested_fields() == frozenset(webapp.PER_PLAYER_ANALYSIS_FIELDS)
+    with webapp.app.test_request_context('/apply_call', method='POST', json={}):
+        assert webapp.get_requested_fields() == frozenset()
+
+
+def test_opponent_furiten_flag_is_reported():
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    player = game.players[2]
+    player.hand.tiles = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', 'E', '5m']
+    player.discards = ['5m']
+
+    state = webapp.build_state_response(game)
+    assert state['furiten_list'][2] is True
@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from mahjong.tile import TilesConverter
+
+from logic import agari
+from logic.agari import AgariChecker
+from logic.calls import CallChecker
+from models.meld import MeldRecord
+from models.tile_ids import TileIdAllocator, tile_to_id, tiles_to_ids
+from models.tile_utils import TILE_KINDS, build_wall
+
+
+def test_ids_match_library_string_conversion():
+    checker = AgariChecker()
+    rng = random.Random(5)
+    for _ in range(200):
+        wall = build_wall(rng)
+        tiles = wall[:rng.randint(1, 18)]
+        expected = TilesConverter.one_line_string_to_136_array(checker._hand_to_one_line_string(tiles))
+        assert sorted(tiles_to_ids(tiles)) == expected
+    for idx, tile in enumerate(TILE_KINDS):
+        assert tile_to_id(tile) == idx * 4
+    assert tile_to_id('7z') == tile_to_id('C') == 132
+    assert tile_to_id('0m') is None
+
+
+def test_allocator_never_reuses_a_copy():
+    allocator = TileIdAllocator()
+    assert allocator.claim([8, 12])
+    assert not allocator.claim([8, 16])
+    assert allocator.is_free(16)
+    assert allocator.take('3m') == 9
+    assert [allocator.take('3m'), allocator.take('3m'), allocator.take('3m')] == [10, 11, None]
+    with pytest.raises(ValueError):
+        tiles_to_ids(['E'] * 5)
+
+
+def test_scoring_gives_distinct_ids_to_overlapping_melds_and_dora(monkeypatch):
+    # ライブラリで計算する経路（役満の可能性がある手など）を通す
+    monkeypatch.setattr(agari, 'score_hand', lambda *args, **kwargs: None)
+    checker = AgariChecker()
+    captured = {}
+    original = checker.calculator.estimate_hand_value
+
+    def capture(tiles, win_tile, melds=None, dora_indicators=None, **kwargs):
+        captured.update(tiles=list(tiles), win=win_tile, melds=melds, dora=list(dora_indicators))
+        return original(tiles, win_tile, melds=melds, dora_indicators=dora_indicators, **kwargs)
+
+    checker.calculator.estimate_hand_value = capture
+    # 234m と 456m の 4m、和了牌とドラ表示牌の 3m が同じ牌種
+    melds = [MeldRecord('chow', ['2m', '3m', '4m']), MeldRecord('chow', ['4m', '5m', '6m'])]
+    result = checker.estimate_hand_value(
+        ['4m', '5m', '6p', '7p', '8p', '2s', '2s'], '3m', is_tsumo=False,
+        melds=melds, dora_indicators=['3m', '2s'],
+    )
+    assert result['valid'] and result['han'] == 1 + 3  # 断么九 + ドラ3
+
+    meld_ids = [t for meld in captured['melds'] for t in meld.tiles]
+    assert len(set(captured['tiles'] + captured['dora'])) == 14 + 2
+    assert set(meld_ids) <= set(captured['tiles'])
+    assert captured['win'] in captured['tiles'] and captured['win'] // 4 == 2
+    assert captured['melds'][0] is melds[0].meld
+
+
+def test_call_checker_builds_library_melds():
+    assert CallChecker.create_meld(('2m', '3m', '4m'), 'chow').tiles == (4, 8, 12)
+    assert CallChecker.create_meld(('E', 'E', 'E'), 'pung').tiles == (108, 109, 110)
+    assert CallChecker.create_meld(('E', 'E', 'E'), 'chow') is None
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.tile_utils import (
+    TILE_KINDS,
+    build_wall,
+    hand_to_counts,
+    index_to_tile,
+    tile_id_to_tile,
+    tile_to_index,
+)
+from logic.agari import AgariChecker
+from logic.calls import CallChecker
+
+
+def test_tile_index_round_trip_for_all_kinds():
+    assert len(TILE_KINDS) == 34
+    for idx, tile in enumerate(TILE_KINDS):
+        assert tile_to_index(tile) == idx
+        assert index_to_tile(idx) == tile
+        for copy in range(4):
+            assert tile_id_to_tile(idx * 4 + copy) == tile
+
+
+def test_numeric_honor_notation_is_accepted():
+    assert tile_to_index('1z') == tile_to_index('E')
+    assert tile_to_index('7z') == tile_to_index('C')
+    assert hand_to_counts(['E', '1z', 'C'])[27] == 2
+
+
+def test_build_wall_has_four_copies_of_each_kind():
+    counts = hand_to_counts(build_wall())
+    assert counts == [4] * 34
+
+
+def test_one_line_string_is_built_from_counts():
+    checker = AgariChecker()
+    tiles = ['E', '2p', '1m', '1m', '9s', 'C', '1z']
+    assert checker._hand_to_one_line_string(tiles) == '11m2p9s117z'
+
+
+def test_chow_patterns_at_suit_edges():
+    assert CallChecker._find_possible_chows(['2m', '3m', '8m'], '1m') == [('1m', '2m', '3m')]
+    assert CallChecker._find_possible_chows(['7p', '8p', '1s'], '9p') == [('7p', '8p', '9p')]
+    # スートをまたいだ並びはチーにならない
+    assert CallChecker._find_possible_chows(['8m', '9m', '1p', '2p'], '9m') == []
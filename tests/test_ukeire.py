@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mahjong.shanten import Shanten
+
+from logic.ukeire import (
+    best_ukeire_discards,
+    calculate_ukeire,
+    calculate_ukeire_per_discard,
+    visible_tile_counts,
+)
+from models.meld import MeldRecord
+from models.player import Player
+from models.tile_utils import TILE_KINDS, build_wall, hand_to_counts, tile_to_index
+
+
+def _brute_force_ukeire(counts, visible):
+    shanten = Shanten.calculate_shanten(counts)
+    tiles = {}
+    for kind in range(34):
+        if counts[kind] >= 4:
+            continue
+        work = list(counts)
+        work[kind] += 1
+        if Shanten.calculate_shanten(work) < shanten:
+            tiles[TILE_KINDS[kind]] = max(0, 4 - counts[kind] - visible[kind])
+    return shanten, tiles
+
+
+def test_ukeire_for_ryanmen_tenpai():
+    hand = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s', 'E', 'E', '3s', '4s']
+    visible = [0] * 34
+    visible[tile_to_index('2s')] = 2
+    result = calculate_ukeire(hand_to_counts(hand), visible)
+    assert result['shanten'] == 0
+    assert result['tiles'] == {'2s': 2, '5s': 4}
+    assert result['total'] == 6
+
+
+def test_ukeire_matches_brute_force_on_random_hands():
+    rng = random.Random(12345)
+    for _ in range(60):
+        wall = build_wall()
+        rng.shuffle(wall)
+        counts = hand_to_counts(wall[:13])
+        visible = hand_to_counts(wall[13:13 + rng.randint(0, 30)])
+        shanten, tiles = _brute_force_ukeire(counts, visible)
+        result = calculate_ukeire(counts, visible)
+        assert result['shanten'] == shanten
+        assert result['tiles'] == tiles
+
+
+def test_ukeire_per_discard_matches_brute_force():
+    rng = random.Random(777)
+    for _ in range(20):
+        wall = build_wall()
+        rng.shuffle(wall)
+        counts = hand_to_counts(wall[:14])
+        result = calculate_ukeire_per_discard(counts)
+        assert set(result) == {TILE_KINDS[i] for i, c in enumerate(counts) if c}
+        for tile, info in result.items():
+            work = list(counts)
+            work[tile_to_index(tile)] -= 1
+            shanten, tiles = _brute_force_ukeire(work, [0] * 34)
+            # 捨てた牌は自分の捨て牌として見えている
+            tiles = {t: max(0, n - (1 if t == tile else 0)) for t, n in tiles.items()}
+            assert info['shanten'] == shanten
+            assert info['tiles'] == tiles
+
+        best = best_ukeire_discards(result)
+        assert best
+        min_shanten = min(info['shanten'] for info in result.values())
+        assert all(result[t]['shanten'] == min_shanten for t in best)
+
+
+def test_visible_counts_do_not_double_count_called_tiles():
+    discarder = Player(0)
+    caller = Player(1)
+    discarder.discards = ['5p', '9s']
+    caller.melds = [{'type': 'pon', 'tiles': ['5p', '5p', '5p']}, ['1m', '1m', '1m', '1m']]
+
+    visible = visible_tile_counts([discarder, caller], dora_indicators=['9s'])
+    assert visible[tile_to_index('5p')] == 3
+    assert visible[tile_to_index('1m')] == 4
+    assert visible[tile_to_index('9s')] == 2
+
+
+def test_visible_counts_subtract_only_called_tile_of_chow():
+    discarder = Player(0)
+    other = Player(2)
+    caller = Player(1)
+    # 5m を鳴いてチー。3m は別の家の捨て牌にあるだけで鳴かれていない
+    discarder.discards = ['5m']
+    other.discards = ['3m']
+    caller.melds = [MeldRecord('chow', ['3m', '4m', '5m'], called_tile='5m')]
+
+    visible = visible_tile_counts([discarder, other, caller])
+    assert visible[tile_to_index('3m')] == 2
+    assert visible[tile_to_index('4m')] == 1
+    assert visible[tile_to_index('5m')] == 1
+
+    restored = MeldRecord.from_session(caller.melds[0].to_session())
+    assert restored == caller.melds[0] and restored.called_tile == '5m'
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.game import Game
+
+
+TENPAI_1P = ['1m', '1m', '1m', '2m', '3m', '4m', '5m', '6m', '7m', '8m', '9m', '1p', '1p']
+
+
+def _game_with_counter(monkeypatch):
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    game.debug_wait_check = False
+    calls = []
+    original = game._compute_agari_tiles
+
+    def counting(player_id):
+        calls.append(player_id)
+        return original(player_id)
+
+    monkeypatch.setattr(game, '_compute_agari_tiles', counting)
+    return game, calls
+
+
+def test_waits_are_reused_until_hand_changes(monkeypatch):
+    game, calls = _game_with_counter(monkeypatch)
+    player = game.players[1]
+    player.hand.tiles = list(TENPAI_1P)
+
+    first = game.get_agari_tiles(1)
+    assert game.get_agari_tiles(1) == first
+    assert game.is_furiten(1) is False
+    assert len(calls) == 1
+
+    player.hand.tiles.append('E')
+    game.get_agari_tiles(1)
+    assert len(calls) == 2
+
+    player.discard_tile(player.hand.tiles.index('E'))
+    game.get_agari_tiles(1)
+    assert len(calls) == 3
+
+
+def test_waits_are_recomputed_when_melds_change(monkeypatch):
+    game, calls = _game_with_counter(monkeypatch)
+    player = game.players[0]
+    player.hand.tiles = ['2p', '3p', '4p', '2s', '3s', '4s', '6s', '7s', '8s', '5p', '5p']
+    player.melds = []
+
+    assert game.get_agari_tiles(0) == []
+    player.melds.append(['1m', '1m', '1m', '1m'])
+    assert '5p' in game.get_agari_tiles(0)
+    assert len(calls) == 2
+
+
+def test_furiten_tracks_new_and_replaced_discards(monkeypatch):
+    game, calls = _game_with_counter(monkeypatch)
+    player = game.players[1]
+    player.hand.tiles = list(TENPAI_1P)
+    player.discards = ['E']
+
+    assert game.is_furiten(1) is False
+    player.discards.append('1p')
+    assert game.is_furiten(1) is True
+
+    player.discards = ['S']
+    assert game.is_furiten(1) is False
+    assert len(calls) == 1
+
+
+def test_debug_mode_cross_checks_brute_force(monkeypatch):
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    game.players[1].hand.tiles = list(TENPAI_1P)
+    game.players[1].discards = ['1p']
+    game.debug_wait_check = True
+
+    assert game.get_agari_tiles(1) == game._get_agari_tiles_brute_force(1)
+    assert game.is_furiten(1) is True
+
+    game.players[1].hand.tiles.append('E')
+    monkeypatch.setattr(game, '_compute_agari_tiles', lambda player_id: ['9s'])
+    with pytest.raises(AssertionError):
+        game.get_agari_tiles(1)
@@ -0,0 +1,87 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.waits import wait_cache_info, wait_tiles, wait_tiles_after_discards
+from models.game import Game
+from models.tile_utils import TILE_KINDS, build_wall, hand_to_counts
+
+
+def _waits(tiles):
+    return wait_tiles(hand_to_counts(tiles))
+
+
+def test_basic_wait_shapes():
+    base = ['1m', '2m', '3m', '4p', '5p', '6p', '7s', '8s', '9s']
+    assert _waits(base + ['E', 'E', '3s', '4s']) == ['2s', '5s']       # 両面
+    assert _waits(base + ['E', 'E', '3s', '5s']) == ['4s']             # 嵌張
+    assert _waits(base + ['E', 'E', '1p', '2p']) == ['3p']             # 辺張
+    assert _waits(base + ['E', 'E', 'C', 'C']) == ['E', 'C']           # 双碰
+    assert _waits(base + ['E', 'S', 'S', 'S']) == ['E']                # 単騎＋暗刻
+    assert _waits(base + ['5m', '6m', '7m', '8m']) == ['5m', '8m']     # 延べ単
+
+
+def test_special_hand_waits():
+    chuuren = ['1m', '1m', '1m', '2m', '3m', '4m', '5m', '6m', '7m', '8m', '9m', '9m', '9m']
+    assert _waits(chuuren) == [f"{n}m" for n in range(1, 10)]
+
+    chiitoitsu = ['1m', '1m', '3m', '3m', '5p', '5p', '7p', '7p', '9s', '9s', 'E', 'E', 'C']
+    assert _waits(chiitoitsu) == ['C']
+
+    kokushi_13 = ['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C']
+    assert _waits(kokushi_13) == ['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C']
+
+    kokushi = ['1m', '1m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C']
+    assert _waits(kokushi) == ['9m']
+
+
+def test_fifth_copy_is_never_a_wait():
+    assert _waits(['1m', '2m', '3m', 'F', 'F', 'F', 'F']) == []
+    assert _waits(['1m', '1m', '1m', '1m', '2m', '3m', '4p', '5p', '6p', '7p', '8p', '9p', 'E']) == ['E']
+
+
+def test_game_waits_match_brute_force():
+    rng = random.Random(4242)
+    game = Game(num_players=4, human_player_id=0)
+    game.start_game()
+    player = game.players[0]
+    checked = 0
+    while checked < 150:
+        wall = build_wall()
+        rng.shuffle(wall)
+        # テンパイに近い手を作る: 完成形から1枚抜いて、時々1枚入れ替える
+        tiles = []
+        for _ in range(4):
+            if rng.random() < 0.6:
+                start = rng.randrange(3) * 9 + rng.randrange(7)
+                tiles += [TILE_KINDS[start + i] for i in range(3)]
+            else:
+                tiles += [TILE_KINDS[rng.randrange(34)]] * 3
+        tiles += [TILE_KINDS[rng.randrange(34)]] * 2
+        if max(hand_to_counts(tiles)) > 4:
+            continue
+        tiles.pop(rng.randrange(len(tiles)))
+        if rng.random() < 0.3:
+            tiles[rng.randrange(len(tiles))] = wall[0]
+            if max(hand_to_counts(tiles)) > 4:
+                continue
+        if rng.random() < 0.3:
+            tiles.append(wall[1])
+            if max(hand_to_counts(tiles)) > 4:
+                continue
+
+        player.hand.tiles = tiles
+        player.melds = []
+        assert game.get_agari_tiles(0) == game._get_agari_tiles_brute_force(0), tiles
+        checked += 1
+
+
+def test_waits_with_open_meld_and_14_tile_hand():
+    counts = hand_to_counts(['2p', '3p', '4p', '2s', '3s', '4s', '6s', '7s', '8s', '5p', '5p'])
+    assert '5p' in wait_tiles_after_discards(counts)
+
+    before = wait_cache_info().hits
+    wait_tiles_after_discards(counts)
+    assert wait_cache_info().hits > before
@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.game import Game
+from models.tile_utils import TILE_KINDS, build_wall
+from models.wall_source import PredefinedWallSource, RecordingWallSource, ShuffledWallSource
+from simulation.self_play import play_hanchan
+
+
+def test_predefined_wall_is_dealt_from_the_end():
+    wall = [TILE_KINDS[i // 4] for i in range(136)]
+    game = Game(num_players=4, human_player_id=0, wall_source=PredefinedWallSource([wall]))
+    game.start_game()
+
+    assert game.dead_wall == wall[-14:]
+    assert game.dora_indicator == wall[-14:][4]
+    # 親（player 0）の最初の1枚は山の末尾から（王牌を除く）
+    assert wall[-15] in game.players[0].hand.to_list()
+    assert len(game.wall) == 136 - 14 - 13 * 4 - 1
+
+
+def test_predefined_walls_validate_and_fall_back():
+    with pytest.raises(ValueError):
+        PredefinedWallSource([['1m'] * 136])
+
+    first = build_wall(random.Random(1))
+    source = PredefinedWallSource([first], fallback=ShuffledWallSource(random.Random(2)))
+    assert source.next_wall() == first
+    assert source.remaining == 0
+    assert source.next_wall() == build_wall(random.Random(2))
+
+    with pytest.raises(IndexError):
+        PredefinedWallSource([]).next_wall()
+
+
+def test_debug_tenpai_uses_wall_source():
+    wall = build_wall(random.Random(3))
+    game = Game(num_players=4, human_player_id=0, wall_source=PredefinedWallSource([wall]))
+    game.start_debug_tenpai_for_player0()
+
+    remaining = list(wall)
+    for tile in Game.DEBUG_PLAYER0_TENPAI_HAND:
+        remaining.remove(tile)
+    assert game.dead_wall == remaining[-14:]
+
+
+def test_recorded_walls_replay_a_whole_game():
+    recorder = RecordingWallSource(ShuffledWallSource(random.Random(8)))
+    original = play_hanchan(seed=123, wall_source=recorder)
+    assert len(recorder.walls) >= original['hands']
+
+    # AI の打牌選択の乱数が同じなら、記録した牌山で完全に同じ対局になる
+    replayed = play_hanchan(seed=123, wall_source=recorder.replay())
+    assert replayed == original
@@ -0,0 +1,84 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mahjong.constants import EAST, SOUTH, WEST
+
+from hand_gen import random_winning_hand
+from logic.agari import AgariChecker
+from logic.calls import CallChecker
+from logic.yaku_filter import YAKU_MAYBE, YAKU_NO, YAKU_YES, yaku_verdict
+from models.game import Game
+from models.meld import MeldRecord
+from models.tile_utils import hand_to_counts, tile_to_index
+
+
+def test_verdict_agrees_with_full_scorer():
+    checker = AgariChecker()
+    rng = random.Random(7)
+    seen = set()
+    for _ in range(1500):
+        concealed, melds = random_winning_hand(
+            rng, run_rate=0.6, meld_counts=(0, 0, 1, 2, 3), kan_rate=0.2, kan_kinds=('ankan',),
+        )
+        win = rng.choice(concealed)
+        is_tsumo = rng.random() < 0.4
+        is_riichi = all(not m.opened for m in melds) and rng.random() < 0.2
+        player_wind, round_wind = rng.choice([EAST, SOUTH, WEST]), rng.choice([EAST, SOUTH])
+        verdict = yaku_verdict(
+            hand_to_counts(concealed), tile_to_index(win), melds,
+            is_tsumo=is_tsumo, is_riichi=is_riichi, player_wind=player_wind, round_wind=round_wind,
+        )
+        hand = list(concealed)
+        if not is_tsumo:
+            hand.remove(win)
+        result = checker._estimate_hand_value_uncached(
+            hand, win, is_tsumo, False, melds, player_wind, round_wind, None, is_riichi, False, 0,
+        )
+        seen.add(verdict)
+        if verdict != YAKU_MAYBE:
+            assert result['valid'] == (verdict == YAKU_YES), (concealed, melds, win, is_tsumo, result)
+    assert seen == {YAKU_YES, YAKU_NO, YAKU_MAYBE}
+
+
+def test_verdict_examples():
+    def verdict(tiles, win, melds=None, **kwargs):
+        return yaku_verdict(hand_to_counts(tiles), tile_to_index(win), melds, **kwargs)
+
+    chiitoi = ['1m', '1m', '9m', '9m', '2p', '2p', '5p', '5p', 'E', 'E', '3s', '3s', '7s', '7s']
+    kokushi = ['1m', '9m', '1p', '9p', '1s', '9s', 'E', 'S', 'W', 'N', 'P', 'F', 'C', 'C']
+    assert verdict(chiitoi, '7s') == YAKU_YES
+    assert verdict(kokushi, 'C') == YAKU_YES
+    # 門前ロン・平和形（待ち次第）
+    pinfu = ['1m', '2m', '3m', '4p', '5p', '6p', '6s', '7s', '8s', '2s', '3s', '4s', '9p', '9p']
+    assert verdict(pinfu, '4s') == YAKU_MAYBE
+    assert verdict(pinfu, '4s', is_tsumo=True) == YAKU_YES
+    # 副露あり・役なし、自風の刻子なら役牌
+    chow = [MeldRecord('chow', ['1m', '2m', '3m'])]
+    assert verdict(['4p', '5p', '6p', '6s', '7s', '8s', 'W', 'W', 'W', '9p', '9p'], '9p', chow) == YAKU_NO
+    assert verdict(['4p', '5p', '6p', '6s', '7s', '8s', 'W', 'W', 'W', '9p', '9p'], '9p', chow, player_wind=WEST) == YAKU_YES
+
+
+def test_call_options_offer_ron_only_with_yaku(monkeypatch):
+    game = Game(num_players=4, human_player_id=-1, rng=random.Random(3))
+    game.start_game()
+    player = game.players[1]
+    player.hand.tiles = ['4p', '5p', '6p', '6s', '7s', '8s', 'N', 'N', 'N', '9p']
+    player.melds = [MeldRecord('chow', ['1m', '2m', '3m'])]
+    game.players[0].discards = []
+    player.discards = []
+
+    scored = []
+    original = AgariChecker._estimate_hand_value_uncached
+    monkeypatch.setattr(AgariChecker, '_estimate_hand_value_uncached', lambda *a, **k: scored.append(1) or original(*a, **k))
+
+    assert CallChecker.can_ron(player.hand.tiles, '9p', game._agari_checker, melds=player.melds)
+    options = game._build_call_options(0, '9p')
+    assert not any(o['player_id'] == 1 and o['calls']['can_ron'] for o in options)
+
+    player.hand.tiles = ['4p', '5p', '6p', '6s', '7s', '8s', 'C', 'C', 'C', '9p']
+    options = game._build_call_options(0, '9p')
+    assert any(o['player_id'] == 1 and o['calls']['can_ron'] for o in options)
+    assert scored == []
@@ -1,12 +1,27 @@
-from flask import Flask, render_template, request, session, redirect, url_for, jsonify
+import logging
+import os
+
+from flask import Flask, Response, g, render_template, request, session, redirect, url_for, jsonify
 from models.game import Game
+from models.game_record import ListRecorder, append_record_file
 from models.tile_utils import format_hand_compact
 from logic.calls import CallChecker
+from infra.game_store import GameStoreConflict, create_game_store_from_env
+from infra.log import configure_logging, get_logger, log_event
+from infra.metrics import cache_gauges, render_prometheus
+from infra.state_delta import get_versioned_state
 from mahjong.constants import EAST, SOUTH, WEST, NORTH
 
 app = Flask(__name__)
 # セッション用のシークレットキー（本番ではより安全な値に）
 app.secret_key = 'your_secret_key_here'
+# ゲーム本体はサーバー側に保持する（MAHJONG_GAME_STORE で切り替え）
+game_store = create_game_store_from_env()
+# 構造化ログ（MAHJONG_LOG_LEVEL / MAHJONG_LOG_LEVELS で有効化）
+configure_logging()
+logger = get_logger('webapp')
+# 指定されていれば対局ごとの牌譜を <ディレクトリ>/<トークン>.mjr に追記する
+GAME_RECORD_DIR = os.environ.get('MAHJONG_GAME_RECORD_DIR')
 
 
 def wind_to_label(wind: int) -> str:
@@ -22,67 +37,120 @@ def wind_to_label(wind: int) -> str:
 	return str(wind)
 
 
+# ゲームに触らないエンドポイント（対局中のリクエストを待たせない）
+UNLOCKED_ENDPOINTS = frozenset({'static', 'metrics'})
+
+
+@app.before_request
+def lock_game_token() -> None:
+	"""
+	同じトークンのリクエストを直列化する（get → 変更 → put の間に割り込ませない）
+
+	ロックはプロセス内だけで効く。複数プロセスでの競合は SQLiteGameStore が
+	put() 時に検出し、GameStoreConflict（409）になる。
+	"""
+	if request.endpoint in UNLOCKED_ENDPOINTS:
+		return
+	token = session.get('game_token')
+	if token:
+		lock = game_store.lock(token)
+		lock.acquire()
+		g.game_token = token
+		g.game_lock = lock
+
+
+@app.after_request
+def mark_failed_game_request(response: Response) -> Response:
+	if response.status_code >= 400:
+		g.game_failed = True
+	return response
+
+
+@app.teardown_request
+def unlock_game_token(exc) -> None:
+	"""失敗したリクエストの途中までの変更を捨ててからロックを外す"""
+	lock = g.pop('game_lock', None)
+	if lock is None:
+		return
+	try:
+		if exc is not None or g.get('game_failed'):
+			game_store.revert(g.game_token)
+	finally:
+		lock.release()
+
+
+@app.errorhandler(GameStoreConflict)
+def game_store_conflict(e: GameStoreConflict):
+	return jsonify({'error': 'ゲームが別のリクエストで更新されました。再読み込みしてください'}), 409
+
+
 def get_game_from_session() -> Game:
-	"""セッションからゲーム状態を復元"""
-	game_data = session.get('game_data')
-	if game_data is None:
-		game = Game(num_players=4, human_player_id=0)
+	"""セッションのトークンからゲーム状態を取得（無ければ新規作成）"""
+	token = session.get('game_token')
+	game = game_store.get(token) if token else None
+	if game is None:
+		game = Game(num_players=4, human_player_id=0, recorder=ListRecorder() if GAME_RECORD_DIR else None)
 		game.start_game()
 		save_game_to_session(game)
-		return game
-		
-	
-	game = Game(num_players=4, human_player_id=0)
-	game.current_turn = game_data.get('current_turn', 0)
-	game.is_game_over = game_data.get('is_game_over', False)
-	game.wall = game_data.get('wall', [])
-	game.dora_indicator = game_data.get('dora_indicator')
-	game.dead_wall = game_data.get('dead_wall', [])
-	game.ura_dora_indicator = game_data.get('ura_dora_indicator')
-	game.round_wind = game_data.get('round_wind', EAST)
-	game.dealer_id = game_data.get('dealer_id', 0)
-	game.honba = game_data.get('honba', 0)
-	game.kyotaku_riichi = game_data.get('kyotaku_riichi', 0)
-	game.kan_count = game_data.get('kan_count', 0)
-	game.phase = game_data.get('phase', 'discard')
-	game.last_discarded = game_data.get('last_discarded')
-	game.pending_calls = game_data.get('pending_calls', [])
-	game.passed_callers = game_data.get('passed_callers', [])
-	game.current_discarder_id = game_data.get('current_discarder_id')
-
-	# プレイヤーの手牌を復元
-	players_data = game_data.get('players', [])
-	for i, p_data in enumerate(players_data):
-		game.players[i].points = p_data.get('points', game.players[i].points)
-		game.players[i].hand.tiles = p_data.get('hand', [])
-		game.players[i].discards = p_data.get('discards', [])
-		game.players[i].melds = p_data.get('melds', [])
-		# is_riichiフラグも復元
-		game.players[i].is_riichi = p_data.get('is_riichi', False)
-
-	# received_callsも復元
-	game.received_calls = game_data.get('received_calls', {})
-	game.ippatsu_eligible = game_data.get('ippatsu_eligible', [False] * game.num_players)
-	game.riichi_locked_hands = game_data.get('riichi_locked_hands', [None] * game.num_players)
-	game.riichi_wait_tiles = game_data.get('riichi_wait_tiles', [[] for _ in range(game.num_players)])
-	game.dealer_experience = game_data.get('dealer_experience', [False] * game.num_players)
-	if not any(game.dealer_experience) and 0 <= game.dealer_id < game.num_players:
-		game.dealer_experience[game.dealer_id] = True
-	game.end_game_config = game_data.get('end_game_config', game._get_end_game_config())
-	game.final_settlement = game_data.get('final_settlement')
-
+	elif GAME_RECORD_DIR:
+		# 記録先はストアに保存されないので、リクエストごとに付け直す
+		game.recorder = ListRecorder()
 	return game
 
 
 def save_game_to_session(game: Game) -> None:
-	"""ゲーム状態をセッションに保存"""
-	session['game_data'] = game.to_json_serializable()
+	"""ゲーム状態をサーバー側ストアに保存（セッションにはトークンのみ）"""
+	token = session.get('game_token')
+	if token is None:
+		token = game_store.new_token()
+		session['game_token'] = token
+	game_store.put(token, game)
+	if GAME_RECORD_DIR and isinstance(game.recorder, ListRecorder):
+		events = game.recorder.drain()
+		if events:
+			os.makedirs(GAME_RECORD_DIR, exist_ok=True)
+			append_record_file(os.path.join(GAME_RECORD_DIR, f'{token}.mjr'), events)
+
+
+# 計算コストの高いプレイヤーごとの解析フィールド。
+# 既定では人間プレイヤーの分だけ計算し、他家は None を返す（fields で全員分を要求できる）
+# furiten_list は全員のフリテン表示に使うので常に全員分を返す（待ち牌はキャッシュされる）
+PER_PLAYER_ANALYSIS_FIELDS = ('shanten_list', 'agari_tiles')
+
+
+def get_requested_fields() -> frozenset:
+	"""
+	リクエストの fields パラメータ（カンマ区切り文字列 or リスト、'all' で全項目）を解析し、
+	全プレイヤー分を計算する解析フィールドの集合を返す
+	"""
+	raw = request.values.get('fields')
+	if raw is None and request.is_json:
+		raw = (request.get_json(silent=True) or {}).get('fields')
+	if not raw:
+		return frozenset()
+	names = raw.split(',') if isinstance(raw, str) else raw
+	names = {str(name).strip() for name in names}
+	if 'all' in names:
+		return frozenset(PER_PLAYER_ANALYSIS_FIELDS)
+	return frozenset(names & set(PER_PLAYER_ANALYSIS_FIELDS))
+
+
+def build_state_response(game: Game, result: dict | None = None, fields: frozenset = frozenset()) -> dict:
+	"""
+	現在のゲーム状態をフロント向けJSONに整形
+
+	fields に含まれない解析フィールド（PER_PLAYER_ANALYSIS_FIELDS）は人間プレイヤーの分だけ計算する。
+	暗槓候補・ツモ和了可否は人間プレイヤーの打牌番のときだけ計算する。
+	"""
+	result = result or {}
+	human_id = game.human_player_id
 
+	def per_player(field: str, compute):
+		if field in fields:
+			return [compute(i) for i in range(game.num_players)]
+		return [compute(i) if i == human_id else None for i in range(game.num_players)]
 
-def build_state_response(game: Game, result: dict | None = None) -> dict:
-	"""現在のゲーム状態をフロント向けJSONに整形"""
-	result = result or {}
-	# リーチ判定（条件分解＋デバッグ出力）
+	# リーチ判定（条件分解＋デバッグログ）
 	player0 = game.players[0]
 	is_my_turn = (game.current_turn == 0)
 	is_discard_phase = (game.phase == 'discard')
@@ -91,7 +159,11 @@ def build_state_response(game: Game, result: dict | None = None) -> dict:
 	is_tenpai = (player0.get_shanten() <= 0)
 
 	can_riichi = is_my_turn and is_discard_phase and is_not_riichi and is_menzen and is_tenpai
-	print(f"[DEBUG Riichi] turn:{is_my_turn}, phase:{is_discard_phase}, not_riichi:{is_not_riichi}, menzen:{is_menzen}, tenpai:{is_tenpai} -> can_riichi:{can_riichi}")
+	log_event(
+		logger, logging.DEBUG, 'riichi_check',
+		turn=is_my_turn, phase=is_discard_phase, not_riichi=is_not_riichi,
+		menzen=is_menzen, tenpai=is_tenpai, can_riichi=can_riichi,
+	)
 	response_data = {
 		'current_turn': game.current_turn,
 		'phase': game.phase,
@@ -114,18 +186,18 @@ def build_state_response(game: Game, result: dict | None = None) -> dict:
 		'is_game_over': result.get('is_game_over', game.is_game_over),
 		'hands': [p.hand.to_list() for p in game.players],
 		'discards': [p.discards for p in game.players],
-		'shanten_list': [p.get_shanten() for p in game.players],
+		'shanten_list': per_player('shanten_list', lambda i: game.players[i].get_shanten()),
 		'dora_indicator': game.dora_indicator,
 		'dora_indicators': game.get_revealed_dora_indicators(),
 		'remaining_draws': result.get('remaining_draws', max(0, len(game.wall))),
 		'melds': [p.melds for p in game.players],
-		'agari_tiles': [game.get_agari_tiles(i) for i in range(game.num_players)],
+		'agari_tiles': per_player('agari_tiles', game.get_agari_tiles),
 		'can_riichi': can_riichi,
 		'is_riichi': [p.is_riichi for p in game.players],
 		'ippatsu_eligible': game.ippatsu_eligible,
 		'furiten_list': [game.is_furiten(i) for i in range(game.num_players)],
-		'available_ankan_tiles': game.check_available_ankan(0),
-		'can_tsumo_agari': game.check_agari(0),
+		'available_ankan_tiles': game.check_available_ankan(human_id) if is_my_turn and is_discard_phase else [],
+		'can_tsumo_agari': game.check_agari(human_id) if is_my_turn and is_discard_phase else False,
 	}
 	if 'ok' in result:
 		response_data['ok'] = result['ok']
@@ -160,8 +232,27 @@ def build_state_response(game: Game, result: dict | None = None) -> dict:
 	return response_data
 
 
+def get_since_version() -> int | None:
+	"""リクエストからクライアントが最後に受け取った状態バージョンを取り出す"""
+	raw = request.form.get('since_version')
+	if raw is None and request.is_json:
+		raw = (request.get_json(silent=True) or {}).get('since_version')
+	try:
+		return int(raw) if raw is not None else None
+	except (TypeError, ValueError):
+		return None
+
+
+def versioned_state_response(game: Game, state: dict) -> dict:
+	"""状態に新しいバージョンを振り、since_version があれば差分にして返す"""
+	return get_versioned_state(game).respond(state, get_since_version())
+
+
 @app.route('/reset')
 def reset():
+	token = session.get('game_token')
+	if token:
+		game_store.delete(token)
 	session.clear()
 	return redirect(url_for('index'))
 
@@ -179,7 +270,7 @@ def debug_tenpai():
 		return jsonify({'error': str(e)}), 400
 
 	save_game_to_session(game)
-	return jsonify(build_state_response(game, {'ok': True, 'action': 'debug_tenpai'}))
+	return jsonify(versioned_state_response(game, build_state_response(game, {'ok': True, 'action': 'debug_tenpai'}, get_requested_fields())))
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -197,7 +288,7 @@ def index():
 	hands_view = []
 	for player in game.players:
 		shanten_val = player.get_shanten()
-		print(f"[DEBUG] Player {player.player_id}: shanten={shanten_val}, hand={player.hand.to_list()}")
+		log_event(logger, logging.DEBUG, 'player_state', player_id=player.player_id, shanten=shanten_val, hand=player.hand.to_list())
 		hands_view.append({
 			'player': player.player_id,
 			'tiles': player.hand.to_list(),
@@ -275,13 +366,10 @@ def discard():
 	if result.get('error'):
 		return jsonify({'error': result.get('error')}), 400
 
-	# デバッグ用: Player 0のリーチフラグ状態を出力
-	print(f"--- DEBUG: Player 0 Riichi Status After Discard ---")
-	print(f"Flag in Object: {game.players[0].is_riichi}")
-	print(f"--------------------------------------------------")
+	log_event(logger, logging.DEBUG, 'riichi_after_discard', player_id=0, is_riichi=game.players[0].is_riichi)
 	# ゲーム状態をセッションに保存
 	save_game_to_session(game)
-	return jsonify(build_state_response(game, result))
+	return jsonify(versioned_state_response(game, build_state_response(game, result, get_requested_fields())))
 
 
 @app.route('/check_calls', methods=['POST'])
@@ -325,7 +413,7 @@ def apply_call():
 		return jsonify({'error': result.get('error', 'Failed to apply call')}), 400
 
 	save_game_to_session(game)
-	return jsonify(build_state_response(game, result))
+	return jsonify(versioned_state_response(game, build_state_response(game, result, get_requested_fields())))
 
 
 # 新しいルート: /check_agari
@@ -351,7 +439,7 @@ def check_agari():
 	win_result = game.check_and_calculate_win(player_id, win_tile, is_tsumo, is_riichi=is_riichi)
 	win_result['is_tsumo'] = is_tsumo
 	save_game_to_session(game)
-	return jsonify(build_state_response(game, win_result))
+	return jsonify(versioned_state_response(game, build_state_response(game, win_result, get_requested_fields())))
 
 # 暗槓の処理エンドポイント
 @app.route('/apply_ankan', methods=['POST'])
@@ -384,7 +472,13 @@ def apply_ankan_route():
     save_game_to_session(game)
 
     # 🔴 フロントエンドが必要とする正しいフォーマット（build_state_response）で返す
-    return jsonify(build_state_response(game, {'ok': True, 'action': 'ankan', 'next_draw': next_draw}))
+    return jsonify(versioned_state_response(game, build_state_response(game, {'ok': True, 'action': 'ankan', 'next_draw': next_draw}, get_requested_fields())))
+
+@app.route('/metrics')
+def metrics():
+	"""ホットパスの計測値とキャッシュ統計（Prometheus のテキスト形式）"""
+	return Response(render_prometheus(gauges=cache_gauges()), mimetype='text/plain; version=0.0.4')
+
 
 if __name__ == '__main__':
 	app.run(debug=True)